@@ -0,0 +1,330 @@
+# bench_render.py
+
+# Headless rendering benchmark: drives GameUI through scripted lobby, countdown, grid and
+# lock screens with the SDL dummy video driver (no display needed) and reports per-screen
+# frame-time percentiles for several window and grid sizes as JSON.
+#
+#   python bench_render.py
+#   python bench_render.py --frames 600 --sizes 1024x720,1920x1080 --grids 5x5,40x40 --out bench.json
+#   python bench_render.py --baseline bench.json --tolerance 0.25     # exit 1 when p90 regresses
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+import pygame
+from config import LOCK_WPM, GAME_TIME
+from game import Grid, Lock
+from game_ui import GameUI
+from typing_session import TypingSession
+from ui_assets import UIAssets
+from utils import calculate_points
+
+WORDS = ("the quick brown fox jumps over a lazy dog while seven wizards quietly "
+         "hex crafty jugglers near old harbour walls, and nobody minds it!").split()
+
+PLAYERS = {
+    "Alice": {"icon": "★", "score": 120, "locks_broken": 3},
+    "Bob": {"icon": "♞", "score": 80, "locks_broken": 2},
+    "Cara": {"icon": "◆", "score": 40, "locks_broken": 1},
+}
+
+
+# Stand-in for ClientNetwork: the UI only reads these fields and calls these methods
+class BenchNetwork:
+    def __init__(self):
+        self.presence = {}
+        self.progress = {}
+        self.packets_received = 0
+        self.rtt_ms = None
+        self.resyncs = 0
+        self.leaderboard = None
+        self.spectator = False
+        self.on_packet = None
+        self.next_req_id = 1
+
+    def _new_req_id(self):
+        req_id = self.next_req_id
+        self.next_req_id += 1
+        return req_id
+
+    def send_claim(self, lock_id):
+        return self._new_req_id()
+
+    def send_unclaim(self, lock_id):
+        return self._new_req_id()
+
+    def send_break(self, lock_id, user_string, wpm, trace=None):
+        pass
+
+    def send_cursor(self, cursor):
+        pass
+
+    def send_progress(self, lock_id, prefix_delta, wpm=None):
+        pass
+
+    def send_ping(self):
+        pass
+
+    def send_start_game(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def get_packet(self, msg_type):
+        return None
+
+    def take_snapshot(self):
+        return None
+
+    def queue_depth(self):
+        return 0, 0
+
+
+def make_grid(rows, cols, rng):
+    grid = Grid(rows, cols)
+    for i in range(rows * cols):
+        difficulty = rng.choice(list(LOCK_WPM))
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 12)))
+        wpm = LOCK_WPM[difficulty]
+        lock = Lock(i, difficulty, text, wpm, calculate_points(len(text), wpm), i // cols, i % cols)
+        roll = rng.random()
+        if roll < 0.1:
+            lock.broken = True
+            lock.broken_by_user = "Bob"
+            lock.points = 0
+        elif roll < 0.25:
+            lock.claimed_by_user = rng.choice(["Bob", "Cara"])
+        grid.grid.append(lock)
+    grid.remaining_locks = sum(1 for lock in grid.grid if not lock.broken)
+    return grid
+
+
+def make_ui(size, grid, assets):
+    network = BenchNetwork()
+    screen = pygame.display.set_mode(size, pygame.RESIZABLE)
+    ui = GameUI(grid, dict(PLAYERS), network, "Alice", screen=screen, assets=assets)
+    ui.host_id = "Alice"
+    ui.is_host = True
+    return ui, network
+
+
+# ---------- Scripted screens: each returns a per-frame callable ----------
+def lobby_script(ui, network, rng):
+    ui.in_lobby = True
+    ui.countdown_active = False
+
+    def frame(i):
+        ui._render_lobby_screen()
+    return frame
+
+
+def countdown_script(ui, network, rng):
+    ui.in_lobby = True
+    ui.countdown_active = True
+
+    def frame(i):
+        if pygame.time.get_ticks() >= (ui.countdown_end_ticks or 0):
+            ui.countdown_end_ticks = pygame.time.get_ticks() + 3000
+        ui._render_countdown_screen()
+    return frame
+
+
+def grid_script(ui, network, rng, pointer):
+    ui.in_lobby = False
+    ui.game_start_ticks = pygame.time.get_ticks()
+    ui._scene = None
+    locks = ui.grid.grid
+
+    def frame(i):
+        # Pointer sweeps the viewport so hover, tooltip and cursor updates all get exercised
+        clip = ui.grid_clip
+        pointer[0] = (
+            int(clip.x + (math.sin(i * 0.05) * 0.5 + 0.5) * (clip.w - 1)),
+            int(clip.y + (math.sin(i * 0.037 + 1) * 0.5 + 0.5) * (clip.h - 1)),
+        )
+        if i % 45 == 0:
+            ui._add_toast(f"Unlocked! +{rng.randint(5, 60)} pts", color=(120, 255, 120))
+        if i % 10 == 0:
+            lock = rng.choice(locks)
+            if not lock.broken:
+                lock.claimed_by_user = rng.choice([None, "Bob", "Cara"])
+        if i % 3 == 0:
+            network.presence = {
+                "Bob": (rng.randrange(ui.grid.width * 16), rng.randrange(ui.grid.height * 16)),
+                "Cara": (rng.randrange(ui.grid.width * 16), rng.randrange(ui.grid.height * 16)),
+            }
+        if i % 5 == 0:
+            network.progress = {locks[0].lock_id: (i % 20, 30 + i % 40)}
+        ui.render(max(0, GAME_TIME - i // 60))
+    return frame
+
+
+def lock_script(ui, network, rng):
+    ui.in_lobby = False
+    ui.game_start_ticks = pygame.time.get_ticks()
+    lock = next(lock for lock in ui.grid.grid if not lock.broken)
+    lock.lock_string = " ".join(rng.choice(WORDS) for _ in range(40))     # long enough to wrap and to keep typing
+    ui.selected_lock = lock
+    ui.typing = TypingSession(lock)
+
+    def frame(i):
+        # Mostly correct typing with the odd typo and backspace; starts over when the text runs out
+        typing = ui.typing
+        if len(typing) >= len(lock.lock_string):
+            ui.typing = typing = TypingSession(lock)
+        roll = rng.random()
+        if roll < 0.05:
+            typing.backspace()
+        elif roll < 0.1:
+            typing.type_text("x")
+        else:
+            typing.type_text(lock.lock_string[len(typing)])
+        ui.wpm = 40 + i % 30
+        ui.render_lock_screen(lock, max(0, GAME_TIME - i // 60))
+    return frame
+
+
+def run_screen(frame, frames, warmup):
+    for i in range(warmup):
+        frame(i)
+    times = []
+    for i in range(warmup, warmup + frames):
+        start = time.perf_counter()
+        frame(i)
+        times.append((time.perf_counter() - start) * 1000)
+        pygame.event.pump()
+    return times
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(times):
+    ordered = sorted(times)
+    return {
+        "frames": len(times),
+        "mean_ms": round(sum(times) / len(times), 4),
+        "p50_ms": round(percentile(ordered, 50), 4),
+        "p90_ms": round(percentile(ordered, 90), 4),
+        "p99_ms": round(percentile(ordered, 99), 4),
+        "max_ms": round(ordered[-1], 4),
+    }
+
+
+def parse_dims(text):
+    dims = []
+    for item in text.split(","):
+        a, b = item.lower().split("x")
+        dims.append((int(a), int(b)))
+    return dims
+
+
+def run(args):
+    pygame.init()
+    # The dummy driver has no pointer, so the grid script positions it through this hook
+    pointer = [(0, 0)]
+    pygame.mouse.get_pos = lambda: pointer[0]
+    pygame.mouse.get_focused = lambda: True
+    # Fonts and text cache are shared by every configuration, as the client shares them across screens
+    assets = None
+
+    results = []
+    for size in parse_dims(args.sizes):
+        for g, (rows, cols) in enumerate(parse_dims(args.grids)):
+            rng = random.Random(args.seed)
+            grid = make_grid(rows, cols, rng)
+            if assets is None:
+                pygame.display.set_mode(size, pygame.RESIZABLE)
+                assets = UIAssets()
+                assets.build(size)
+            ui, network = make_ui(size, grid, assets)
+            screens = [("grid", grid_script(ui, network, rng, pointer))]
+            if g == 0:
+                # Lobby, countdown and lock screen do not depend on the board size
+                screens = [
+                    ("lobby", lobby_script(ui, network, rng)),
+                    ("countdown", countdown_script(ui, network, rng)),
+                ] + screens + [("lock", lock_script(ui, network, rng))]
+            for name, frame in screens:
+                stats = summarize(run_screen(frame, args.frames, args.warmup))
+                entry = {
+                    "screen": name,
+                    "window": list(size),
+                    "grid": [rows, cols] if name == "grid" else None,
+                    **stats,
+                }
+                results.append(entry)
+                grid_label = f"{rows}x{cols}" if name == "grid" else "-"
+                print(f"{name:<10} {size[0]}x{size[1]:<6} {grid_label:<8} "
+                      f"p50 {stats['p50_ms']:7.3f}  p90 {stats['p90_ms']:7.3f}  p99 {stats['p99_ms']:7.3f} ms")
+    pygame.quit()
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pygame": pygame.version.ver,
+            "sdl": ".".join(str(v) for v in pygame.get_sdl_version()),
+            "platform": platform.platform(),
+            "video_driver": os.environ.get("SDL_VIDEODRIVER"),
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+
+# Entries whose p90 grew by more than tolerance against a previous run of the same configuration
+def regressions(report, baseline, tolerance):
+    def key(entry):
+        return entry["screen"], tuple(entry["window"]), tuple(entry["grid"] or ())
+    previous = {key(entry): entry for entry in baseline.get("results", [])}
+    slower = []
+    for entry in report["results"]:
+        old = previous.get(key(entry))
+        if old and entry["p90_ms"] > old["p90_ms"] * (1 + tolerance):
+            slower.append((entry, old))
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless GameUI rendering benchmark")
+    parser.add_argument("--frames", type=int, default=300, help="measured frames per screen")
+    parser.add_argument("--warmup", type=int, default=30, help="unmeasured frames before each screen")
+    parser.add_argument("--sizes", default="1024x720,1920x1080", help="window sizes, WxH comma separated")
+    parser.add_argument("--grids", default="5x5,40x40", help="board sizes, RxC comma separated")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default="bench_render.json", help="JSON report path")
+    parser.add_argument("--baseline", help="previous JSON report to compare p90 against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p90 growth over the baseline")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        slower = regressions(report, baseline, args.tolerance)
+        for entry, old in slower:
+            print(f"REGRESSION {entry['screen']} {entry['window']} {entry['grid']}: "
+                  f"p90 {old['p90_ms']:.3f} -> {entry['p90_ms']:.3f} ms")
+        if slower:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# bench_text.py
+
+# Microbenchmark for lock-matching text normalization: times normalize_text_for_match on
+# ASCII lock strings, typographic input and NFKC-changing input, and the per-break check
+# (input normalized once, target precomputed on the Lock) against the previous implementation,
+# whose results it must reproduce exactly.
+#
+#   python bench_text.py
+#   python bench_text.py --number 50000
+
+import argparse
+import random
+import time
+import unicodedata
+from game import Lock
+from utils import normalize_text_for_match
+
+WORDS = ("the quick brown fox jumps over a lazy dog while seven wizards quietly "
+         "hex crafty jugglers near old harbour walls, and nobody minds it!").split()
+
+
+# The implementation before the single-pass table, kept here as the reference
+def legacy_normalize(text):
+    if text is None:
+        return ""
+    text = (
+        text
+        .replace("\u00A0", " ")
+        .replace("\u2007", " ")
+        .replace("\u202F", " ")
+        .replace("\u2009", " ")
+    )
+    text = (
+        text
+        .replace("\u200B", "")
+        .replace("\u200C", "")
+        .replace("\u200D", "")
+        .replace("\u2060", "")
+        .replace("\uFEFF", "")
+    )
+    translation_map = {
+        ord('‘'): "'", ord('’'): "'", ord('‚'): "'", ord('‛'): "'", ord('`'): "'",
+        ord('“'): '"', ord('”'): '"', ord('„'): '"', ord('″'): '"',
+        ord('–'): "-", ord('—'): "-", ord('−'): "-",
+    }
+    text = text.translate(translation_map)
+    text = unicodedata.normalize('NFKC', text)
+    return text.strip()
+
+
+def make_samples(rng, count):
+    ascii_text = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14))) for _ in range(count)]
+    typographic = [
+        s.replace("'", "\u2019").replace(" a ", " a\u00a0").replace(",", " \u2014") + "\u200b" for s in ascii_text
+    ]
+    compat = [s.replace("fox", "\uff46\uff4f\uff58").replace("fi", "\ufb01") + " \u2460" for s in ascii_text]
+    return {"ascii": ascii_text, "typographic": typographic, "nfkc": compat}
+
+
+def best_of(fn, items, number, repeat=5):
+    # best per-call time in microseconds
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number // len(items)):
+            for item in items:
+                fn(item)
+        best = min(best, (time.perf_counter() - start) / (number // len(items) * len(items)))
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Text normalization microbenchmark")
+    parser.add_argument("--number", type=int, default=20000, help="calls per timing run")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    samples = make_samples(rng, 200)
+
+    # Same results as before on every sample
+    for items in samples.values():
+        for text in items:
+            assert normalize_text_for_match(text) == legacy_normalize(text), text
+
+    print(f"{'case':<22}{'legacy us':>12}{'now us':>10}{'speedup':>10}")
+    for name, items in samples.items():
+        old = best_of(legacy_normalize, items, args.number)
+        new = best_of(normalize_text_for_match, items, args.number)
+        print(f"normalize {name:<12}{old:12.3f}{new:10.3f}{old / new:9.1f}x")
+
+    # Break check: the submitted input against the lock string
+    locks = [Lock(i, "easy", text, 26, 10, 0, i) for i, text in enumerate(samples["ascii"])]
+    pairs = list(zip(locks, samples["typographic"]))
+    old = best_of(lambda pair: legacy_normalize(pair[1]) == legacy_normalize(pair[0].lock_string), pairs, args.number)
+    new = best_of(lambda pair: normalize_text_for_match(pair[1]) == pair[0].normalized_string, pairs, args.number)
+    print(f"{'break check':<22}{old:12.3f}{new:10.3f}{old / new:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,19 +10,38 @@
 # 5. Update grid + scoreboard based on server messages
 
 import sys
+import threading
+import time
 import pygame
 from networking import ClientNetwork
-from game import Grid
 from game_ui import GameUI
-from messages import MSG_GRID_UPDATE, MSG_JOIN_ACK
+from ui_assets import UIAssets
+from messages import MSG_JOIN_ACK
 from config import *
 
+# Replay viewer: python client.py --replay replays/<file>.cotr [speed]
+# Plays a recorded match offline; no server connection is made.
+if len(sys.argv) > 2 and sys.argv[1] == "--replay":
+    from replay import ReplayReader, ReplayPlayer, ReplayNetwork
+    reader = ReplayReader(sys.argv[2])
+    replay = ReplayPlayer(reader, speed=float(sys.argv[3]) if len(sys.argv) > 3 else 1.0)
+    pygame.init()
+    screen = pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE)
+    GameUI(replay.grid, replay.players, ReplayNetwork(replay), None, screen=screen).run_replay(replay)
+    reader.close()
+    pygame.quit()
+    sys.exit(0)
+
 # Allow overriding server IP/port via CLI
 # Usage: python client.py <user_id> <server_ip> <port>
-user_id = sys.argv[1] if len(sys.argv) > 1 else "Player1"
-server_ip = sys.argv[2] if len(sys.argv) > 2 else "127.0.0.1"
+# Watch without playing: python client.py --spectate <name> <server_ip> <port>
+# (the address may be a relay.py instance instead of the game server)
+spectator = len(sys.argv) > 1 and sys.argv[1] == "--spectate"
+args = sys.argv[2:] if spectator else sys.argv[1:]
+user_id = args[0] if len(args) > 0 else ("Spectator" if spectator else "Player1")
+server_ip = args[1] if len(args) > 1 else "127.0.0.1"
 try:
-    server_port = int(sys.argv[3]) if len(sys.argv) > 3 else 5555
+    server_port = int(args[2]) if len(args) > 2 else 5555
 except ValueError:
     server_port = 5555
 
@@ -32,41 +51,100 @@ if server_ip == "0.0.0.0":
     server_ip = "127.0.0.1"
 
 """
-Show a small non-blocking connecting window while waiting for the server's
-initial grid update. This guarantees a window appears even if the network
-message is delayed.
+One pygame display session covers connecting, loading and the game. The socket
+connect and join handshake run on a helper thread while this thread builds the
+UI fonts, CRT overlays and text cache a few milliseconds per frame (SDL_ttf is
+not thread-safe, so rendering stays here). GameUI then reuses the same window
+and assets instead of re-initialising pygame.
 """
 
-# Connect to the server
-network = ClientNetwork(user_id, server_ip, server_port)
-print("[CLIENT] Waiting for initial grid update...")
-
-# Lightweight connecting window
 pygame.init()
-screen = pygame.display.set_mode((420, 180))
+screen = pygame.display.set_mode(WINDOW_SIZE, pygame.RESIZABLE)
 pygame.display.set_caption("Clash Of Typers — Connecting…")
 font = pygame.font.Font(None, 28)
 clock = pygame.time.Clock()
+hud_text = GRID_COLORS.get("hud_text", (226, 203, 156))
+
+# Connect to the server in the background
+connection = {}
+
+
+def connect():
+    try:
+        connection["network"] = ClientNetwork(user_id, server_ip, server_port, spectator=spectator)
+    except BaseException as e:
+        connection["error"] = e
+
+
+threading.Thread(target=connect, daemon=True).start()
 
-init_packet = None
+
+# The grid arrives as a seed; build the sentence corpus it is generated from meanwhile
+def warm_corpus():
+    try:
+        from corpus import get_corpus
+        get_corpus()
+    except Exception:
+        pass                                                            # networking falls back to a full grid download
+
+
+threading.Thread(target=warm_corpus, daemon=True).start()
+print("[CLIENT] Waiting for initial grid update...")
+
+assets = UIAssets()
+asset_steps = assets.build_steps(screen.get_size())
+
+network = None
+init_state = None
 ack = None
 frame_counter = 0
 running_conn = True
-while (init_packet is None or ack is None) and running_conn:
+while (init_state is None or ack is None or not assets.ready) and running_conn:
     clock.tick(60)
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running_conn = False
             break
+        elif event.type == pygame.VIDEORESIZE:
+            screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+
+    if "error" in connection:
+        pygame.quit()
+        raise connection["error"]
+
+    # Preload UI assets within this frame's budget
+    deadline = time.perf_counter() + ASSET_BUDGET_MS / 1000
+    while not assets.ready and time.perf_counter() < deadline:
+        next(asset_steps, None)
 
-    # Draw simple status
-    screen.fill((20, 20, 20))
+    # Draw title, status and preload progress
+    width, height = screen.get_size()
+    screen.fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
+    title_font = assets.fonts.get("title_font")
+    if title_font:
+        title = title_font.render("CLASH OF TYPERS", True, hud_text)
+        screen.blit(title, ((width - title.get_width()) // 2, height // 2 - 110))
     dots = (frame_counter // 20) % 4
-    status = f"Connecting to {server_ip}:{server_port}" + ("." * dots)
-    text = font.render(status, True, (220, 220, 220))
-    screen.blit(text, (20, 70))
+    if network is None:
+        status = f"Connecting to {server_ip}:{server_port}"
+    elif ack is None or init_state is None:
+        status = "Joining game"
+    else:
+        status = "Loading"
+    text = font.render(status + ("." * dots), True, (220, 220, 220))
+    screen.blit(text, ((width - text.get_width()) // 2, height // 2 + 40))
+    bar_w = min(600, width - 200)
+    bar_rect = pygame.Rect((width - bar_w) // 2, height // 2, bar_w, 18)
+    pygame.draw.rect(screen, (20, 20, 20), bar_rect)
+    pygame.draw.rect(screen, hud_text, pygame.Rect(bar_rect.x, bar_rect.y, int(bar_w * assets.progress()), 18))
+    pygame.draw.rect(screen, GRID_COLORS.get("border", (255, 120, 0)), bar_rect, 3)
     pygame.display.flip()
 
+    network = connection.get("network")
+    if network is None:
+        frame_counter += 1
+        continue
+
     # Poll for join ack and initial grid packet
     if ack is None:
         ack = network.get_packet(MSG_JOIN_ACK)
@@ -77,21 +155,21 @@ while (init_packet is None or ack is None) and running_conn:
                 network.user_id = user_id
             except Exception:
                 pass
-    init_packet = network.get_packet(MSG_GRID_UPDATE)
+    if init_state is None:
+        init_state = network.take_snapshot()
+    network.flush()
     frame_counter += 1
 
 if not running_conn:
     pygame.quit()
-    network.close()
+    if network is not None:
+        network.close()
     sys.exit(0)
 
-# Tear down the temporary window before launching full UI
-pygame.quit()
-
-# Extract grid and players
-grid = Grid.from_dict(init_packet["grid"], GRID_ROWS, GRID_COLS)
-players = init_packet["players"]
+# Grid and players were already materialized by the network thread
+grid = init_state.grid
+players = init_state.players
 
-# Launch the UI
-game_ui = GameUI(grid, players, network, user_id)
-game_ui.run()
+# Launch the UI in the same window, with the preloaded assets
+game_ui = GameUI(grid, players, network, user_id, screen=screen, assets=assets)
+game_ui.run(show_title=False)
@@ -26,6 +26,7 @@ LOCK_STRING_RANGES = {
     "medium": (2, 4),
     "hard": (3, 5)
 }
+DIFFICULTY_MIX = (1, 1, 1)      # relative weights of easy/medium/hard locks in a generated grid
 GRID_COLORS = {
     "easy": (0, 255, 128),          # Neon Green - Easy
     "medium": (255, 200, 0),        # Golden Yellow - Medium  
@@ -38,3 +39,66 @@ GRID_COLORS = {
     "hud_text": (255, 210, 140)     # Warm light orange
 }
 
+
+# Live presence (opponent cursors, typing progress)
+SERVER_TICK_RATE = 20           # server flushes batched presence frames this many times per second
+CURSOR_SEND_RATE = 15           # max cursor updates per second sent by each client
+CURSOR_STEPS = 16               # cursor resolution: quantization steps per tile (grid-relative)
+PROGRESS_SEND_RATE = 10         # max typing-progress updates per second sent while on a lock
+
+# Spectators (read-only connections, see fanout.py and relay.py)
+SPECTATOR_TICK_RATE = 5         # shared spectator frames per second (players get SERVER_TICK_RATE)
+SPECTATOR_MAX_PENDING = 1 << 20 # unsent bytes a spectator may fall behind before it is dropped
+SPECTATOR_SEND_BUDGET_MS = 2    # longest one loop pass spends writing to spectators
+SPECTATOR_MAX_DIRECT = 200      # spectators the game server feeds itself; more should watch through relay.py
+RELAY_PORT = 5556               # default listen port of relay.py
+
+# Live leaderboard
+LEADERBOARD_TOP = 5             # entries pushed to every client when scores change
+LEADERBOARD_MAX = 50            # most entries a client may ask for
+LEADERBOARD_REFRESH_MS = 2000   # spectators re-ask this often while the panel is open (players get pushes)
+
+# Match history (server)
+HISTORY_DB = "match_history.db" # SQLite file, WAL mode
+HISTORY_BATCH = 64              # most finished matches written in one transaction
+
+# Match replays
+REPLAY_RECORD = True            # server records every match to REPLAY_DIR
+REPLAY_DIR = "replays"
+REPLAY_KEYFRAME_SECONDS = 5     # full-state keyframe interval; a seek replays at most this much
+REPLAY_SEEK_SECONDS = 5         # left/right arrow step in the replay viewer
+REPLAY_MAX_SPEED = 16           # playback speed range (halved/doubled with down/up)
+REPLAY_MIN_SPEED = 0.25
+
+WINDOW_SIZE = (1024, 720)       # initial client window (resizable)
+
+# Typing
+KEYSTROKE_WINDOW = 40           # key events behind rolling WPM, burst and consistency
+
+# Keystroke proof (server-side check of the trace sent with a break request)
+PROOF_MAX_BYTES = 1024          # decoded trace size limit (a typical lock needs a few hundred)
+PROOF_MAX_WPM = 220             # faster than this over a whole lock is rejected
+PROOF_MIN_GAP_MS = 12           # key gaps below this are treated as injected/pasted
+PROOF_FAST_SHARE = 0.25         # max share of such gaps in one trace
+PROOF_MIN_CV = 0.05             # key gaps more regular than this (std/mean) look scripted
+PROOF_CV_MIN_KEYS = 20          # ...checked only with at least this many key gaps
+PROOF_LEN_SLACK = 2             # allowed difference between typed and lock length (normalization)
+
+# Board camera (large grids scroll; wheel and +/- zoom)
+ZOOM_STEP = 1.25                # zoom factor per wheel notch / key press
+ZOOM_MAX = 3.0                  # largest zoom relative to the fitted tile size
+
+# Frame pacing
+TARGET_FPS = 60                 # frame cap while something is changing on screen
+IDLE_WAIT_MS = 250              # longest the UI sleeps between frames when nothing is animating
+MINIMIZED_FPS = 5               # frame cap while the window is minimized
+
+# Performance HUD (F3)
+PERF_HISTORY = 120              # frames kept for FPS, percentiles and the frame-time histogram
+PERF_GRAPH_H = 40               # histogram height in pixels
+PING_INTERVAL_MS = 1000         # RTT probe rate while the HUD is open
+
+# Rendering
+CRT_OVERLAY = True              # flicker/scanline/vignette effect; turn off on low-end hardware
+TEXT_CACHE_SIZE = 512           # max rendered text surfaces kept by the client (LRU)
+ASSET_BUDGET_MS = 8             # per-frame time spent preloading UI assets on the connecting screen
@@ -0,0 +1,183 @@
+# corpus.py
+
+# Lock sentence corpus: every Gutenberg sentence is cleaned once, scored
+# for typing cost in one NumPy pass, and bucketed by difficulty, so grid generation
+# picks a sentence and its score in O(1) per lock. Clients build the same corpus to
+# rebuild a grid from its seed (see Grid.generate_locks).
+#
+# Typing cost is in "character equivalents": a plain lowercase letter costs 1, and
+# capitals, punctuation, rare symbols and awkward key transitions (same finger,
+# same hand, row jumps) add to it; alternating hands is slightly cheaper.
+
+import hashlib
+import threading
+import numpy as np
+from nltk.corpus import gutenberg
+from config import LOCK_STRING_RANGES
+from utils import _clean_join
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# QWERTY, unshifted; shifted symbols are looked up through their base key
+KEY_ROWS = ("`1234567890-=", "qwertyuiop[]\\", "asdfghjkl;'", "zxcvbnm,./")
+# finger per key column: 0-3 left pinky..index, 4-7 right index..pinky
+KEY_FINGERS = (0, 0, 1, 2, 3, 3, 4, 4, 5, 6, 7, 7, 7, 7)
+SHIFTED = dict(zip('~!@#$%^&*()_+{}|:"<>?', "`1234567890-=[]\\;',./"))
+
+# Per-character costs
+COST_BASE = 1.0
+COST_SHIFT = 0.6                # capitals and shifted symbols
+COST_PUNCT = 0.25               # , . ' and space-adjacent punctuation the corpus is full of
+COST_RARE = 0.8                 # digits and every other symbol
+COST_NON_ASCII = 1.5
+COMMON_PUNCT = ",.'"
+
+# Per-transition costs (previous key -> this key)
+COST_SAME_FINGER = 0.45
+COST_SAME_HAND = 0.12
+COST_ROW_JUMP = 0.2             # same hand, two or more rows apart
+COST_ALTERNATE = -0.08
+
+NON_ASCII = 127                 # every code point above ASCII is scored as this code
+COST_SCALE = 100                # the table holds integer hundredths, so sums are exact on every machine
+
+
+# (128, 128) table: cost of typing code b right after code a (in 1/COST_SCALE); code 0 is the sentence separator
+def build_cost_table():
+    hand = np.full(128, -1)
+    finger = np.full(128, -1)
+    row = np.zeros(128, dtype=np.int64)
+    unary = np.zeros(128)
+    for code in range(1, 128):
+        ch = chr(code)
+        base = SHIFTED.get(ch, ch.lower())
+        for r, keys in enumerate(KEY_ROWS):
+            col = keys.find(base)
+            if col >= 0:
+                finger[code] = KEY_FINGERS[col]
+                hand[code] = 0 if KEY_FINGERS[col] < 4 else 1
+                row[code] = r
+                break
+        if ch == " ":
+            cost = COST_BASE
+        elif ch.isalpha():
+            cost = COST_BASE + (COST_SHIFT if ch.isupper() else 0.0)
+        elif ch in COMMON_PUNCT:
+            cost = COST_BASE + COST_PUNCT
+        else:
+            cost = COST_BASE + COST_RARE + (COST_SHIFT if ch in SHIFTED else 0.0)
+        unary[code] = cost
+    unary[NON_ASCII] = COST_BASE + COST_NON_ASCII
+
+    a_hand, b_hand = hand[:, None], hand[None, :]
+    typed = (a_hand >= 0) & (b_hand >= 0)
+    same_hand = typed & (a_hand == b_hand)
+    same_finger = same_hand & (finger[:, None] == finger[None, :]) & ~np.eye(128, dtype=bool)
+    row_jump = same_hand & (np.abs(row[:, None] - row[None, :]) >= 2)
+    table = (
+        unary[None, :]
+        + COST_SAME_FINGER * same_finger
+        + COST_SAME_HAND * (same_hand & ~same_finger)
+        + COST_ROW_JUMP * row_jump
+        + COST_ALTERNATE * (typed & (a_hand != b_hand))
+    )
+    table[:, 0] = 0.0                                                   # the separator itself is free
+    return np.rint(table * COST_SCALE).astype(np.int64)
+
+
+COST_TABLE = build_cost_table()
+
+
+# Typing cost of every sentence, computed over the whole corpus at once
+def score_sentences(sentences):
+    if not sentences:
+        return np.zeros(0)
+    text = "\0" + "\0".join(sentences)
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    codes = np.minimum(codes, NON_ASCII).astype(np.intp)
+    pair_costs = COST_TABLE[codes[:-1], codes[1:]]
+    lengths = np.fromiter(map(len, sentences), dtype=np.int64, count=len(sentences))
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))      # pair index of each sentence's first character
+    return np.add.reduceat(pair_costs, starts) / COST_SCALE
+
+
+class Corpus:
+    def __init__(self, sentences):
+        self.sentences = sentences
+        self.lengths = np.fromiter(map(len, sentences), dtype=np.int64, count=len(sentences))
+        self.scores = score_sentences(sentences)                        # typing cost, same order as sentences
+        self.buckets = self._bucket()
+        self.version = self._version()
+
+    # identifies sentences + scoring: equal versions generate identical grids from the same seed
+    def _version(self):
+        digest = hashlib.sha256(COST_TABLE.tobytes())
+        digest.update(repr(sorted(LOCK_STRING_RANGES.items())).encode())
+        for sentence in self.sentences:
+            digest.update(sentence.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()[:16]
+
+    # difficulty -> indices of the sentences that fit its length range and cost-per-character tercile
+    def _bucket(self):
+        buckets = {}
+        ranges = {d: [x * 5 for x in LOCK_STRING_RANGES[d]] for d in DIFFICULTIES}     # assume word length is 5 chars
+        lo = min(r[0] for r in ranges.values())
+        hi = max(r[1] for r in ranges.values())
+        pool = (self.lengths >= lo) & (self.lengths <= hi)
+        if not pool.any():
+            return {d: np.zeros(0, dtype=np.int64) for d in DIFFICULTIES}
+
+        intensity = self.scores / np.maximum(self.lengths, 1)
+        edges = np.quantile(intensity[pool], [1 / 3, 2 / 3])
+        tier = np.digitize(intensity, edges)
+        for level, difficulty in enumerate(DIFFICULTIES):
+            d_lo, d_hi = ranges[difficulty]
+            fits = (self.lengths >= d_lo) & (self.lengths <= d_hi)
+            idx = np.flatnonzero(fits & (tier == level))
+            if not idx.size:
+                idx = np.flatnonzero(fits)                              # tiny corpora: length alone
+            buckets[difficulty] = idx
+        return buckets
+
+    # index of a random sentence for difficulty (avoiding `taken` when possible), or None
+    def pick(self, difficulty, rng, taken=()):
+        idx = self.buckets.get(difficulty)
+        if idx is None or not idx.size:
+            return None
+        for _ in range(8):
+            i = int(idx[rng.randrange(idx.size)])
+            if i not in taken:
+                break
+        return i
+
+
+def load_sentences():
+    # cleaned, de-duplicated, non-empty; order kept so a corpus is reproducible
+    seen = set()
+    sentences = []
+    for words in gutenberg.sents():
+        text = _clean_join(words)
+        if text and text not in seen:
+            seen.add(text)
+            sentences.append(text)
+    return sentences
+
+
+_corpus = None
+_corpus_lock = threading.Lock()
+
+
+# built on first use, then shared by every grid generated in this process
+# (clients may warm it from a background thread while connecting)
+def get_corpus():
+    global _corpus
+    with _corpus_lock:
+        if _corpus is None:
+            _corpus = Corpus(load_sentences())
+    return _corpus
+
+
+# True once get_corpus() has finished; lets the network thread avoid waiting on the load
+def corpus_ready():
+    return _corpus is not None
@@ -0,0 +1,108 @@
+# fanout.py
+
+# Non-blocking fan-out of pre-encoded frames to many read-only viewers (spectators on the
+# server, viewers on relay.py). A frame is encoded once and the same bytes object is queued
+# for every viewer, so publishing costs O(1) per viewer; sockets are written only as far as
+# they accept without blocking, within a time budget per call, and a viewer that falls too
+# far behind is dropped instead of holding memory or slowing the loop down.
+
+import time
+from collections import deque
+from config import SPECTATOR_MAX_PENDING, SPECTATOR_SEND_BUDGET_MS
+
+
+class _Viewer:
+    __slots__ = ("sock", "name", "pending", "offset", "queued")
+
+    def __init__(self, sock, name):
+        self.sock = sock
+        self.name = name
+        self.pending = deque()          # shared frame bytes, oldest first
+        self.offset = 0                 # bytes of pending[0] already sent
+        self.queued = 0                 # unsent bytes
+
+
+class Fanout:
+    def __init__(self, max_pending=SPECTATOR_MAX_PENDING, budget_ms=SPECTATOR_SEND_BUDGET_MS):
+        self.viewers = {}               # socket -> _Viewer
+        self.max_pending = max_pending
+        self.budget = budget_ms / 1000
+        self.next_start = 0             # round-robin start, so a budget cut never starves the same viewers
+        self.dropped = []               # sockets dropped as too slow, for the owner to close and forget
+
+    def __len__(self):
+        return len(self.viewers)
+
+    def __contains__(self, sock):
+        return sock in self.viewers
+
+    def add(self, sock, name=None):
+        sock.setblocking(False)
+        self.viewers[sock] = _Viewer(sock, name)
+
+    def remove(self, sock):
+        self.viewers.pop(sock, None)
+
+    def name(self, sock):
+        viewer = self.viewers.get(sock)
+        return viewer.name if viewer else None
+
+    # queue one encoded frame for a single viewer (initial state, replies)
+    def send_to(self, sock, frame):
+        viewer = self.viewers.get(sock)
+        if viewer is not None and frame:
+            self._queue(viewer, frame)
+
+    # queue one encoded frame for every viewer
+    def publish(self, frame):
+        if not frame:
+            return
+        for viewer in list(self.viewers.values()):
+            self._queue(viewer, frame)
+
+    def _queue(self, viewer, frame):
+        if viewer.queued + len(frame) > self.max_pending:
+            self._drop(viewer)
+            return
+        viewer.pending.append(frame)
+        viewer.queued += len(frame)
+
+    def _drop(self, viewer):
+        if self.viewers.pop(viewer.sock, None) is not None:
+            self.dropped.append(viewer.sock)
+
+    # sockets with unsent data, to watch for write readiness
+    def writers(self):
+        return [viewer.sock for viewer in self.viewers.values() if viewer.queued]
+
+    # write what the sockets accept without blocking; stop once the time budget is used up
+    def flush(self):
+        viewers = [viewer for viewer in self.viewers.values() if viewer.queued]
+        if not viewers:
+            return
+        deadline = time.perf_counter() + self.budget
+        start = self.next_start % len(viewers)
+        for i in range(len(viewers)):
+            viewer = viewers[(start + i) % len(viewers)]
+            self._write(viewer)
+            if time.perf_counter() >= deadline:
+                self.next_start = start + i + 1
+                return
+        self.next_start = 0
+
+    def _write(self, viewer):
+        while viewer.pending:
+            frame = viewer.pending[0]
+            try:
+                sent = viewer.sock.send(memoryview(frame)[viewer.offset:])
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                self._drop(viewer)
+                return
+            viewer.offset += sent
+            viewer.queued -= sent
+            if viewer.offset < len(frame):
+                return                                                  # socket buffer full
+            viewer.pending.popleft()
+            viewer.offset = 0
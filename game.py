@@ -3,9 +3,13 @@
 # Contains game logic used by the client: grid layout, lock objects,etc.
 # Author: Manan + Rushik
 
+import hashlib
 import random
-from utils import generate_strings, calculate_points, get_difficulty, normalize_text_for_match
+from utils import calculate_points, get_difficulty, normalize_text_for_match
 from config import LOCK_WPM as target_range
+from config import DIFFICULTY_MIX
+
+FALLBACK_STRING = "Couldn't find string, now have fun TyPinG tHis iNSteAd!"
 
 # defines lock objects on the grid and helpers to access information
 class Lock:
@@ -13,6 +17,7 @@ class Lock:
         self.lock_id = lock_id
         self.difficulty = difficulty
         self.lock_string = lock_string
+        self.normalized_string = normalize_text_for_match(lock_string)      # break attempts compare against this
         self.wpm_target = wpm_target
         self.points = points
         self.broken = False
@@ -80,18 +85,40 @@ class Grid:
         self.size = height * width
         self.remaining_locks = self.size
         self.grid = []
+        # layout identity (set by generate_locks): seed, difficulty mix, corpus version and checksum
+        self.seed = None
+        self.mix = list(DIFFICULTY_MIX)
+        self.corpus_version = None
+        self.checksum = None
 
     # generate all locks for the grid
-    def generate_locks(self):
-        self._difficulty_list = [get_difficulty(random.randint(0, 2)) for _ in range(self.size)]
-        self._strings = generate_strings(self._difficulty_list, self.size)
-        
+    # sentences and their typing-cost scores come from the pre-scored corpus, so each lock is O(1)
+    # deterministic for a given (seed, corpus version, dimensions, difficulty mix): clients rebuild it locally
+    def generate_locks(self, seed=None, mix=DIFFICULTY_MIX):
+        from corpus import get_corpus                                   # needs NumPy
+        corpus = get_corpus()
+        rng = random.Random(seed)
+        self.seed = seed
+        self.mix = list(mix)
+        self.corpus_version = corpus.version
+        self._difficulty_list = [get_difficulty(level) for level in rng.choices(range(3), weights=self.mix, k=self.size)]
+        self._strings = []
+
+        taken = set()
         grid = []
         for i in range(self.size):
             difficulty = self._difficulty_list[i]
-            string = self._strings[i]
+            index = corpus.pick(difficulty, rng, taken)
+            if index is None:
+                string = FALLBACK_STRING                                # need this to prevent run time errors for now
+                cost = len(string)
+            else:
+                taken.add(index)
+                string = corpus.sentences[index]
+                cost = float(corpus.scores[index])
+            self._strings.append(string)
             wpm = target_range[difficulty]
-            points = calculate_points(len(string), wpm)
+            points = calculate_points(cost, wpm)
             row = i // self.width
             col = i % self.width
             lock = Lock(i, difficulty, string, wpm, points, row, col)
@@ -99,6 +126,45 @@ class Grid:
             grid.append(lock)
 
         self.grid = grid
+        self.checksum = self.layout_checksum()
+
+    # hash of the generated content of every lock (not its claim/break state)
+    def layout_checksum(self):
+        digest = hashlib.sha256()
+        for lock in self.grid:
+            digest.update(f"{lock.lock_id}\x1f{lock.difficulty}\x1f{lock.lock_string}\x1f{lock.wpm_target}\x1f{lock.points}\x1f{lock.row}\x1f{lock.col}\x1e".encode())
+        return digest.hexdigest()[:16]
+
+    # what a client needs to rebuild this grid with generate_locks
+    def layout_dict(self):
+        return {
+            "seed": self.seed,
+            "mix": self.mix,
+            "corpus": self.corpus_version,
+            "rows": self.height,
+            "cols": self.width,
+            "checksum": self.checksum,
+        }
+
+    # claim/break state of the locks that are not untouched: lock_id -> [claimed_by_user, broken_by_user]
+    def state_dict(self):
+        return {
+            lock.lock_id: [lock.claimed_by_user, lock.broken_by_user]
+            for lock in self.grid
+            if lock.claimed_by_user is not None or lock.broken
+        }
+
+    # overwrite claim/break state from state_dict() output (JSON keys arrive as strings)
+    def apply_state(self, state):
+        entries = {int(lock_id): entry for lock_id, entry in state.items()}
+        for lock in self.grid:
+            claimed_by, broken_by = entries.get(lock.lock_id, (None, None))
+            lock.claimed_by_user = claimed_by
+            if broken_by is not None:
+                lock.broken = True
+                lock.broken_by_user = broken_by
+                lock.points = 0
+        self.remaining_locks = sum(1 for lock in self.grid if not lock.broken)
 
     # return a lock object given an id
     def get_lock(self, lock_id):
@@ -123,6 +189,16 @@ class Grid:
         
         return False
     
+    # releases a claim held by the given player, returns False if the player did not hold it
+    def unclaim_lock(self, lock_id, player_id):
+        lock = self.get_lock(lock_id)
+
+        if not lock.broken and lock.claimed_by_user == player_id:
+            lock.claimed_by_user = None
+            return True
+
+        return False
+
     # attempts to break a lock and returns a boolean to indicate success along with the appropriate points to be received
     # modifies the lock in place to reflect the change if successful
     def break_lock(self, lock_id, user_string, user_wpm, player_id):
@@ -132,10 +208,9 @@ class Grid:
             return False, 0  # <-- Lock not found
 
         if not lock.broken and lock.claimed_by_user == player_id:
-            # Normalize both strings for robust equality
+            # Normalize the input for robust equality (the target was normalized when the lock was made)
             normalized_input = normalize_text_for_match(user_string)
-            normalized_target = normalize_text_for_match(lock.lock_string)
-            if normalized_input == normalized_target and user_wpm >= lock.wpm_target:
+            if normalized_input == lock.normalized_string and user_wpm >= lock.wpm_target:
                 print("Lock Broken, points should be awarded")
                 lock.broken = True
                 lock.broken_by_user = player_id
@@ -174,6 +249,36 @@ class Grid:
         
         return temp
 
+# client-side log of claims/unclaims applied to the grid before the server has answered
+# keyed by request id so each server result confirms or rolls back exactly one operation
+class PendingOps:
+    def __init__(self):
+        self.ops = {}                                                                           # req_id -> (kind, lock_id), in send order
+
+    # record an operation and apply it to the local grid straight away
+    def apply(self, grid, req_id, kind, lock_id, user_id):
+        self.ops[req_id] = (kind, lock_id)
+        self._apply_one(grid, kind, lock_id, user_id)
+
+    # server answered; drop the operation (its result lock is authoritative from here on)
+    def resolve(self, req_id):
+        return self.ops.pop(req_id, None)
+
+    # replay operations the server has not answered yet on top of a fresh snapshot
+    def reapply(self, grid, user_id):
+        for kind, lock_id in self.ops.values():
+            self._apply_one(grid, kind, lock_id, user_id)
+
+    @staticmethod
+    def _apply_one(grid, kind, lock_id, user_id):
+        lock = grid.get_lock(lock_id)
+        if lock.broken:
+            return
+        if kind == "claim" and lock.claimed_by_user is None:
+            lock.claimed_by_user = user_id
+        elif kind == "unclaim" and lock.claimed_by_user == user_id:
+            lock.claimed_by_user = None
+
 # main game running logic (needs to be modified for server to run this later)
 class LocalGameClient:
     def __init__(self, grid_height, grid_width, user_id, icon):
@@ -1,29 +1,52 @@
 # game_ui.py
 import math
 import random
+import time
+import zlib
 import pygame
-from wpm import calculate_wpm
 from messages import (
-    MSG_CLAIM_REQ,
-    MSG_BREAK_REQ,
-    MSG_GRID_UPDATE,
     MSG_CLAIM_RES,
     MSG_BREAK_RES,
     MSG_UNCLAIM_RES,
     MSG_LOBBY_UPDATE,
     MSG_START_GAME,
+    MSG_NET_ERROR,
 )
-from game import Grid, Lock
 from config import *
+from game import PendingOps
+from ui_assets import UIAssets
+from typing_session import TypingSession
+from perf_stats import PerfStats, FRAME_BUCKETS_MS
 from utils import countdown_timer, normalize_text_for_match
 
+# Opponent cursor colors, picked per player id so every client agrees
+PRESENCE_COLORS = [
+    (0, 200, 255),
+    (255, 0, 200),
+    (255, 255, 255),
+    (180, 120, 255),
+    (0, 255, 200),
+    (255, 150, 60),
+]
+
+# Posted by the network thread to wake the UI from an idle wait
+NET_EVENT = pygame.event.custom_type()
+
+# Transparent color of tile sprites (never used by any tile art)
+TILE_SPRITE_KEY = (255, 0, 255)
+
+# CRT flicker strength for each of the 120 animation phases
+FLICKER_ALPHAS = [10 + int(10 * abs(math.sin(phase / 12))) for phase in range(120)]
+
 
 class GameUI:
-    def __init__(self, grid, players, network, user_id):
+    # screen/assets: the window and UIAssets client.py already set up while connecting (built here otherwise)
+    def __init__(self, grid, players, network, user_id, screen=None, assets=None):
         self.grid = grid
         self.players = players
         self.network = network
         self.user_id = user_id
+        self.spectator = network.spectator  # watching only: no claims, cursor or start requests
         # Be defensive in case server-assigned IDs differ from local
         if user_id in players and isinstance(players[user_id], dict):
             self.icon = players[user_id].get("icon", "★")
@@ -43,41 +66,68 @@ class GameUI:
         self.countdown_end_ticks = None
         self.game_duration_seconds = GAME_TIME
 
-        pygame.init()
-        # Larger, resizable window by default
-        self.windowed_size = (1024, 720)
+        # Larger, resizable window by default; one display session shared with the connecting screen
+        self.windowed_size = WINDOW_SIZE
         self.fullscreen = False
-        self.screen = pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        if screen is None:
+            pygame.init()
+            screen = pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        else:
+            self.windowed_size = screen.get_size()
+        self.screen = screen
         pygame.display.set_caption("Clash Of Typers")
 
-        # Fonts
-        self.font = pygame.font.Font(None, 24)
-        self.hud_font = pygame.font.Font(None, 22)
-        self.title_font = pygame.font.Font(None, 72)
-        self.mono_font = pygame.font.Font(None, 24)
-        # Typing screen fonts (bigger and more visible)
-        self.lock_text_font = pygame.font.Font(None, 32)
-        self.lock_mono_font = pygame.font.Font(None, 36)
-        self.lock_info_font = pygame.font.Font(None, 28)
+        # Fonts and rendered text surfaces (reused across frames)
+        if assets is None:
+            assets = UIAssets()
+            assets.build(self.screen.get_size())
+        self.assets = assets
+        for name, font in assets.fonts.items():
+            setattr(self, name, font)
+        self.text_cache = assets.text_cache
         self.clock = pygame.time.Clock()
 
         # Retro/CRT overlay surfaces (cover whole window)
-        self.scanline_surface = self._create_scanline_surface(self.screen.get_size())
-        self.vignette_surface = self._create_vignette_surface(self.screen.get_size())
+        self.scanline_surface, self.vignette_surface, self.flicker_surface = assets.overlays_for(self.screen.get_size())
         self.flicker_phase = 0
 
+        # Retained grid screen: item_id -> (key, bounds) as last painted, plus the static backdrop
+        self._scene = None
+        self._base_layer = None
+
         # Input state for lock screen
         self.selected_lock = None
-        self.input_text = ""
-        self.start_time = None
+        self.typing = None                  # TypingSession for the selected lock
         self.wpm = 0
 
         # Game session state
         self.game_start_ticks = None
+        self.replay = None                  # ReplayPlayer while showing a recorded match (run_replay)
+        self.replay_bar_rect = None
         # Overlays are off by default to avoid blocking view
         self.show_help_overlay = False
         self.show_legend_overlay = False
+        self.show_leaderboard = False       # top LEADERBOARD_TOP panel (B)
+        self.leaderboard_next_request = 0
         self.toasts = []  # list of (text, expiry_ms, color)
+        # Claims/unclaims shown locally before the server confirms them
+        self.pending_ops = PendingOps()
+        # Last cursor we told the server about, and when we may send the next one
+        self.cursor_sent = None
+        self.cursor_next_send = 0
+        self.pointer_sprites = {}
+        # Last typing progress reported for the selected lock (deltas are sent against this)
+        self.progress_sent = (0, 0)
+        self.progress_next_send = 0
+        # Frame pacing: an event taken by the idle wait is handed to the next _poll_events
+        self.pending_events = []
+        self.redraw_now = True
+        self.wake_posted = False
+        self.network.on_packet = self._wake
+        # Performance HUD (F3); counters run all the time, drawing only while shown
+        self.perf = PerfStats()
+        self.show_perf_hud = False
+        self.ping_next_send = 0
 
         # Buttons cached per-frame
         self.help_button_rect = None
@@ -91,75 +141,74 @@ class GameUI:
         self.tile_h = 80
         self.tile_gap = 12
         self.tile_aspect_ratio = 140 / 80
-
-    def _normalize_char_for_input(self, ch: str) -> str:
-        # Normalize single characters for consistent input and visual comparison
-        if not ch:
-            return ""
-        # Map common unicode variants to ASCII
-        translation_map = {
-            ord('‘'): "'", ord('’'): "'", ord('‚'): "'", ord('‛'): "'", ord('`'): "'",
-            ord('“'): '"', ord('”'): '"', ord('„'): '"', ord('″'): '"',
-            ord('–'): "-", ord('—'): "-", ord('−'): "-",
-            0x00A0: " ", 0x2007: " ", 0x202F: " ", 0x2009: " ",
-            0x200B: "", 0x200C: "", 0x200D: "", 0x2060: "", 0xFEFF: "",
-        }
-        return ch.translate(translation_map)
-
-    def _chars_equivalent(self, a: str, b: str) -> bool:
-        return self._normalize_char_for_input(a) == self._normalize_char_for_input(b)
+        # Camera over the board: zoom multiplies the fitted tile size, camera_x/y scroll a board
+        # larger than the viewport (clamped in _compute_layout)
+        self.zoom = 1.0
+        self.camera_x = 0
+        self.camera_y = 0
+        self.panning = False
+        self.grid_clip = pygame.Rect(0, 0, *self.windowed_size)
+        # Pre-rendered tile variants for the current tile size, see _build_tile_sprites
+        self.tile_sprites = {}
+        self.tile_sprite_size = None
 
     def _rebuild_overlays(self):
         size = self.screen.get_size()
-        self.scanline_surface = self._create_scanline_surface(size)
-        self.vignette_surface = self._create_vignette_surface(size)
+        self.scanline_surface, self.vignette_surface, self.flicker_surface = self.assets.overlays_for(size)
+        self._scene = None                  # window changed; next grid frame is a full redraw
 
     # ---------- Retro helpers ----------
-    def _create_scanline_surface(self, size):
-        width, height = size
-        scan = pygame.Surface((width, height), pygame.SRCALPHA)
-        scan.set_alpha(90)
-        for y in range(0, height, 3):
-            pygame.draw.line(scan, (0, 0, 0, 140), (0, y), (width, y))
-        return scan
-
-    def _apply_crt_overlay(self):
-        # Subtle flicker
-        self.flicker_phase = (self.flicker_phase + 1) % 120
-        flicker_alpha = 10 + int(10 * abs(math.sin(self.flicker_phase / 12)))
-        width, height = self.screen.get_size()
-        overlay = pygame.Surface((width, height), pygame.SRCALPHA)
-        overlay.fill((255, 255, 255, flicker_alpha))
-        self.screen.blit(overlay, (0, 0))
+    def _apply_crt_overlay(self, animate=True):
+        if not CRT_OVERLAY:
+            return
+        if self.flicker_surface.get_size() != self.screen.get_size():
+            self._rebuild_overlays()
+        # Subtle flicker (held still on the retained grid screen so unchanged pixels stay unchanged)
+        if animate:
+            self.flicker_phase = (self.flicker_phase + 1) % len(FLICKER_ALPHAS)
+        self.flicker_surface.set_alpha(FLICKER_ALPHAS[self.flicker_phase])
+        self._blit(self.flicker_surface, (0, 0))
         # Scanlines
-        if self.scanline_surface.get_size() != (width, height):
-            self.scanline_surface = self._create_scanline_surface((width, height))
-        self.screen.blit(self.scanline_surface, (0, 0))
+        self._blit(self.scanline_surface, (0, 0))
         # Vignette
-        if self.vignette_surface.get_size() != (width, height):
-            self.vignette_surface = self._create_vignette_surface((width, height))
-        self.screen.blit(self.vignette_surface, (0, 0))
-
-    def _create_vignette_surface(self, size):
-        width, height = size
-        vignette = pygame.Surface((width, height), pygame.SRCALPHA)
-        # Simple radial dark corners
-        for i in range(10):
-            alpha = int(18 - i * 1.8)
-            pygame.draw.rect(
-                vignette,
-                (0, 0, 0, alpha),
-                pygame.Rect(0 + i, 0 + i, width - i * 2, height - i * 2),
-                border_radius=6,
-            )
-        return vignette
+        self._blit(self.vignette_surface, (0, 0))
+
+    def _draw_outline(self, color, rect, width):
+        # Same pixels as pygame.draw.rect(..., width), built from filled edges because the outline
+        # variant draws the wrong edge when a clip rect cuts through it (retained renderer repaints clipped)
+        x, y, w, h = rect
+        self._fill(color, (x, y, w, width))
+        self._fill(color, (x, y + h - width, w, width))
+        self._fill(color, (x, y, width, h))
+        self._fill(color, (x + w - width, y, width, h))
+
+    def _present(self):
+        # Finish a full-screen (immediate mode) frame
+        if self.show_perf_hud:
+            self._draw_perf_hud(*self._perf_hud_layout())
+        self._apply_crt_overlay()
+        pygame.display.flip()
+        self._scene = None                  # screen content no longer matches the retained grid scene
+
+    # Counted versions of the screen calls, so the performance HUD can show per-frame totals
+    def _blit(self, surf, dest, area=None):
+        self.perf.blits += 1
+        return self.screen.blit(surf, dest, area)
+
+    def _fill(self, color, rect=None):
+        self.perf.draws += 1
+        return self.screen.fill(color, rect)
+
+    def _draw_rect(self, color, rect, width=0, **kwargs):
+        self.perf.draws += 1
+        return pygame.draw.rect(self.screen, color, rect, width, **kwargs)
 
     def _draw_text_with_shadow(self, text, pos, color=(255, 255, 255), shadow=(20, 20, 20)):
         x, y = pos
-        shadow_surf = self.font.render(text, True, shadow)
-        text_surf = self.font.render(text, True, color)
-        self.screen.blit(shadow_surf, (x + 2, y + 2))
-        self.screen.blit(text_surf, (x, y))
+        shadow_surf = self.text_cache.render(self.font, text, True, shadow)
+        text_surf = self.text_cache.render(self.font, text, True, color)
+        self._blit(shadow_surf, (x + 2, y + 2))
+        self._blit(text_surf, (x, y))
 
     def _draw_frame(self):
         # Pixel-style frame/border around the screen (responsive)
@@ -170,8 +219,8 @@ class GameUI:
         inner_margin = 10
         outer_rect = pygame.Rect(outer_margin, outer_margin, width - 2 * outer_margin, height - 2 * outer_margin)
         inner_rect = pygame.Rect(inner_margin, inner_margin, width - 2 * inner_margin, height - 2 * inner_margin)
-        pygame.draw.rect(self.screen, border_color, outer_rect, border_radius=0)
-        pygame.draw.rect(self.screen, inner_color, inner_rect, width=3)
+        self._draw_rect(border_color, outer_rect, border_radius=0)
+        self._draw_rect(inner_color, inner_rect, width=3)
         # Content rect slightly inset from inner_rect for UI content
         self.content_rect = pygame.Rect(inner_rect.x + 4, inner_rect.y + 4, inner_rect.w - 8, inner_rect.h - 8)
 
@@ -179,6 +228,8 @@ class GameUI:
         # Compute grid layout centered in available content area above the HUD
         width, height = self.screen.get_size()
         hud_reserved_h = 46  # hud height + spacing
+        if self.replay is not None:
+            hud_reserved_h += 30            # replay timeline above the HUD
         gap = 12
 
         grid_area = pygame.Rect(
@@ -188,8 +239,9 @@ class GameUI:
             max(0, (height - hud_reserved_h) - (self.content_rect.y + 10))
         )
 
-        max_tile_w = (grid_area.w - (GRID_COLS - 1) * gap) / GRID_COLS if GRID_COLS > 0 else grid_area.w
-        max_tile_h = (grid_area.h - (GRID_ROWS - 1) * gap) / GRID_ROWS if GRID_ROWS > 0 else grid_area.h
+        rows, cols = self.grid.height, self.grid.width
+        max_tile_w = (grid_area.w - (cols - 1) * gap) / cols if cols > 0 else grid_area.w
+        max_tile_h = (grid_area.h - (rows - 1) * gap) / rows if rows > 0 else grid_area.h
 
         tile_w_from_h = max_tile_h * self.tile_aspect_ratio
         tile_h_from_w = max_tile_w / self.tile_aspect_ratio
@@ -201,68 +253,127 @@ class GameUI:
             tile_w = max_tile_w
             tile_h = tile_h_from_w
 
-        tile_w = max(60, int(tile_w))
-        tile_h = max(40, int(tile_h))
+        # Fitted size (never below readable), then the camera zoom on top
+        tile_w = int(max(60, int(tile_w)) * self.zoom)
+        tile_h = int(max(40, int(tile_h)) * self.zoom)
 
-        actual_grid_w = GRID_COLS * tile_w + (GRID_COLS - 1) * gap
-        actual_grid_h = GRID_ROWS * tile_h + (GRID_ROWS - 1) * gap
-        origin_x = grid_area.x + (grid_area.w - actual_grid_w) // 2
-        origin_y = grid_area.y + (grid_area.h - actual_grid_h) // 2
+        # Boards that fit are centered; larger ones scroll with the camera
+        actual_grid_w = cols * tile_w + (cols - 1) * gap
+        actual_grid_h = rows * tile_h + (rows - 1) * gap
+        if actual_grid_w <= grid_area.w:
+            self.camera_x = 0
+            origin_x = grid_area.x + (grid_area.w - actual_grid_w) // 2
+        else:
+            self.camera_x = min(max(0, self.camera_x), actual_grid_w - grid_area.w)
+            origin_x = grid_area.x - self.camera_x
+        if actual_grid_h <= grid_area.h:
+            self.camera_y = 0
+            origin_y = grid_area.y + (grid_area.h - actual_grid_h) // 2
+        else:
+            self.camera_y = min(max(0, self.camera_y), actual_grid_h - grid_area.h)
+            origin_y = grid_area.y - self.camera_y
 
         self.tile_w = tile_w
         self.tile_h = tile_h
         self.tile_gap = gap
         self.grid_origin_x = origin_x
         self.grid_origin_y = origin_y
+        # Viewport tiles are clipped to: the grid area plus room for the badges above the top row
+        self.grid_clip = self._tile_bounds(grid_area)
+        if self.tile_sprite_size != (tile_w, tile_h):
+            self._build_tile_sprites()
+
+    # ---------- Camera ----------
+    def _pan(self, dx, dy):
+        # Clamped to the board by the next _compute_layout
+        self.camera_x += dx
+        self.camera_y += dy
+
+    def _zoom_at(self, pos, factor):
+        zoom = min(ZOOM_MAX, max(1.0, self.zoom * factor))
+        if zoom == self.zoom:
+            return
+        # Keep the board point under pos (in tile pitches) under pos after zooming
+        fx = (pos[0] - self.grid_origin_x) / (self.tile_w + self.tile_gap)
+        fy = (pos[1] - self.grid_origin_y) / (self.tile_h + self.tile_gap)
+        self.zoom = zoom
+        self._compute_layout()
+        self.camera_x += round(self.grid_origin_x - (pos[0] - fx * (self.tile_w + self.tile_gap)))
+        self.camera_y += round(self.grid_origin_y - (pos[1] - fy * (self.tile_h + self.tile_gap)))
+        self._compute_layout()
+
+    def _visible_locks(self):
+        # Locks whose tile bounds reach into the viewport, from the pitch arithmetic alone
+        cols = self.grid.width
+        pitch_w = self.tile_w + self.tile_gap
+        pitch_h = self.tile_h + self.tile_gap
+        clip = self.grid_clip
+        col0 = max(0, (clip.left - self.grid_origin_x - self.tile_w - 2) // pitch_w + 1)
+        col1 = min(cols, (clip.right - self.grid_origin_x + 1) // pitch_w + 1)
+        row0 = max(0, (clip.top - self.grid_origin_y - self.tile_h - 2) // pitch_h + 1)
+        row1 = min(self.grid.height, (clip.bottom - self.grid_origin_y + 17) // pitch_h + 1)
+        locks = self.grid.grid
+        visible = []
+        for row in range(row0, row1):
+            visible.extend(locks[row * cols + col0:row * cols + col1])
+        return visible
 
     # ---------- UI building blocks ----------
     def _add_toast(self, text, duration_ms=1600, color=(226, 203, 156)):
         expiry = pygame.time.get_ticks() + duration_ms
         self.toasts.append({"text": text, "expiry": expiry, "color": color})
 
-    def _draw_toasts(self):
+    def _toast_layout(self):
         now = pygame.time.get_ticks()
         # Remove expired
         self.toasts = [t for t in self.toasts if t["expiry"] > now]
-        if not self.toasts:
-            return
-        # Draw up to 3, newest last at top
-        to_draw = self.toasts[-3:]
+        # Up to 3, newest last at top, each with its panel rect
+        layout = []
         base_y = 18
+        padding = 8
         width, _ = self.screen.get_size()
-        for i, toast in enumerate(reversed(to_draw)):
-            text_surf = self.hud_font.render(toast["text"], True, toast["color"]) 
-            padding = 8
-            w = text_surf.get_width() + padding * 2
-            h = text_surf.get_height() + padding
+        for i, toast in enumerate(reversed(self.toasts[-3:])):
+            text_w, text_h = self.hud_font.size(toast["text"])
+            w = text_w + padding * 2
+            h = text_h + padding
             x = (width - w) // 2
             y = base_y + i * (h + 6)
-            pygame.draw.rect(self.screen, (20, 20, 20), pygame.Rect(x, y, w, h))
-            pygame.draw.rect(self.screen, (143, 19, 19), pygame.Rect(x, y, w, h), 2)
-            self.screen.blit(text_surf, (x + padding, y + padding // 2))
+            layout.append((toast, pygame.Rect(x, y, w, h)))
+        return layout
+
+    def _draw_toast(self, toast, rect):
+        padding = 8
+        text_surf = self.text_cache.render(self.hud_font, toast["text"], True, toast["color"])
+        self._draw_rect((20, 20, 20), rect)
+        self._draw_outline((143, 19, 19), rect, 2)
+        self._blit(text_surf, (rect.x + padding, rect.y + padding // 2))
+
+    def _draw_toasts(self):
+        for toast, rect in self._toast_layout():
+            self._draw_toast(toast, rect)
     def _draw_progress_bar(self, x, y, w, h, pct, label=None):
         pct = max(0.0, min(1.0, pct))
         back = pygame.Rect(x, y, w, h)
-        pygame.draw.rect(self.screen, (20, 20, 20), back)
-        pygame.draw.rect(self.screen, (226, 203, 156), pygame.Rect(x, y, int(w * pct), h))
-        pygame.draw.rect(self.screen, (143, 19, 19), back, 2)
+        self._draw_rect((20, 20, 20), back)
+        self._draw_rect((226, 203, 156), pygame.Rect(x, y, int(w * pct), h))
+        self._draw_outline((143, 19, 19), back, 2)
         if label:
-            text = self.hud_font.render(label, True, (226, 203, 156))
-            self.screen.blit(text, (x + 6, y - 18))
+            text = self.text_cache.render(self.hud_font, label, True, (226, 203, 156))
+            self._blit(text, (x + 6, y - 18))
 
     def _draw_legend_overlay(self):
         width, height = self.screen.get_size()
         # Dim background
         dim = pygame.Surface((width, height), pygame.SRCALPHA)
         dim.fill((0, 0, 0, 140))
-        self.screen.blit(dim, (0, 0))
+        self._blit(dim, (0, 0))
         # Panel
         panel_w, panel_h = min(480, width - 80), 200
         panel = pygame.Rect((width - panel_w) // 2, (height - panel_h) // 2, panel_w, panel_h)
-        pygame.draw.rect(self.screen, (20, 20, 20), panel)
-        pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
-        title = self.hud_font.render("Legend", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-        self.screen.blit(title, (panel.x + 12, panel.y + 10))
+        self._draw_rect((20, 20, 20), panel)
+        self._draw_outline(GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
+        title = self.text_cache.render(self.hud_font, "Legend", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(title, (panel.x + 12, panel.y + 10))
         rows = [
             ("Easy", GRID_COLORS.get("easy", (0, 255, 0))),
             ("Medium", GRID_COLORS.get("medium", (255, 255, 0))),
@@ -271,56 +382,65 @@ class GameUI:
         ]
         for i, (name, color) in enumerate(rows):
             y = panel.y + 40 + i * 28
-            pygame.draw.rect(self.screen, color, pygame.Rect(panel.x + 16, y, 18, 18))
-            label = self.hud_font.render(name, True, (220, 220, 220))
-            self.screen.blit(label, (panel.x + 44, y - 2))
+            self._draw_rect(color, pygame.Rect(panel.x + 16, y, 18, 18))
+            label = self.text_cache.render(self.hud_font, name, True, (220, 220, 220))
+            self._blit(label, (panel.x + 44, y - 2))
 
     def _draw_help_overlay(self):
         width, height = self.screen.get_size()
         # Dim background
         dim = pygame.Surface((width, height), pygame.SRCALPHA)
         dim.fill((0, 0, 0, 140))
-        self.screen.blit(dim, (0, 0))
+        self._blit(dim, (0, 0))
         # Panel
         panel_w, panel_h = min(640, width - 80), 220
         panel = pygame.Rect((width - panel_w) // 2, (height - panel_h) // 2, panel_w, panel_h)
-        pygame.draw.rect(self.screen, (20, 20, 20), panel)
-        pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
-        header = self.hud_font.render("How to Play", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-        self.screen.blit(header, (panel.x + 12, panel.y + 10))
+        self._draw_rect((20, 20, 20), panel)
+        self._draw_outline(GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
+        header = self.text_cache.render(self.hud_font, "How to Play", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(header, (panel.x + 12, panel.y + 10))
         lines = [
             "1) Click a lock to claim it.",
             "2) Type the sentence exactly.",
             "3) Press Enter when done.",
             "Goal: Meet the WPM target to break the lock!",
-            "Tips: ESC to cancel, H/L to toggle panels",
+            "Tips: ESC to cancel, H/L/B to toggle panels, F3 for stats",
+            "View: wheel or +/- to zoom, arrows or right-drag to pan, 0 to reset",
         ]
         for i, text in enumerate(lines):
-            line = self.hud_font.render(text, True, (200, 200, 200))
-            self.screen.blit(line, (panel.x + 12, panel.y + 42 + i * 22))
+            line = self.text_cache.render(self.hud_font, text, True, (200, 200, 200))
+            self._blit(line, (panel.x + 12, panel.y + 42 + i * 22))
 
-    def _draw_hud(self, remaining_seconds):
+    def _draw_hud(self, remaining_seconds, rank=None):
         # HUD background along bottom
         width, height = self.screen.get_size()
         hud_bg = pygame.Rect(10, height - 40, width - 20, 30)
-        pygame.draw.rect(self.screen, GRID_COLORS.get("hud_backdrop", (60, 30, 30)), hud_bg)
-        pygame.draw.rect(self.screen, (0, 0, 0), hud_bg, 2)
+        self._draw_rect(GRID_COLORS.get("hud_backdrop", (60, 30, 30)), hud_bg)
+        self._draw_outline((0, 0, 0), hud_bg, 2)
 
         # Timer + remaining locks
         mins = remaining_seconds // 60
         secs = remaining_seconds % 60
-        timer_text = self.hud_font.render(f"{mins:02d}:{secs:02d}", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-        self.screen.blit(timer_text, (20, hud_bg.y + 5))
+        timer_text = self.text_cache.render(self.hud_font, f"{mins:02d}:{secs:02d}", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(timer_text, (20, hud_bg.y + 5))
 
         # Render each player's score compactly
         offset_x = 100
         for pid, pdata in self.players.items():
             color = (226, 203, 156) if pid == self.user_id else (200, 200, 200)
             text = f"{pid}: {pdata['score']} ({pdata['locks_broken']})"
-            surf = self.hud_font.render(text, True, color)
-            self.screen.blit(surf, (offset_x, hud_bg.y + 5))
+            surf = self.text_cache.render(self.hud_font, text, True, color)
+            self._blit(surf, (offset_x, hud_bg.y + 5))
             offset_x += surf.get_width() + 20
 
+        # Our place on the server leaderboard
+        if rank is not None:
+            surf = self.text_cache.render(self.hud_font, f"Rank {rank[0]}/{rank[1]}", True, (226, 203, 156))
+            self._blit(surf, (offset_x, hud_bg.y + 5))
+        elif self.spectator and self.replay is None:
+            surf = self.text_cache.render(self.hud_font, "Spectating", True, (200, 200, 200))
+            self._blit(surf, (offset_x, hud_bg.y + 5))
+
         # Progress bar (locks broken)
         total = getattr(self.grid, "size", GRID_ROWS * GRID_COLS)
         remaining = getattr(self.grid, "remaining_locks", total)
@@ -330,7 +450,7 @@ class GameUI:
         bar_w = 280
         self._draw_progress_bar(width - bar_w - 20, hud_bg.y + 2, bar_w, 20, pct, label=f"Progress {broken}/{total}")
 
-    def _draw_hud_controls(self):
+    def _hud_control_layout(self):
         # Small clickable labels in the HUD bar (bottom-right)
         width, height = self.screen.get_size()
         base_y = height - 38
@@ -338,51 +458,100 @@ class GameUI:
         if True:
             labels.append(("H: Help", 'help'))
             labels.append(("L: Legend", 'legend'))
+            if self.replay is None:
+                labels.append(("B: Leaders", 'leaders'))
             labels.append(("F: Fullscreen", None))
         # Measure and place from right to left
         x = width - 24
         spacing = 10
         self.help_button_rect = None
         self.legend_button_rect = None
+        self.leaders_button_rect = None
+        layout = []
         for text, key in reversed(labels):
-            surf = self.hud_font.render(text, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-            rect = pygame.Rect(x - surf.get_width() - 12, base_y, surf.get_width() + 12, surf.get_height() + 6)
-            pygame.draw.rect(self.screen, (20, 20, 20), rect)
-            pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), rect, 2)
-            self.screen.blit(surf, (rect.x + 6, rect.y + 3))
+            text_w, text_h = self.hud_font.size(text)
+            rect = pygame.Rect(x - text_w - 12, base_y, text_w + 12, text_h + 6)
+            layout.append((text, rect))
             if key == 'help':
                 self.help_button_rect = rect
             elif key == 'legend':
                 self.legend_button_rect = rect
+            elif key == 'leaders':
+                self.leaders_button_rect = rect
             x = rect.x - spacing
+        return layout
+
+    def _draw_hud_controls(self, layout=None):
+        for text, rect in (layout if layout is not None else self._hud_control_layout()):
+            surf = self.text_cache.render(self.hud_font, text, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+            self._draw_rect((20, 20, 20), rect)
+            self._draw_outline(GRID_COLORS.get("border", (255, 120, 0)), rect, 2)
+            self._blit(surf, (rect.x + 6, rect.y + 3))
 
-    def _draw_tile(self, lock, hovered=False):
+    def _tile_status(self, lock):
         if lock.broken_by_user:
+            return "broken"
+        if lock.claimed_by_user == self.user_id:
+            return "mine"
+        if lock.claimed_by_user:
+            return "other"
+        return "free"
+
+    def _build_tile_sprites(self):
+        # One sprite per (difficulty, status, hovered), rebuilt whenever the tile size changes
+        self.tile_sprite_size = (self.tile_w, self.tile_h)
+        self.tile_sprites = {}
+        for difficulty in LOCK_WPM:
+            for status in ("free", "mine", "other", "broken"):
+                for hovered in (False, True):
+                    key = (difficulty, status, hovered)
+                    self.tile_sprites[key] = self._render_tile_sprite(*key)
+
+    def _render_tile_sprite(self, difficulty, status, hovered):
+        if status == "broken":
             fill_color = GRID_COLORS["finished"]
-        elif lock.claimed_by_user == self.user_id:
+        elif status == "mine":
             fill_color = (120, 255, 120)
-        elif lock.claimed_by_user:
+        elif status == "other":
             fill_color = (120, 120, 255)
         else:
-            fill_color = GRID_COLORS.get(lock.difficulty, (255, 255, 255))
+            fill_color = GRID_COLORS.get(difficulty, (255, 255, 255))
 
+        # Sprite covers _tile_bounds: the tile itself sits at (2, 18)
         w, h = self.tile_w, self.tile_h
-        x = self.grid_origin_x + lock.col * (w + self.tile_gap)
-        y = self.grid_origin_y + lock.row * (h + self.tile_gap)
+        sprite = pygame.Surface((w + 4, h + 20), pygame.SRCALPHA)
+        x, y = 2, 18
 
         # Pixel box: border + fill
-        pygame.draw.rect(self.screen, (20, 20, 20), pygame.Rect(x - 2, y - 2, w + 4, h + 4))
-        pygame.draw.rect(self.screen, fill_color, pygame.Rect(x, y, w, h))
+        pygame.draw.rect(sprite, (20, 20, 20), pygame.Rect(x - 2, y - 2, w + 4, h + 4))
+        pygame.draw.rect(sprite, fill_color, pygame.Rect(x, y, w, h))
         border_width = 4 if hovered else 3
-        pygame.draw.rect(self.screen, (0, 0, 0), pygame.Rect(x, y, w, h), border_width)
-
-        # Difficulty tag and label
-        diff = lock.difficulty[:1].upper()
-        badge_color = (0, 0, 0)
-        pygame.draw.rect(self.screen, (226, 203, 156), pygame.Rect(x - 2, y - 18, 28, 16))
-        pygame.draw.rect(self.screen, (143, 19, 19), pygame.Rect(x - 2, y - 18, 28, 16), 2)
-        diff_surf = self.hud_font.render(diff, True, badge_color)
-        self.screen.blit(diff_surf, (x + 7 - diff_surf.get_width() // 2, y - 18))
+        pygame.draw.rect(sprite, (0, 0, 0), pygame.Rect(x, y, w, h), border_width)
+
+        # Difficulty tag
+        diff = difficulty[:1].upper()
+        pygame.draw.rect(sprite, (226, 203, 156), pygame.Rect(x - 2, y - 18, 28, 16))
+        pygame.draw.rect(sprite, (143, 19, 19), pygame.Rect(x - 2, y - 18, 28, 16), 2)
+        diff_surf = self.text_cache.render(self.hud_font, diff, True, (0, 0, 0))
+        sprite.blit(diff_surf, (x + 7 - diff_surf.get_width() // 2, y - 18))
+
+        # Every drawn pixel is opaque, so flatten onto a colorkeyed surface:
+        # an RLE colorkey blit is much cheaper than a per-pixel alpha blit
+        flat = pygame.Surface(sprite.get_size()).convert()
+        flat.fill(TILE_SPRITE_KEY)
+        flat.blit(sprite, (0, 0))
+        flat.set_colorkey(TILE_SPRITE_KEY, pygame.RLEACCEL)
+        return flat
+
+    def _draw_tile(self, lock, hovered=False, progress=None):
+        x, y, w, h = self._tile_rect(lock)
+
+        # Box and difficulty tag come from the sprite atlas; only per-lock text is drawn on top
+        key = (lock.difficulty, self._tile_status(lock), hovered)
+        sprite = self.tile_sprites.get(key)
+        if sprite is None:
+            sprite = self.tile_sprites[key] = self._render_tile_sprite(*key)
+        self._blit(sprite, (x - 2, y - 18))
 
         # Show a short preview of the sentence
         text = f"{lock.lock_string[:10]}..."
@@ -391,27 +560,204 @@ class GameUI:
         # Claimed/owner indicator
         if lock.claimed_by_user:
             owner = "You" if lock.claimed_by_user == self.user_id else lock.claimed_by_user
-            claim_text = self.hud_font.render(f"Claimed: {owner}", True, (0, 0, 0))
-            self.screen.blit(claim_text, (x + 8, y + h - 18))
-
-    def _draw_grid(self, mouse_pos):
-        hovered_lock = None
-        for lock in self.grid.grid:
-            rect = pygame.Rect(
-                self.grid_origin_x + lock.col * (self.tile_w + self.tile_gap),
-                self.grid_origin_y + lock.row * (self.tile_h + self.tile_gap),
-                self.tile_w,
-                self.tile_h,
-            )
-            is_hovered = rect.collidepoint(mouse_pos)
-            if is_hovered:
-                hovered_lock = lock
-            self._draw_tile(lock, hovered=is_hovered)
-        return hovered_lock
-
-    def _draw_tooltip(self, lock, mouse_pos):
-        if not lock:
+            claim_text = self.text_cache.render(self.hud_font, f"Claimed: {owner}", True, (0, 0, 0))
+            self._blit(claim_text, (x + 8, y + h - 18))
+
+            # Live typing progress of whoever holds the claim
+            if progress is not None and lock.lock_string:
+                prefix, wpm = progress
+                pct = min(1.0, prefix / len(lock.lock_string))
+                bar = pygame.Rect(x + 8, y + 6, w - 16, 6)
+                self._draw_rect((20, 20, 20), bar)
+                self._draw_rect((226, 203, 156), pygame.Rect(bar.x, bar.y, int(bar.w * pct), bar.h))
+                wpm_text = self.text_cache.render(self.hud_font, f"{wpm} wpm", True, (0, 0, 0))
+                self._blit(wpm_text, (x + w - wpm_text.get_width() - 8, y + 14))
+
+    def _draw_tile_clipped(self, lock, hovered, progress):
+        # Tile cut by the viewport edge while the board is scrolled
+        clip = self.screen.get_clip()
+        self.screen.set_clip(clip.clip(self.grid_clip))
+        self._draw_tile(lock, hovered, progress)
+        self.screen.set_clip(clip)
+
+    def _tile_rect(self, lock):
+        return pygame.Rect(
+            self.grid_origin_x + lock.col * (self.tile_w + self.tile_gap),
+            self.grid_origin_y + lock.row * (self.tile_h + self.tile_gap),
+            self.tile_w,
+            self.tile_h,
+        )
+
+    def _tile_bounds(self, rect):
+        # Everything _draw_tile touches: outer border plus the difficulty badge above the tile
+        return pygame.Rect(rect.x - 2, rect.y - 18, rect.w + 4, rect.h + 20)
+
+    # ---------- Performance HUD ----------
+    def _perf_hud_layout(self):
+        # Panel rect, text lines and histogram counts; top-right corner below the frame title
+        perf = self.perf
+        inbound, outbound = self.network.queue_depth()
+        rtt = self.network.rtt_ms
+        lines = [
+            f"FPS {perf.fps():.1f}   frame p50 {perf.frame_percentile(50):.2f} / p95 {perf.frame_percentile(95):.2f} ms",
+            f"draws {perf.last_draws}   blits {perf.last_blits}",
+            f"text cache {self.text_cache.hit_rate():.0%} hit, {len(self.text_cache.surfaces)} surfaces",
+            f"packets/frame {perf.packets_per_frame():.2f}   queue in {inbound} / out {outbound}",
+            (f"RTT {rtt:.1f} ms" if rtt is not None else "RTT --") + f"   resyncs {self.network.resyncs}",
+        ]
+        hist = perf.histogram()
+        width, _ = self.screen.get_size()
+        line_h = self.hud_font.get_linesize()
+        panel_w = 12 + max(self.hud_font.size(line)[0] for line in lines) + 12
+        panel_h = 8 + len(lines) * line_h + 8 + PERF_GRAPH_H + line_h + 8
+        panel = pygame.Rect(width - panel_w - 16, 56, panel_w, panel_h)
+        return panel, lines, hist
+
+    def _draw_perf_hud(self, panel, lines, hist):
+        self._draw_rect((12, 12, 16), panel)
+        self._draw_outline((0, 255, 128), panel, 1)
+        line_h = self.hud_font.get_linesize()
+        # Rendered directly: these strings change every frame and would only churn the text cache they report on
+        for i, line in enumerate(lines):
+            self._blit(self.hud_font.render(line, True, (0, 255, 128)), (panel.x + 12, panel.y + 8 + i * line_h))
+
+        # Frame-time histogram over the rolling window, one bar per bucket
+        top = panel.y + 8 + len(lines) * line_h + 8
+        slot_w = (panel.w - 24) // len(hist)
+        peak = max(hist) or 1
+        labels = [f"<{ms:g}" for ms in FRAME_BUCKETS_MS] + [f">{FRAME_BUCKETS_MS[-1]:g}"]
+        for i, (count, label) in enumerate(zip(hist, labels)):
+            x = panel.x + 12 + i * slot_w
+            bar_h = PERF_GRAPH_H * count // peak
+            color = (0, 255, 128) if i < 4 else (255, 200, 0) if i == 4 else (255, 80, 80)
+            self._draw_rect(color, pygame.Rect(x + 2, top + PERF_GRAPH_H - bar_h, slot_w - 4, bar_h))
+            self._blit(self.hud_font.render(label, True, (200, 200, 200)), (x + 2, top + PERF_GRAPH_H + 2))
+
+    # ---------- Presence ----------
+    def _grid_cursor(self, pos):
+        # Quantized grid-relative cursor (CURSOR_STEPS per tile pitch), None when off the grid
+        pitch_w = self.tile_w + self.tile_gap
+        pitch_h = self.tile_h + self.tile_gap
+        gx = (pos[0] - self.grid_origin_x) * CURSOR_STEPS // pitch_w
+        gy = (pos[1] - self.grid_origin_y) * CURSOR_STEPS // pitch_h
+        if not (0 <= gx < self.grid.width * CURSOR_STEPS and 0 <= gy < self.grid.height * CURSOR_STEPS):
+            return None
+        return int(gx), int(gy)
+
+    def _update_presence(self, pos):
+        # Throttled to CURSOR_SEND_RATE and only sent when the quantized position changes
+        now = pygame.time.get_ticks()
+        if now < self.cursor_next_send:
             return
+        cursor = self._grid_cursor(pos) if pos is not None else None
+        if cursor != self.cursor_sent:
+            self.network.send_cursor(cursor)
+            self.cursor_sent = cursor
+            self.cursor_next_send = now + 1000 // CURSOR_SEND_RATE
+
+    def _update_typing_progress(self):
+        # ~PROGRESS_SEND_RATE Hz, delta-encoded, nothing sent while the numbers stand still
+        now = pygame.time.get_ticks()
+        if now < self.progress_next_send or self.selected_lock is None:
+            return
+        prefix = self.typing.correct_len
+        wpm = int(self.wpm)
+        sent_prefix, sent_wpm = self.progress_sent
+        if prefix == sent_prefix and wpm == sent_wpm:
+            return
+        self.network.send_progress(
+            self.selected_lock.lock_id,
+            prefix - sent_prefix,
+            wpm if wpm != sent_wpm else None,
+        )
+        self.progress_sent = (prefix, wpm)
+        self.progress_next_send = now + 1000 // PROGRESS_SEND_RATE
+
+    def _presence_layout(self):
+        # One entry per opponent cursor: (pid, color, pointer pos, hovered tile outline or None, bounds)
+        pitch_w = self.tile_w + self.tile_gap
+        pitch_h = self.tile_h + self.tile_gap
+        layout = []
+        for pid, (gx, gy) in self.network.presence.items():
+            if pid == self.user_id:
+                continue
+            color = PRESENCE_COLORS[zlib.crc32(pid.encode()) % len(PRESENCE_COLORS)]
+            # Hover indicator on the tile under their cursor (nothing while they are over a gap)
+            col, row = gx // CURSOR_STEPS, gy // CURSOR_STEPS
+            tile_x = self.grid_origin_x + col * pitch_w
+            tile_y = self.grid_origin_y + row * pitch_h
+            px = self.grid_origin_x + gx * pitch_w // CURSOR_STEPS
+            py = self.grid_origin_y + gy * pitch_h // CURSOR_STEPS
+            outline = None
+            if px < tile_x + self.tile_w and py < tile_y + self.tile_h:
+                outline = pygame.Rect(tile_x - 3, tile_y - 3, self.tile_w + 6, self.tile_h + 6)
+            tag_w, tag_h = self.hud_font.size(pid)
+            bounds = pygame.Rect(px - 1, py - 1, 14 + tag_w, 12 + tag_h)
+            if outline:
+                bounds.union_ip(outline)
+            layout.append((pid, color, (px, py), outline, bounds))
+        return layout
+
+    def _draw_cursor(self, pid, color, pos, outline):
+        px, py = pos
+        if outline:
+            self._draw_outline(color, outline, 2)
+        # Pointer + name tag (pointer is a cached sprite so clipped repaints match full ones)
+        self._blit(self._pointer_sprite(color), (px, py))
+        tag = self.text_cache.render(self.hud_font, pid, True, color)
+        self._blit(tag, (px + 12, py + 10))
+
+    def _pointer_sprite(self, color):
+        sprite = self.pointer_sprites.get(color)
+        if sprite is None:
+            sprite = pygame.Surface((11, 15), pygame.SRCALPHA)
+            pygame.draw.polygon(sprite, color, [(0, 0), (0, 14), (10, 10)])
+            pygame.draw.polygon(sprite, (0, 0, 0), [(0, 0), (0, 14), (10, 10)], 1)
+            self.pointer_sprites[color] = sprite
+        return sprite
+
+    # ---------- Leaderboard panel ----------
+    def _toggle_leaderboard(self):
+        self.show_leaderboard = not self.show_leaderboard
+        if self.show_leaderboard:
+            self.leaderboard_next_request = 0       # fetch a fresh list right away
+
+    def _request_leaderboard(self):
+        # Players get the top list pushed on every score change; spectators are not pushed to, so they poll
+        now = pygame.time.get_ticks()
+        if now < self.leaderboard_next_request:
+            return
+        if self.leaderboard_next_request == 0 or self.spectator:
+            self.network.request_leaderboard(LEADERBOARD_TOP)
+            self.network.flush()
+        self.leaderboard_next_request = now + LEADERBOARD_REFRESH_MS
+
+    def _leaderboard_layout(self):
+        # (text, color) rows under the header, our own entry highlighted
+        board = self.network.leaderboard or {}
+        rows = [
+            (f"{i}. {pid}  {score} pts  {locks} locks", (226, 203, 156) if pid == self.user_id else (200, 200, 200))
+            for i, (pid, score, locks, _) in enumerate(board.get("top", []), 1)
+        ] or [("No scores yet", (200, 200, 200))]
+        if board.get("total"):
+            rows.append((f"{board['total']} ranked", (150, 150, 150)))
+        line_h = self.hud_font.get_linesize()
+        panel_w = 12 + max(self.hud_font.size(text)[0] for text, _ in rows + [("Leaderboard", None)]) + 12
+        panel = pygame.Rect(16, 56, panel_w, 8 + (len(rows) + 1) * line_h + 8)
+        return panel, rows
+
+    def _draw_leaderboard(self, panel, rows):
+        self._draw_rect((20, 20, 20), panel)
+        self._draw_outline(GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
+        line_h = self.hud_font.get_linesize()
+        header = self.text_cache.render(self.hud_font, "Leaderboard", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(header, (panel.x + 12, panel.y + 8))
+        for i, (text, color) in enumerate(rows, 1):
+            self._blit(self.text_cache.render(self.hud_font, text, True, color), (panel.x + 12, panel.y + 8 + i * line_h))
+
+    def _tooltip_layout(self, lock, mouse_pos):
+        if not lock:
+            return None
         lines = [
             f"Difficulty: {lock.difficulty.title()}",
             f"WPM target: {lock.wpm_target}",
@@ -430,12 +776,198 @@ class GameUI:
         width, height = self.screen.get_size()
         x = min(max(14, x + 12), width - max_w - 14)
         y = min(max(52, y + 12), height - h - 14)
-        panel = pygame.Rect(x, y, max_w, h)
-        pygame.draw.rect(self.screen, (20, 20, 20), panel)
-        pygame.draw.rect(self.screen, (143, 19, 19), panel, 2)
+        return pygame.Rect(x, y, max_w, h), lines
+
+    def _draw_tooltip_panel(self, panel, lines):
+        self._draw_rect((20, 20, 20), panel)
+        self._draw_outline((143, 19, 19), panel, 2)
         for i, s in enumerate(lines):
-            line = self.hud_font.render(s, True, (220, 220, 220))
-            self.screen.blit(line, (panel.x + 8, panel.y + 4 + i * 18))
+            line = self.text_cache.render(self.hud_font, s, True, (220, 220, 220))
+            self._blit(line, (panel.x + 8, panel.y + 4 + i * 18))
+
+    # ---------- Retained grid renderer ----------
+    def _scene_items(self, remaining_seconds, mouse_pos):
+        # Everything on the grid screen as (item_id, key, bounds, draw) in paint order.
+        # key holds all state the draw call depends on; a changed key or bounds makes the item dirty.
+        width, height = self.screen.get_size()
+        items = []
+        hovered_lock = self.detect_click(mouse_pos)
+        progress = self.network.progress
+        for lock in self._visible_locks():
+            hovered = lock is hovered_lock
+            lock_progress = progress.get(lock.lock_id)
+            key = (lock.difficulty, lock.lock_string, lock.claimed_by_user, lock.broken_by_user, hovered, lock_progress)
+            bounds = self._tile_bounds(self._tile_rect(lock))
+            if self.grid_clip.contains(bounds):
+                draw = lambda lock=lock, hovered=hovered, p=lock_progress: self._draw_tile(lock, hovered, p)
+            else:
+                draw = lambda lock=lock, hovered=hovered, p=lock_progress: self._draw_tile_clipped(lock, hovered, p)
+            items.append((("tile", lock.lock_id), key, bounds, draw))
+
+        for pid, color, pos, outline, bounds in self._presence_layout():
+            items.append((
+                ("cursor", pid), (pos, color), bounds,
+                lambda pid=pid, color=color, pos=pos, outline=outline: self._draw_cursor(pid, color, pos, outline),
+            ))
+
+        # Panels: help/legend toggled as overlays only
+        total = getattr(self.grid, "size", GRID_ROWS * GRID_COLS)
+        scores = tuple((pid, p["score"], p["locks_broken"]) for pid, p in self.players.items())
+        board = self.network.leaderboard
+        rank = (board["rank"], board["total"]) if board and board.get("rank") else None
+        hud_key = (remaining_seconds, scores, total, getattr(self.grid, "remaining_locks", total), rank)
+        items.append(("hud", hud_key, pygame.Rect(10, height - 58, width - 20, 48),
+                      lambda: self._draw_hud(remaining_seconds, rank)))
+
+        controls = self._hud_control_layout()
+        controls_bounds = controls[0][1].unionall([rect for _, rect in controls])
+        items.append(("controls", tuple(text for text, _ in controls), controls_bounds,
+                      lambda: self._draw_hud_controls(controls)))
+
+        if self.replay is not None:
+            row, bar, label, pct = self._replay_bar_layout()
+            items.append(("replay", (label, int(bar.w * pct), bar.topleft), row,
+                          lambda: self._draw_replay_bar(row, bar, label, pct)))
+
+        if self.show_help_overlay:
+            items.append(("help", None, self.screen.get_rect(), self._draw_help_overlay))
+        if self.show_legend_overlay:
+            items.append(("legend", None, self.screen.get_rect(), self._draw_legend_overlay))
+        if self.show_leaderboard and self.replay is None:
+            board_panel, rows = self._leaderboard_layout()
+            items.append(("leaders", tuple(rows), board_panel, lambda: self._draw_leaderboard(board_panel, rows)))
+
+        # Tooltip on hover
+        tooltip = self._tooltip_layout(hovered_lock, mouse_pos)
+        if tooltip:
+            panel, lines = tooltip
+            items.append(("tooltip", tuple(lines), panel, lambda: self._draw_tooltip_panel(panel, lines)))
+
+        # Toasts
+        for i, (toast, rect) in enumerate(self._toast_layout()):
+            items.append((("toast", i), (toast["text"], toast["color"]), rect,
+                          lambda toast=toast, rect=rect: self._draw_toast(toast, rect)))
+
+        # Performance HUD on top of everything
+        if self.show_perf_hud:
+            panel, lines, hist = self._perf_hud_layout()
+            items.append(("perf", (tuple(lines), tuple(hist)), panel,
+                          lambda: self._draw_perf_hud(panel, lines, hist)))
+        return items
+
+    def _dirty_rects(self, scene):
+        # Bounds of every item that appeared, disappeared, moved or changed since the last painted frame
+        dirty = []
+        for item_id, (key, rect) in scene.items():
+            old = self._scene.get(item_id)
+            if old is None:
+                dirty.append(rect)
+            elif old[0] != key or old[1] != rect:
+                dirty.append(rect)
+                if old[1] != rect:
+                    dirty.append(old[1])
+        for item_id, (_, rect) in self._scene.items():
+            if item_id not in scene:
+                dirty.append(rect)
+
+        # Merge overlapping regions so nothing is painted twice
+        screen_rect = self.screen.get_rect()
+        merged = []
+        for rect in dirty:
+            rect = rect.clip(screen_rect)
+            if rect.w <= 0 or rect.h <= 0:
+                continue
+            i = 0
+            while i < len(merged):
+                if merged[i].colliderect(rect):
+                    rect = rect.union(merged.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            merged.append(rect)
+        return merged
+
+    def _paint_region(self, region, items):
+        # Rebuild one region from the cached backdrop up, then re-apply the CRT look to it
+        self.screen.set_clip(region)
+        self._blit(self._base_layer, region, region)
+        for _, _, bounds, draw in items:
+            if bounds.colliderect(region):
+                draw()
+        self._apply_crt_overlay(animate=False)
+        self.screen.set_clip(None)
+
+    # ---------- Frame pacing ----------
+    def _wake(self):
+        # Network thread: end an idle wait; one wake event in the queue is enough
+        if self.wake_posted:
+            return
+        self.wake_posted = True
+        try:
+            pygame.event.post(pygame.event.Event(NET_EVENT))
+        except pygame.error:
+            pass
+
+    def _pace_frame(self):
+        # Cap the frame rate, then sleep until input, a packet or the next scheduled change on screen
+        self.perf.end_frame(self.network.packets_received)
+        self.clock.tick(TARGET_FPS if pygame.display.get_active() else MINIMIZED_FPS)
+        if not self.redraw_now:
+            timeout = self._next_redraw_ms()
+            if timeout > 0:
+                event = pygame.event.wait(timeout)
+                if event.type not in (pygame.NOEVENT, NET_EVENT):
+                    self.pending_events.append(event)
+        self.redraw_now = False
+        # Packets arriving from here on post a fresh wake event
+        self.wake_posted = False
+        self.perf.begin_frame()
+        if self.show_perf_hud and pygame.time.get_ticks() >= self.ping_next_send:
+            self.network.send_ping()
+            self.network.flush()                # send it now, so this frame's work is not timed as latency
+            self.ping_next_send = pygame.time.get_ticks() + PING_INTERVAL_MS
+        if self.show_leaderboard and self.replay is None:
+            self._request_leaderboard()
+
+    def _poll_events(self):
+        events = self.pending_events
+        self.pending_events = []
+        for event in pygame.event.get():
+            if event.type == NET_EVENT:
+                self.redraw_now = True          # packet landed mid-frame, pick it up next frame
+            else:
+                events.append(event)
+        if events:
+            self.redraw_now = True              # input changes what is on screen, redraw right away
+        return events
+
+    def _next_redraw_ms(self):
+        # Time until something changes without input: timer digits, toast expiry, caret blink,
+        # throttled sends that are still owed. Capped at IDLE_WAIT_MS so the CRT keeps breathing
+        now = pygame.time.get_ticks()
+        deadlines = [now + IDLE_WAIT_MS]
+        if self.replay is not None:
+            wait = self.replay.next_change_in()
+            if wait is not None:
+                deadlines.append(now + min(int(wait * 1000), 100))     # the timeline keeps moving between changes
+            return max(0, min(deadlines) - now)
+        if self.in_lobby:
+            if self.countdown_active:
+                left = (self.countdown_end_ticks or 0) - now
+                deadlines.append(now + (left % 1000 if left > 0 else 0))
+        else:
+            if self.game_start_ticks is not None:
+                elapsed = now - self.game_start_ticks
+                deadlines.append(now + 1000 - elapsed % 1000)
+            deadlines.extend(t["expiry"] for t in self.toasts)
+            if self.selected_lock:
+                deadlines.append((now // 400 + 1) * 400)
+                if (self.typing.correct_len, int(self.wpm)) != self.progress_sent:
+                    deadlines.append(self.progress_next_send)
+            elif pygame.mouse.get_focused():
+                if self._grid_cursor(pygame.mouse.get_pos()) != self.cursor_sent:
+                    deadlines.append(self.cursor_next_send)
+        return max(0, min(deadlines) - now)
 
     # ---------- Screens ----------
     def show_loading_screen(self):
@@ -454,16 +986,16 @@ class GameUI:
                     done = True
 
             # Backdrop
-            self.screen.fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
+            self._fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
             self._draw_frame()
 
             # Title
             width, height = self.screen.get_size()
-            title_shadow = self.title_font.render("CLASH OF TYPERS", True, (20, 20, 20))
-            title = self.title_font.render("CLASH OF TYPERS", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+            title_shadow = self.text_cache.render(self.title_font, "CLASH OF TYPERS", True, (20, 20, 20))
+            title = self.text_cache.render(self.title_font, "CLASH OF TYPERS", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
             tx = (width - title.get_width()) // 2
-            self.screen.blit(title_shadow, (tx + 4, 136))
-            self.screen.blit(title, (tx, 132))
+            self._blit(title_shadow, (tx + 4, 136))
+            self._blit(title, (tx, 132))
 
             # Loading bar
             elapsed = (pygame.time.get_ticks() - start) / 1000.0
@@ -471,57 +1003,59 @@ class GameUI:
             progress = max(0.0, min(1.0, elapsed / duration))
             bar_w = min(600, width - 200)
             bar_rect = pygame.Rect((width - bar_w) // 2, 360, bar_w, 18)
-            pygame.draw.rect(self.screen, (20, 20, 20), bar_rect)
-            pygame.draw.rect(self.screen, GRID_COLORS.get("hud_text", (226, 203, 156)), pygame.Rect(bar_rect.x, bar_rect.y, int(bar_w * progress), 18))
-            pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), bar_rect, 3)
+            self._draw_rect((20, 20, 20), bar_rect)
+            self._draw_rect(GRID_COLORS.get("hud_text", (226, 203, 156)), pygame.Rect(bar_rect.x, bar_rect.y, int(bar_w * progress), 18))
+            self._draw_rect(GRID_COLORS.get("border", (255, 120, 0)), bar_rect, 3)
 
             # Press start prompt (blinks)
             pulse = (pulse + 1) % 60
             if pulse < 40:
-                prompt = self.hud_font.render("PRESS ENTER TO CONTINUE", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+                prompt = self.text_cache.render(self.hud_font, "PRESS ENTER TO CONTINUE", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
                 px = (width - prompt.get_width()) // 2
-                self.screen.blit(prompt, (px, 400))
+                self._blit(prompt, (px, 400))
 
-            self._apply_crt_overlay()
-            pygame.display.flip()
+            self._present()
             # Do not auto-skip when full; require Enter to proceed
 
     def render(self, remaining_seconds):
-        # Retro backdrop
-        self.screen.fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
-        self._draw_frame()
+        # Retained mode: only regions whose content changed are repainted and pushed to the display.
+        # Full redraws happen after a resize/fullscreen toggle or when coming back from another screen.
+        full = self._scene is None
+        if full:
+            # Retro backdrop, cached so dirty regions can be restored from it
+            self._fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
+            self._draw_frame()
+            self._base_layer = self.screen.copy()
         self._compute_layout()
 
         mouse_pos = pygame.mouse.get_pos()
-        hovered_lock = self._draw_grid(mouse_pos)
-
-        # Panels: help/legend toggled as overlays only
-        self._draw_hud(remaining_seconds)
-        self._draw_hud_controls()
-
-        if self.show_help_overlay:
-            self._draw_help_overlay()
-        if self.show_legend_overlay:
-            self._draw_legend_overlay()
-
-        # Tooltip on hover
-        self._draw_tooltip(hovered_lock, mouse_pos)
-
-        # Toasts
-        self._draw_toasts()
+        items = self._scene_items(remaining_seconds, mouse_pos)
+        scene = {item_id: (key, bounds) for item_id, key, bounds, _ in items}
 
-        self._apply_crt_overlay()
-        pygame.display.flip()
+        if not full:
+            dirty = self._dirty_rects(scene)
+            width, height = self.screen.get_size()
+            if sum(r.w * r.h for r in dirty) * 2 > width * height:
+                full = True                 # cheaper to repaint everything in one pass
+            elif dirty:
+                for region in dirty:
+                    self._paint_region(region, items)
+                pygame.display.update(dirty)
+
+        if full:
+            self._paint_region(self.screen.get_rect(), items)
+            pygame.display.flip()
+        self._scene = scene
 
     def render_lock_screen(self, lock, remaining_seconds):
-        self.screen.fill((0, 0, 0))
+        self._fill((0, 0, 0))
         self._draw_frame()
 
         # Header
         width, height = self.screen.get_size()
-        header = self.title_font.render("LOCK CHALLENGE", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        header = self.text_cache.render(self.title_font, "LOCK CHALLENGE", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
         hx = (width - header.get_width()) // 2
-        self.screen.blit(header, (hx, 40))
+        self._blit(header, (hx, 40))
 
         # Target info panel
         info = [
@@ -531,164 +1065,134 @@ class GameUI:
             "Press ESC to cancel",
         ]
         panel = pygame.Rect(20, 120, 760, 80)
-        pygame.draw.rect(self.screen, (20, 20, 20), panel)
-        pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
+        self._draw_rect((20, 20, 20), panel)
+        self._draw_rect(GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
         for i, s in enumerate(info):
-            t = self.hud_font.render(s, True, (220, 220, 220))
-            self.screen.blit(t, (panel.x + 12 + i * 190, panel.y + 10))
-
-        # Target text block (larger and more visible with wrap)
-        def wrap_text(text, font, max_w):
-            words = text.split(' ')
-            lines = []
-            current = ''
-            for w in words:
-                test = (current + ' ' + w).strip()
-                if font.size(test)[0] <= max_w:
-                    current = test
-                else:
-                    if current:
-                        lines.append(current)
-                    current = w
-            if current:
-                lines.append(current)
-            return lines
+            t = self.text_cache.render(self.hud_font, s, True, (220, 220, 220))
+            self._blit(t, (panel.x + 12 + i * 190, panel.y + 10))
 
+        # Target text block (larger and more visible with wrap); layout and input spans are cached per keystroke
+        typing = self.typing
         max_text_w = width - 48
-        wrapped_lines = wrap_text(lock.lock_string, self.lock_text_font, max_text_w)
+        wrapped_lines = typing.wrapped_lines(self.lock_text_font, max_text_w)
         for i, line in enumerate(wrapped_lines[:8]):
-            text_surf = self.lock_text_font.render(line, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-            self.screen.blit(text_surf, (24, 220 + i * (self.lock_text_font.get_height() + 6)))
+            text_surf = self.text_cache.render(self.lock_text_font, line, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+            self._blit(text_surf, (24, 220 + i * (self.lock_text_font.get_height() + 6)))
 
         # Input with blinking cursor + correctness coloring
-        target = lock.lock_string
-        input_text = self.input_text
-        # Compare with normalization to avoid false negatives on quotes/dashes/spaces
-        correct_len = 0
-        for a, b in zip(input_text, target):
-            if self._chars_equivalent(a, b):
-                correct_len += 1
-            else:
-                break
-        correct_part = input_text[:correct_len]
-        wrong_part = input_text[correct_len:]
-
         cursor_visible = (pygame.time.get_ticks() // 400) % 2 == 0
         caret = "▌" if cursor_visible else " "
 
         x0, y0 = 24, min(420, 220 + len(wrapped_lines[:8]) * (self.lock_text_font.get_height() + 6) + 20)
-        # Draw correct part in green
-        correct_surf = self.lock_mono_font.render(correct_part, True, (0, 255, 128))
-        self.screen.blit(correct_surf, (x0, y0))
-        # Draw wrong part in red
+        # Correct part in green, wrong part in red
+        correct_surf, wrong_surf = typing.input_surfaces(self.lock_mono_font, (0, 255, 128), (255, 80, 80))
+        self._blit(correct_surf, (x0, y0))
         x_off = x0 + correct_surf.get_width()
-        wrong_surf = self.lock_mono_font.render(wrong_part, True, (255, 80, 80))
-        self.screen.blit(wrong_surf, (x_off, y0))
+        self._blit(wrong_surf, (x_off, y0))
         # Draw caret
-        caret_surf = self.lock_mono_font.render(caret, True, (0, 255, 128))
-        self.screen.blit(caret_surf, (x_off + wrong_surf.get_width(), y0))
+        caret_surf = self.text_cache.render(self.lock_mono_font, caret, True, (0, 255, 128))
+        self._blit(caret_surf, (x_off + wrong_surf.get_width(), y0))
 
         # Live WPM + timer
-        wpm_text = self.lock_info_font.render(f"WPM: {self.wpm:.1f}", True, (255, 255, 0))
-        self.screen.blit(wpm_text, (24, y0 + self.lock_mono_font.get_height() + 12))
+        wpm_text = self.text_cache.render(self.lock_info_font, f"WPM: {self.wpm:.1f}  ACC: {typing.timeline.accuracy():.0f}%", True, (255, 255, 0))
+        self._blit(wpm_text, (24, y0 + self.lock_mono_font.get_height() + 12))
         mins = remaining_seconds // 60
         secs = remaining_seconds % 60
-        timer_text = self.lock_info_font.render(f"Time Left: {mins:02d}:{secs:02d}", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-        self.screen.blit(timer_text, (24 + wpm_text.get_width() + 20, y0 + self.lock_mono_font.get_height() + 12))
+        timer_text = self.text_cache.render(self.lock_info_font, f"Time Left: {mins:02d}:{secs:02d}", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(timer_text, (24 + wpm_text.get_width() + 20, y0 + self.lock_mono_font.get_height() + 12))
 
         # Toasts
         self._draw_toasts()
 
-        self._apply_crt_overlay()
-        pygame.display.flip()
+        self._present()
 
     # ---------- Interaction helpers ----------
     def detect_click(self, pos):
-        for lock in self.grid.grid:
-            rect = pygame.Rect(
-                self.grid_origin_x + lock.col * (self.tile_w + self.tile_gap),
-                self.grid_origin_y + lock.row * (self.tile_h + self.tile_gap),
-                self.tile_w,
-                self.tile_h,
-            )
-            if rect.collidepoint(pos):
-                return lock
-        return None
+        # Cell from the pitch arithmetic; gaps and the part of the board outside the viewport hit nothing
+        if not self.grid_clip.collidepoint(pos):
+            return None
+        col, x_in = divmod(pos[0] - self.grid_origin_x, self.tile_w + self.tile_gap)
+        row, y_in = divmod(pos[1] - self.grid_origin_y, self.tile_h + self.tile_gap)
+        if not (0 <= col < self.grid.width and 0 <= row < self.grid.height):
+            return None
+        if x_in >= self.tile_w or y_in >= self.tile_h:
+            return None
+        index = row * self.grid.width + col
+        return self.grid.grid[index] if index < len(self.grid.grid) else None
 
     # ---------- Lobby & countdown ----------
     def _render_lobby_screen(self):
         width, height = self.screen.get_size()
-        self.screen.fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
+        self._fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
         self._draw_frame()
 
-        title_shadow = self.title_font.render("LOBBY", True, (20, 20, 20))
-        title = self.title_font.render("LOBBY", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        title_shadow = self.text_cache.render(self.title_font, "LOBBY", True, (20, 20, 20))
+        title = self.text_cache.render(self.title_font, "LOBBY", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
         tx = (width - title.get_width()) // 2
-        self.screen.blit(title_shadow, (tx + 4, 90))
-        self.screen.blit(title, (tx, 86))
+        self._blit(title_shadow, (tx + 4, 90))
+        self._blit(title, (tx, 86))
 
         # Players panel
         panel_w = min(640, width - 160)
         panel = pygame.Rect((width - panel_w) // 2, 180, panel_w, 260)
-        pygame.draw.rect(self.screen, (20, 20, 20), panel)
-        pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
-        header = self.hud_font.render("Players joined:", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-        self.screen.blit(header, (panel.x + 12, panel.y + 10))
+        self._draw_rect((20, 20, 20), panel)
+        self._draw_rect(GRID_COLORS.get("border", (255, 120, 0)), panel, 2)
+        header = self.text_cache.render(self.hud_font, "Players joined:", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(header, (panel.x + 12, panel.y + 10))
 
         for i, (pid, pdata) in enumerate(self.players.items()):
             host_mark = " (Host)" if pid == self.host_id else ""
             color = GRID_COLORS.get("hud_text", (226, 203, 156)) if pid == self.user_id else (200, 200, 200)
             row_text = f"{pdata.get('icon', '★')}  {pid}{host_mark}"
-            surf = self.hud_font.render(row_text, True, color)
-            self.screen.blit(surf, (panel.x + 14, panel.y + 40 + i * 26))
+            surf = self.text_cache.render(self.hud_font, row_text, True, color)
+            self._blit(surf, (panel.x + 14, panel.y + 40 + i * 26))
 
         # Start button for host
         btn_rect = pygame.Rect((width - 280) // 2, 460, 280, 44)
         if self.is_host:
-            pygame.draw.rect(self.screen, (20, 20, 20), btn_rect)
-            pygame.draw.rect(self.screen, GRID_COLORS.get("border", (255, 120, 0)), btn_rect, 3)
-            label = self.hud_font.render("Start Game (Enter)", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
-            self.screen.blit(label, (btn_rect.x + (btn_rect.w - label.get_width()) // 2, btn_rect.y + 10))
+            self._draw_rect((20, 20, 20), btn_rect)
+            self._draw_rect(GRID_COLORS.get("border", (255, 120, 0)), btn_rect, 3)
+            label = self.text_cache.render(self.hud_font, "Start Game (Enter)", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+            self._blit(label, (btn_rect.x + (btn_rect.w - label.get_width()) // 2, btn_rect.y + 10))
         else:
             # Waiting label
-            label = self.hud_font.render("Waiting for host to start...", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+            label = self.text_cache.render(self.hud_font, "Waiting for host to start...", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
             lx = (width - label.get_width()) // 2
-            self.screen.blit(label, (lx, 470))
+            self._blit(label, (lx, 470))
 
-        self._apply_crt_overlay()
-        pygame.display.flip()
+        self._present()
 
         return btn_rect if self.is_host else None
 
     def _render_countdown_screen(self):
         width, height = self.screen.get_size()
-        self.screen.fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
+        self._fill(GRID_COLORS.get("backdrop", (10, 10, 12)))
         self._draw_frame()
 
         remaining_ms = max(0, (self.countdown_end_ticks or 0) - pygame.time.get_ticks())
         remaining = int(math.ceil(remaining_ms / 1000.0))
         text = "GO!" if remaining <= 0 else str(remaining)
         color = (120, 255, 120) if text == "GO!" else GRID_COLORS.get("hud_text", (226, 203, 156))
-        title = self.title_font.render(text, True, color)
+        title = self.text_cache.render(self.title_font, text, True, color)
         tx = (width - title.get_width()) // 2
-        self.screen.blit(title, (tx, 240))
+        self._blit(title, (tx, 240))
 
-        subtitle = self.hud_font.render("Get ready...", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        subtitle = self.text_cache.render(self.hud_font, "Get ready...", True, GRID_COLORS.get("hud_text", (226, 203, 156)))
         sx = (width - subtitle.get_width()) // 2
-        self.screen.blit(subtitle, (sx, 320))
+        self._blit(subtitle, (sx, 320))
 
-        self._apply_crt_overlay()
-        pygame.display.flip()
+        self._present()
 
-    def run(self):
-        # Show retro loading screen first
-        self.show_loading_screen()
+    def run(self, show_title=True):
+        # Show retro loading screen first (client.py already showed one while connecting)
+        if show_title:
+            self.show_loading_screen()
 
         running = True
         # Lobby first; start after server start signal
         self.game_start_ticks = None
         while running:
-            self.clock.tick(60)
+            self._pace_frame()
 
             # Lobby updates
             lobby = self.network.get_packet(MSG_LOBBY_UPDATE)
@@ -696,7 +1200,7 @@ class GameUI:
                 try:
                     self.players = lobby.get("players", self.players)
                     self.host_id = lobby.get("host_id", self.host_id)
-                    self.is_host = (self.user_id == self.host_id)
+                    self.is_host = (self.user_id == self.host_id) and not self.spectator
                     if lobby.get("game_started") and self.in_lobby and not self.countdown_active:
                         # Fall-through in case we joined late
                         self.in_lobby = False
@@ -724,18 +1228,22 @@ class GameUI:
                         self.in_lobby = False
                         self.countdown_active = False
                         self.game_start_ticks = pygame.time.get_ticks()
-                    for event in pygame.event.get():
+                        self.redraw_now = True
+                    for event in self._poll_events():
                         if event.type == pygame.QUIT:
                             running = False
+                    self.network.flush()
                     continue
                 else:
                     start_btn_rect = self._render_lobby_screen()
-                    for event in pygame.event.get():
+                    for event in self._poll_events():
                         if event.type == pygame.QUIT:
                             running = False
                         elif event.type == pygame.VIDEORESIZE:
                             self.screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
                             self._rebuild_overlays()
+                        elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                            self.show_perf_hud = not self.show_perf_hud
                         elif event.type == pygame.KEYDOWN and self.is_host and (event.key == pygame.K_RETURN or event.key == pygame.K_KP_ENTER):
                             self.network.send_start_game()
                         elif event.type == pygame.KEYDOWN and (event.key == pygame.K_f or event.key == pygame.K_F11):
@@ -748,13 +1256,16 @@ class GameUI:
                             self._rebuild_overlays()
                         elif event.type == pygame.MOUSEBUTTONDOWN and self.is_host and start_btn_rect and start_btn_rect.collidepoint(event.pos):
                             self.network.send_start_game()
+                    self.network.flush()
                     continue
 
-            # Receive server updates
-            packet = self.network.get_packet(MSG_GRID_UPDATE)
-            if packet:
-                self.grid = Grid.from_dict(packet["grid"], GRID_ROWS, GRID_COLS)
-                self.players = packet["players"]
+            # Receive server updates (grid already built on the network thread, so this is a reference swap)
+            snapshot = self.network.take_snapshot()
+            if snapshot:
+                self.grid = snapshot.grid
+                self.players = snapshot.players
+                # Snapshot may predate our in-flight requests; keep them applied until answered
+                self.pending_ops.reapply(self.grid, self.user_id)
                 # Keep selected lock reference in sync with latest grid
                 if self.selected_lock is not None:
                     try:
@@ -763,8 +1274,7 @@ class GameUI:
                         if latest.broken or latest.claimed_by_user != self.user_id:
                             self._add_toast("Lock no longer available", color=(255, 120, 120))
                             self.selected_lock = None
-                            self.input_text = ""
-                            self.start_time = None
+                            self.typing = None
                             self.wpm = 0
                         else:
                             self.selected_lock = latest
@@ -775,19 +1285,20 @@ class GameUI:
             claim_result = self.network.get_packet(MSG_CLAIM_RES)
             if claim_result:
                 success = claim_result.get("success")
-                lock_data = claim_result.get("lock")
-                if lock_data:
+                updated_lock = claim_result.get("lock")
+                # Confirmed claims stay as applied; a rejected one is rolled back by the server's lock below
+                self.pending_ops.resolve(claim_result.get("req_id"))
+                if updated_lock:
                     try:
-                        updated_lock = Lock.from_dict(lock_data)
                         self.grid.update_lock(updated_lock)
+                        self.pending_ops.reapply(self.grid, self.user_id)
                         # If we were working on this lock, refresh reference
                         if self.selected_lock and self.selected_lock.lock_id == updated_lock.lock_id:
                             # If claim failed, exit the lock screen
                             if not success:
                                 self._add_toast("Lock already claimed!", color=(255, 120, 120))
                                 self.selected_lock = None
-                                self.input_text = ""
-                                self.start_time = None
+                                self.typing = None
                                 self.wpm = 0
                             else:
                                 # Refresh local reference to avoid stale data
@@ -798,10 +1309,12 @@ class GameUI:
             # Optional: unclaim result handling (update local grid if provided)
             unclaim_result = self.network.get_packet(MSG_UNCLAIM_RES)
             if unclaim_result:
-                lock_data = unclaim_result.get("lock")
-                if lock_data:
+                updated_lock = unclaim_result.get("lock")
+                self.pending_ops.resolve(unclaim_result.get("req_id"))
+                if updated_lock:
                     try:
-                        self.grid.update_lock(Lock.from_dict(lock_data))
+                        self.grid.update_lock(updated_lock)
+                        self.pending_ops.reapply(self.grid, self.user_id)
                     except Exception:
                         pass
 
@@ -810,10 +1323,10 @@ class GameUI:
             if break_result:
                 success = break_result.get("success")
                 points = break_result.get("points", 0)
-                lock_data = break_result.get("lock")
-                if lock_data:
+                updated_lock = break_result.get("lock")
+                if updated_lock:
                     try:
-                        self.grid.update_lock(Lock.from_dict(lock_data))
+                        self.grid.update_lock(updated_lock)
                     except Exception:
                         pass
                 if success:
@@ -821,6 +1334,11 @@ class GameUI:
                 else:
                     self._add_toast("Failed to unlock", color=(255, 120, 120))
 
+            # Writer thread could not deliver our last batch
+            net_error = self.network.get_packet(MSG_NET_ERROR)
+            if net_error:
+                self._add_toast("Connection lost", duration_ms=4000, color=(255, 120, 120))
+
             # Remaining time
             remaining_seconds = countdown_timer(self.game_start_ticks, self.game_duration_seconds)
 
@@ -833,16 +1351,28 @@ class GameUI:
 
             if self.selected_lock:
                 self.render_lock_screen(self.selected_lock, remaining_seconds)
+                self._update_presence(None)
+                self._update_typing_progress()
             else:
                 self.render(remaining_seconds)
+                if not self.spectator:
+                    self._update_presence(pygame.mouse.get_pos() if pygame.mouse.get_focused() else None)
 
-            for event in pygame.event.get():
+            for event in self._poll_events():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.VIDEORESIZE:
                     self.screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
                     self._rebuild_overlays()
-                elif event.type == pygame.MOUSEBUTTONDOWN and not self.selected_lock:
+                elif event.type == pygame.MOUSEBUTTONDOWN and not self.selected_lock and event.button in (2, 3):
+                    self.panning = True
+                elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+                    self.panning = False
+                elif event.type == pygame.MOUSEMOTION and self.panning:
+                    self._pan(-event.rel[0], -event.rel[1])
+                elif event.type == pygame.MOUSEWHEEL and not self.selected_lock:
+                    self._zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
+                elif event.type == pygame.MOUSEBUTTONDOWN and not self.selected_lock and event.button == 1:
                     # HUD controls clicks
                     if self.help_button_rect and self.help_button_rect.collidepoint(event.pos):
                         self.show_help_overlay = not self.show_help_overlay
@@ -850,61 +1380,176 @@ class GameUI:
                     if self.legend_button_rect and self.legend_button_rect.collidepoint(event.pos):
                         self.show_legend_overlay = not self.show_legend_overlay
                         continue
+                    if self.leaders_button_rect and self.leaders_button_rect.collidepoint(event.pos):
+                        self._toggle_leaderboard()
+                        continue
                     clicked = self.detect_click(event.pos)
-                    if clicked and not clicked.broken:
+                    if clicked and not clicked.broken and not self.spectator:
                         # Block entry if claimed by another user
                         if clicked.claimed_by_user not in (None, self.user_id):
                             self._add_toast("Already claimed", color=(255, 120, 120))
                             continue
-                        # Optimistically mark as claimed for local UI feel
-                        clicked.claimed_by_user = self.user_id
-                        self.network.send_claim(clicked.lock_id)
+                        # Optimistically mark as claimed; the server result confirms or rolls back
+                        req_id = self.network.send_claim(clicked.lock_id)
+                        self.pending_ops.apply(self.grid, req_id, "claim", clicked.lock_id, self.user_id)
                         # Begin lock screen
                         self.selected_lock = clicked
-                        self.input_text = ""
-                        self.start_time = pygame.time.get_ticks()
+                        self.typing = TypingSession(clicked)
+                        self.progress_sent = (0, 0)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    self.show_perf_hud = not self.show_perf_hud
                 elif event.type == pygame.KEYDOWN and self.selected_lock:
                     if event.key == pygame.K_ESCAPE:
-                        # Properly request unclaim on cancel
+                        # Properly request unclaim on cancel, releasing the tile locally right away
                         try:
-                            self.network.send_unclaim(self.selected_lock.lock_id)
+                            req_id = self.network.send_unclaim(self.selected_lock.lock_id)
+                            self.pending_ops.apply(self.grid, req_id, "unclaim", self.selected_lock.lock_id, self.user_id)
                         except Exception:
                             pass
                         self.selected_lock = None
-                        self.input_text = ""
+                        self.typing = None
                         self.wpm = 0
                     elif event.key == pygame.K_BACKSPACE:
-                        self.input_text = self.input_text[:-1]
+                        self.typing.backspace()
                         # Update live WPM when editing
-                        if self.start_time is not None:
-                            self.wpm = calculate_wpm(self.start_time, pygame.time.get_ticks(), len(self.input_text))
+                        self.wpm = self.typing.wpm()
                     elif event.key == pygame.K_RETURN:
-                        end_time = pygame.time.get_ticks()
-                        self.wpm = calculate_wpm(self.start_time, end_time, len(self.input_text))
-                        self.network.send_break(self.selected_lock.lock_id, self.input_text, self.wpm)
+                        self.wpm = self.typing.wpm(time.perf_counter_ns())
+                        self.network.send_break(self.selected_lock.lock_id, self.typing.input_text, self.wpm, self.typing.timeline.trace.encode())
                         self.selected_lock = None
-                        self.input_text = ""
-                        self.start_time = None
+                        self.typing = None
                     else:
                         # Filter non-printable control chars to keep retro look
                         if event.unicode and event.unicode.isprintable():
-                            self.input_text += event.unicode
+                            self.typing.type_text(event.unicode)
                             # Live WPM while typing
-                            if self.start_time is not None:
-                                self.wpm = calculate_wpm(self.start_time, pygame.time.get_ticks(), len(self.input_text))
+                            self.wpm = self.typing.wpm()
                 elif event.type == pygame.KEYDOWN and not self.selected_lock:
                     if event.key == pygame.K_h:
                         self.show_help_overlay = not self.show_help_overlay
                     elif event.key == pygame.K_l:
                         self.show_legend_overlay = not self.show_legend_overlay
+                    elif event.key == pygame.K_b:
+                        self._toggle_leaderboard()
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN):
+                        step_x = self.tile_w + self.tile_gap
+                        step_y = self.tile_h + self.tile_gap
+                        self._pan(
+                            (event.key == pygame.K_RIGHT) * step_x - (event.key == pygame.K_LEFT) * step_x,
+                            (event.key == pygame.K_DOWN) * step_y - (event.key == pygame.K_UP) * step_y,
+                        )
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self._zoom_at(self.grid_clip.center, ZOOM_STEP)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self._zoom_at(self.grid_clip.center, 1 / ZOOM_STEP)
+                    elif event.key == pygame.K_0:
+                        self.zoom = 1.0
+                        self.camera_x = self.camera_y = 0
                     elif event.key == pygame.K_f or event.key == pygame.K_F11:
-                        # Toggle fullscreen
-                        self.fullscreen = not self.fullscreen
-                        if self.fullscreen:
-                            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
-                        else:
-                            self.screen = pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
-                        self._rebuild_overlays()
+                        self._toggle_fullscreen()
+
+            # Everything sent while handling this frame's input goes out as one write
+            self.network.flush()
+
+    def _toggle_fullscreen(self):
+        self.fullscreen = not self.fullscreen
+        if self.fullscreen:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.screen = pygame.display.set_mode(self.windowed_size, pygame.RESIZABLE)
+        self._rebuild_overlays()
+
+    # ---------- Replay viewer ----------
+    def _replay_bar_layout(self):
+        # Status label and seekable timeline in one row above the HUD
+        width, height = self.screen.get_size()
+        replay = self.replay
+        state = "PLAY" if replay.playing else "PAUSE"
+        clock = lambda t: f"{int(t) // 60:02d}:{int(t) % 60:02d}"
+        label = f"REPLAY {state} x{replay.speed:g}  {clock(replay.time)} / {clock(replay.duration)}"
+        label_w = self.hud_font.size(label)[0]
+        row = pygame.Rect(20, height - 78, width - 40, 22)
+        bar = pygame.Rect(row.x + label_w + 16, row.y + 4, max(40, row.w - label_w - 16), 14)
+        self.replay_bar_rect = bar
+        pct = replay.time / replay.duration if replay.duration else 1.0
+        return row, bar, label, pct
+
+    def _draw_replay_bar(self, row, bar, label, pct):
+        text = self.text_cache.render(self.hud_font, label, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+        self._blit(text, (row.x, row.y + (row.h - text.get_height()) // 2))
+        self._draw_rect((20, 20, 20), bar)
+        self._draw_rect((226, 203, 156), pygame.Rect(bar.x, bar.y, int(bar.w * pct), bar.h))
+        self._draw_outline((143, 19, 19), bar, 2)
+
+    def run_replay(self, replay):
+        # Play back a recorded match (replay.ReplayPlayer): Space pauses, Left/Right seek,
+        # Up/Down double or halve the speed, Home restarts, a click on the timeline seeks there.
+        # The board camera (drag, wheel, +/-, 0) and F/F3 work as in a match.
+        self.replay = replay
+        self.in_lobby = False
+        last = time.perf_counter()
+        running = True
+        while running:
+            self._pace_frame()
+            now = time.perf_counter()
+            replay.advance(now - last)
+            last = now
+
+            for event in self._poll_events():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.VIDEORESIZE:
+                    self.screen = pygame.display.set_mode(event.size, pygame.RESIZABLE)
+                    self._rebuild_overlays()
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    bar = self.replay_bar_rect
+                    if bar and bar.inflate(0, 10).collidepoint(event.pos):
+                        replay.seek((event.pos[0] - bar.x) / bar.w * replay.duration)
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (2, 3):
+                    self.panning = True
+                elif event.type == pygame.MOUSEBUTTONUP and event.button in (2, 3):
+                    self.panning = False
+                elif event.type == pygame.MOUSEMOTION and self.panning:
+                    self._pan(-event.rel[0], -event.rel[1])
+                elif event.type == pygame.MOUSEWHEEL:
+                    self._zoom_at(pygame.mouse.get_pos(), ZOOM_STEP ** event.y)
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_ESCAPE:
+                        running = False
+                    elif event.key == pygame.K_SPACE:
+                        if not replay.playing and replay.time >= replay.duration:
+                            replay.seek(0.0)
+                        replay.playing = not replay.playing
+                    elif event.key in (pygame.K_LEFT, pygame.K_RIGHT):
+                        step = REPLAY_SEEK_SECONDS if event.key == pygame.K_RIGHT else -REPLAY_SEEK_SECONDS
+                        replay.seek(replay.time + step)
+                    elif event.key == pygame.K_UP:
+                        replay.speed = min(REPLAY_MAX_SPEED, replay.speed * 2)
+                    elif event.key == pygame.K_DOWN:
+                        replay.speed = max(REPLAY_MIN_SPEED, replay.speed / 2)
+                    elif event.key == pygame.K_HOME:
+                        replay.seek(0.0)
+                    elif event.key == pygame.K_F3:
+                        self.show_perf_hud = not self.show_perf_hud
+                    elif event.key == pygame.K_h:
+                        self.show_help_overlay = not self.show_help_overlay
+                    elif event.key == pygame.K_l:
+                        self.show_legend_overlay = not self.show_legend_overlay
+                    elif event.key in (pygame.K_EQUALS, pygame.K_PLUS, pygame.K_KP_PLUS):
+                        self._zoom_at(self.grid_clip.center, ZOOM_STEP)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        self._zoom_at(self.grid_clip.center, 1 / ZOOM_STEP)
+                    elif event.key == pygame.K_0:
+                        self.zoom = 1.0
+                        self.camera_x = self.camera_y = 0
+                    elif event.key == pygame.K_f or event.key == pygame.K_F11:
+                        self._toggle_fullscreen()
+
+            # A seek swaps in another grid; the retained scene compares tile contents, not objects
+            self.grid = replay.grid
+            self.players = replay.players
+            if running:
+                self.render(replay.remaining_seconds())
 
     def _render_end_screen(self):
         # Winner/loser end screen with final scores and tie handling
@@ -926,42 +1571,43 @@ class GameUI:
                     done = True
 
             width, height = self.screen.get_size()
-            self.screen.fill(GRID_COLORS.get("backdrop", (30, 30, 30)))
+            self._fill(GRID_COLORS.get("backdrop", (30, 30, 30)))
             self._draw_frame()
 
             # Winner/loser banner
             banner_text = "YOU WIN!" if user_won else "YOU LOSE"
             banner_color = (120, 255, 120) if user_won else (255, 120, 120)
-            title_shadow = self.title_font.render(banner_text, True, (20, 20, 20))
-            title = self.title_font.render(banner_text, True, banner_color)
+            if self.spectator:
+                banner_text, banner_color = "MATCH OVER", GRID_COLORS.get("hud_text", (226, 203, 156))
+            title_shadow = self.text_cache.render(self.title_font, banner_text, True, (20, 20, 20))
+            title = self.text_cache.render(self.title_font, banner_text, True, banner_color)
             tx = (width - title.get_width()) // 2
-            self.screen.blit(title_shadow, (tx + 4, 136))
-            self.screen.blit(title, (tx, 132))
+            self._blit(title_shadow, (tx + 4, 136))
+            self._blit(title, (tx, 132))
 
             # Winners line (ties supported)
             if winners:
                 winners_label = "Winners: " + ", ".join(winners)
-                winners_surf = self.hud_font.render(winners_label, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
+                winners_surf = self.text_cache.render(self.hud_font, winners_label, True, GRID_COLORS.get("hud_text", (226, 203, 156)))
                 wx = (width - winners_surf.get_width()) // 2
-                self.screen.blit(winners_surf, (wx, 200))
+                self._blit(winners_surf, (wx, 200))
 
             # Scores panel
             panel_w = min(600, width - 200)
             panel = pygame.Rect((width - panel_w) // 2, 240, panel_w, 220)
-            pygame.draw.rect(self.screen, (20, 20, 20), panel)
-            pygame.draw.rect(self.screen, (143, 19, 19), panel, 2)
+            self._draw_rect((20, 20, 20), panel)
+            self._draw_rect((143, 19, 19), panel, 2)
             sorted_players = sorted(self.players.items(), key=lambda kv: kv[1]["score"], reverse=True)
             for i, (pid, pdata) in enumerate(sorted_players[:6]):
                 color = (226, 203, 156) if pid == self.user_id else (200, 200, 200)
                 row_text = f"{i+1}. {pid} - {pdata['score']} pts, {pdata['locks_broken']} locks"
-                surf = self.hud_font.render(row_text, True, color)
-                self.screen.blit(surf, (panel.x + 14, panel.y + 16 + i * 24))
+                surf = self.text_cache.render(self.hud_font, row_text, True, color)
+                self._blit(surf, (panel.x + 14, panel.y + 16 + i * 24))
 
             pulse = (pulse + 1) % 60
             if pulse < 40:
-                prompt = self.hud_font.render("Press ENTER to exit", True, (226, 203, 156))
+                prompt = self.text_cache.render(self.hud_font, "Press ENTER to exit", True, (226, 203, 156))
                 px = (width - prompt.get_width()) // 2
-                self.screen.blit(prompt, (px, 450))
+                self._blit(prompt, (px, 450))
 
-            self._apply_crt_overlay()
-            pygame.display.flip()
+            self._present()
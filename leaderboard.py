@@ -0,0 +1,178 @@
+# leaderboard.py
+
+# Live leaderboard kept by the server: every player's (score, locks broken) in an indexable
+# skip list, so a score change, a rank lookup and the k-th entry are O(log n) and the top K
+# is O(log n + K) - nothing is re-sorted when a client asks.
+# Entries are keyed by player id and carry the room they play in, so one board can rank
+# every room a server hosts.
+
+import random
+
+MAX_LEVEL = 24
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level        # positions skipped by each forward link
+
+
+class IndexableSkipList:
+    """
+    Sorted keys with positional access. Each forward link stores how many positions it
+    skips, so rank and index lookups walk O(log n) nodes like a search does.
+    """
+
+    def __init__(self, seed=None):
+        self.head = _Node(None, MAX_LEVEL)
+        self.level = 1
+        self.size = 0
+        self.rng = random.Random(seed)
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self):
+        level = 1
+        while level < MAX_LEVEL and self.rng.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        update = [self.head] * MAX_LEVEL
+        steps = [0] * MAX_LEVEL         # position of update[i]
+        node = self.head
+        pos = 0
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key < key:
+                pos += node.width[i]
+                node = node.next[i]
+            update[i] = node
+            steps[i] = pos
+
+        level = self._random_level()
+        if level > self.level:
+            for i in range(self.level, level):
+                update[i] = self.head
+                steps[i] = 0
+                self.head.width[i] = self.size + 1
+            self.level = level
+
+        new = _Node(key, level)
+        for i in range(level):
+            prev = update[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            skipped = pos - steps[i]
+            new.width[i] = prev.width[i] - skipped
+            prev.width[i] = skipped + 1
+        for i in range(level, self.level):
+            update[i].width[i] += 1
+        self.size += 1
+
+    def remove(self, key):
+        update = [self.head] * MAX_LEVEL
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            update[i] = node
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for i in range(self.level):
+            if update[i].next[i] is target:
+                update[i].width[i] += target.width[i] - 1
+                update[i].next[i] = target.next[i]
+            else:
+                update[i].width[i] -= 1
+        while self.level > 1 and self.head.next[self.level - 1] is None:
+            self.level -= 1
+        self.size -= 1
+
+    # 0-based position of key
+    def index(self, key):
+        node = self.head
+        pos = 0
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key < key:
+                pos += node.width[i]
+                node = node.next[i]
+        target = node.next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+        return pos
+
+    # key at 0-based position
+    def __getitem__(self, index):
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        node = self.head
+        remaining = index + 1
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.width[i] <= remaining:
+                remaining -= node.width[i]
+                node = node.next[i]
+            if remaining == 0:
+                break
+        return node.key
+
+    # keys from 0-based position start, in order
+    def slice(self, start, count):
+        if count <= 0 or start >= self.size:
+            return []
+        node_key = self[start]
+        node = self.head
+        for i in range(self.level - 1, -1, -1):
+            while node.next[i] is not None and node.next[i].key < node_key:
+                node = node.next[i]
+        node = node.next[0]
+        out = []
+        while node is not None and len(out) < count:
+            out.append(node.key)
+            node = node.next[0]
+        return out
+
+
+class Leaderboard:
+    def __init__(self):
+        self.entries = {}               # player_id -> sort key
+        self.ranking = IndexableSkipList()
+
+    def __len__(self):
+        return len(self.entries)
+
+    # best first: higher score, then more locks broken, then player id
+    @staticmethod
+    def _key(player_id, score, locks_broken, room):
+        return (-score, -locks_broken, player_id, room)
+
+    def update(self, player_id, score, locks_broken=0, room=None):
+        key = self._key(player_id, score, locks_broken, room)
+        old = self.entries.get(player_id)
+        if old == key:
+            return
+        if old is not None:
+            self.ranking.remove(old)
+        self.ranking.insert(key)
+        self.entries[player_id] = key
+
+    def remove(self, player_id):
+        old = self.entries.pop(player_id, None)
+        if old is not None:
+            self.ranking.remove(old)
+
+    # 1-based rank, or None for unknown players
+    def rank(self, player_id):
+        key = self.entries.get(player_id)
+        if key is None:
+            return None
+        return self.ranking.index(key) + 1
+
+    # [[player_id, score, locks_broken, room], ...] best first
+    def top(self, n):
+        return [[player_id, -score, -locks, room] for score, locks, player_id, room in self.ranking.slice(0, n)]
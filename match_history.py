@@ -0,0 +1,252 @@
+# match_history.py
+
+# Durable match history: finished matches, per-lock outcomes and per-player stats in a
+# local SQLite database (WAL mode). The server hands a finished match to HistoryWriter,
+# which only queues it; a background thread writes each batch of queued matches in one
+# transaction, so the game loop never waits on disk.
+#
+#   python match_history.py history Arun             # a player's recent matches
+#   python match_history.py export --format csv      # every player result as CSV
+#   python match_history.py export --player Arun -o arun.json
+
+import argparse
+import csv
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+from config import HISTORY_DB, HISTORY_BATCH
+
+# next to this module, not in whatever directory the server was started from
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), HISTORY_DB)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    match_id    INTEGER PRIMARY KEY,
+    started_at  REAL NOT NULL,
+    ended_at    REAL NOT NULL,
+    reason      TEXT NOT NULL,
+    seed        INTEGER,
+    corpus      TEXT,
+    grid_rows   INTEGER NOT NULL,
+    grid_cols   INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS match_players (
+    match_id     INTEGER NOT NULL REFERENCES matches(match_id),
+    player_id    TEXT NOT NULL,
+    icon         TEXT,
+    place        INTEGER NOT NULL,
+    score        INTEGER NOT NULL,
+    locks_broken INTEGER NOT NULL,
+    avg_wpm      REAL,
+    best_wpm     REAL,
+    PRIMARY KEY (match_id, player_id)
+);
+CREATE TABLE IF NOT EXISTS match_locks (
+    match_id    INTEGER NOT NULL REFERENCES matches(match_id),
+    lock_id     INTEGER NOT NULL,
+    difficulty  TEXT NOT NULL,
+    lock_string TEXT NOT NULL,
+    broken_by   TEXT,
+    points      INTEGER NOT NULL,
+    wpm         REAL,
+    broken_at   REAL,
+    PRIMARY KEY (match_id, lock_id)
+);
+CREATE INDEX IF NOT EXISTS match_players_by_player ON match_players(player_id, match_id);
+CREATE INDEX IF NOT EXISTS matches_by_end ON matches(ended_at);
+"""
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")       # WAL keeps this crash-safe; only the last commits can be lost on power failure
+    conn.executescript(SCHEMA)
+    return conn
+
+
+# One finished match as plain data, built on the server thread (cheap: no I/O)
+#   grid: the match Grid; outcomes: lock_id -> (player_id, wpm, points, broken_at);
+#   roster: player_id -> icon for everyone who played
+def match_record(grid, outcomes, roster, started_at, ended_at, reason):
+    per_player = {player_id: [0, 0, []] for player_id in roster}            # score, locks, wpms
+    locks = []
+    for lock in grid.grid:
+        player_id, wpm, points, broken_at = outcomes.get(lock.lock_id, (None, None, 0, None))
+        locks.append((lock.lock_id, lock.difficulty, lock.lock_string, player_id, points, wpm, broken_at))
+        if player_id is not None:
+            stats = per_player.setdefault(player_id, [0, 0, []])
+            stats[0] += points
+            stats[1] += 1
+            stats[2].append(wpm)
+
+    standings = sorted(per_player.items(), key=lambda kv: (-kv[1][0], -kv[1][1], kv[0]))
+    players = []
+    for place, (player_id, (score, broken, wpms)) in enumerate(standings, 1):
+        avg = round(sum(wpms) / len(wpms), 1) if wpms else None
+        best = round(max(wpms), 1) if wpms else None
+        players.append((player_id, roster.get(player_id), place, score, broken, avg, best))
+    return {
+        "match": (started_at, ended_at, reason, grid.seed, grid.corpus_version, grid.height, grid.width),
+        "players": players,
+        "locks": locks,
+    }
+
+
+class HistoryWriter:
+    def __init__(self, path=DB_PATH, batch=HISTORY_BATCH):
+        self.path = path
+        self.batch = batch
+        self.queue = queue.SimpleQueue()
+        self.written = 0                                # matches committed so far
+        self.errors = 0
+        self.thread = threading.Thread(target=self._run, name="match-history", daemon=True)
+        self.thread.start()
+
+    # called on the game loop: O(1), never touches the database
+    def record(self, record):
+        self.queue.put(record)
+
+    # write everything queued so far, then stop the thread
+    def close(self, timeout=5.0):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout)
+
+    def _run(self):
+        conn = None
+        try:
+            while True:
+                records = [self.queue.get()]
+                while len(records) < self.batch:         # drain whatever piled up while we were writing
+                    try:
+                        records.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = None in records
+                records = [r for r in records if r is not None]
+                if records:
+                    if conn is None:
+                        conn = self._connect(len(records))          # retried per batch: a locked file may free up
+                    if conn is not None:
+                        self._write(conn, records)
+                if stop:
+                    return
+        finally:
+            if conn is not None:
+                conn.close()
+
+    # None (and the batch counted as lost) when the database cannot be opened
+    def _connect(self, pending):
+        try:
+            return connect(self.path)
+        except (sqlite3.Error, OSError) as e:
+            self.errors += pending
+            print(f"[HISTORY ERROR] {pending} match(es) not saved: cannot open {self.path}: {e}")
+            return None
+
+    # one transaction per batch
+    def _write(self, conn, records):
+        try:
+            with conn:
+                for record in records:
+                    match_id = conn.execute(
+                        "INSERT INTO matches (started_at, ended_at, reason, seed, corpus, grid_rows, grid_cols)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?)", record["match"]
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO match_players VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(match_id, *row) for row in record["players"]],
+                    )
+                    conn.executemany(
+                        "INSERT INTO match_locks VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(match_id, *row) for row in record["locks"]],
+                    )
+            self.written += len(records)
+        except sqlite3.Error as e:
+            self.errors += len(records)
+            print(f"[HISTORY ERROR] {len(records)} match(es) not saved: {e}")
+
+
+# ---------- Queries (indexed on player_id / ended_at) ----------
+
+PLAYER_COLUMNS = ("match_id", "ended_at", "reason", "player_id", "place", "players", "score", "locks_broken", "avg_wpm", "best_wpm")
+RESULTS_SQL = (
+    "SELECT p.match_id, m.ended_at, m.reason, p.player_id, p.place,"
+    " (SELECT COUNT(*) FROM match_players o WHERE o.match_id = p.match_id),"
+    " p.score, p.locks_broken, p.avg_wpm, p.best_wpm"
+    " FROM match_players p JOIN matches m ON m.match_id = p.match_id"
+)
+
+
+# a player's most recent matches, newest first
+def player_history(conn, player_id, limit=20):
+    return conn.execute(
+        RESULTS_SQL + " WHERE p.player_id = ? ORDER BY p.match_id DESC LIMIT ?", (player_id, limit)
+    ).fetchall()
+
+
+# matches, wins, total score, locks and best WPM over a player's whole history
+def player_summary(conn, player_id):
+    row = conn.execute(
+        "SELECT COUNT(*), SUM(place = 1), SUM(score), SUM(locks_broken), MAX(best_wpm)"
+        " FROM match_players WHERE player_id = ?",
+        (player_id,),
+    ).fetchone()
+    return dict(zip(("matches", "wins", "score", "locks_broken", "best_wpm"), row))
+
+
+# every player result (optionally one player's), oldest first
+def iter_results(conn, player_id=None):
+    if player_id is None:
+        return conn.execute(RESULTS_SQL + " ORDER BY p.match_id, p.place")
+    return conn.execute(RESULTS_SQL + " WHERE p.player_id = ? ORDER BY p.match_id", (player_id,))
+
+
+def export(conn, out, fmt="csv", player_id=None):
+    rows = iter_results(conn, player_id)
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(PLAYER_COLUMNS)
+        writer.writerows(rows)
+    else:
+        json.dump([dict(zip(PLAYER_COLUMNS, row)) for row in rows], out, indent=1)
+        out.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Match history queries and export")
+    parser.add_argument("--db", default=DB_PATH, help="history database")
+    sub = parser.add_subparsers(dest="command", required=True)
+    history = sub.add_parser("history", help="a player's recent matches")
+    history.add_argument("player")
+    history.add_argument("--limit", type=int, default=20)
+    out = sub.add_parser("export", help="player results as CSV or JSON")
+    out.add_argument("--format", choices=("csv", "json"), default="csv")
+    out.add_argument("--player", help="only this player's results")
+    out.add_argument("-o", "--output", help="file to write (default: stdout)")
+    args = parser.parse_args()
+
+    conn = connect(args.db)
+    try:
+        if args.command == "history":
+            summary = player_summary(conn, args.player)
+            print(f"{args.player}: {summary['matches']} matches, {summary['wins'] or 0} wins, "
+                  f"{summary['score'] or 0} points, {summary['locks_broken'] or 0} locks, best {summary['best_wpm'] or '-'} WPM")
+            for match_id, _, reason, _, place, players, score, locks, avg, best in player_history(conn, args.player, args.limit):
+                print(f"  #{match_id:<6} {place}/{players}  {score:>4} pts  {locks:>2} locks  "
+                      f"avg {avg if avg is not None else '-':>5}  best {best if best is not None else '-':>5}  ({reason})")
+        elif args.output:
+            with open(args.output, "w", newline="", encoding="utf-8") as f:
+                export(conn, f, args.format, args.player)
+        else:
+            export(conn, sys.stdout, args.format, args.player)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
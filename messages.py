@@ -7,13 +7,20 @@
 # Message types:
 MSG_CLAIM_REQ = "claim_request"             # client claim request (lock_id, user_name)
 MSG_BREAK_REQ = "break_request"             # client break lock request (lock_id, user_string, wpm)
-MSG_GRID_UPDATE = "grid_update"             # broadcast all clients lock object (lock object, player dict)
-MSG_MOUSE_COORDS = "mouse_coords"           # client sends mouse coordinates to server
+MSG_GRID_UPDATE = "grid_update"             # layout (seed, corpus version, checksum), changed locks (or whole state on join/resync),
+                                            # players and the room state hash; full locks only on request
+MSG_GRID_REQ = "grid_request"               # client asks for a resync: full (lock strings too) or just the state on a hash mismatch
+MSG_MOUSE_COORDS = "mouse_coords"           # client sends quantized grid-relative cursor (x, y) or null when off-grid
+MSG_PRESENCE = "presence"                   # server batches changed cursors of a room once per tick (cursors dict)
+MSG_TYPING_PROGRESS = "typing_progress"     # client: lock_id, d (correct-prefix delta), w (wpm, only when changed)
+                                            # server: per-tick batch of changed locks {lock_id: [prefix, wpm] or null}
 MSG_LOBBY_UPDATE = "lobby_update"           # server broadcasts player list and host
 MSG_START_REQ = "start_game_request"        # client requests game start (host only)
 MSG_START_GAME = "start_game"               # server announces synchronized game start
 MSG_JOIN = "join"                           # client announces desired user_id/icon on connect
 MSG_JOIN_ACK = "join_ack"                   # server acknowledges and returns the accepted user_id
+MSG_LEADERBOARD = "leaderboard"             # server: top [[player_id, score, locks_broken, room], ...], your rank, total players
+MSG_LEADERBOARD_REQ = "leaderboard_request" # client asks for the top n (capped by the server)
 
 # Server result/ack types:
 MSG_CLAIM_RES = "claim_result"              # server response to claim request
@@ -22,3 +29,10 @@ MSG_BREAK_RES = "break_result"              # server response to break request
 # Unclaim flow (client cancels a claim)
 MSG_UNCLAIM_REQ = "unclaim_request"         # client requests to release a claimed lock
 MSG_UNCLAIM_RES = "unclaim_result"          # server response to unclaim request
+
+# Latency probe (performance HUD)
+MSG_PING = "ping"                           # client sends its own timestamp t
+MSG_PONG = "pong"                           # server echoes t straight back to the sender
+
+# Local-only (never sent over the wire)
+MSG_NET_ERROR = "net_error"                 # networking layer reports a failed send to the UI
@@ -2,33 +2,75 @@
 
 
 import socket
+import time
 import threading
 import json
-from collections import deque
+from collections import defaultdict, deque
 from messages import *
+from game import Grid, Lock
+from state_hash import StateHash
+from config import GRID_ROWS, GRID_COLS
 from utils import normalize_text_for_match
 
 
+# ready-to-render server state, built on the listener thread and handed to the UI by reference swap
+class StateSnapshot:
+    def __init__(self, version, grid, players, your_id=None):
+        self.version = version
+        self.grid = grid
+        self.players = players
+        self.your_id = your_id
+
+
 # using TCP
 class ClientNetwork:
-    def __init__(self, user_id, server_ip='127.0.0.1', server_port=5555):
+    def __init__(self, user_id, server_ip='127.0.0.1', server_port=5555, spectator=False):
         
         # multithreading
         self.user_id = user_id
+        self.spectator = spectator                                              # watch only: the server ignores gameplay requests
         self.sock = socket.socket()
         self.addr = (server_ip, server_port)
-        self.packet_stack = deque()
+        self.packet_stack = defaultdict(deque)                                  # msg_type -> queue of packets
         self.lock = threading.Lock()
+        self.snapshot = None                                                    # latest StateSnapshot (written by listener only)
+        self._snapshot_version = 0
+        self._taken_version = 0
+        self.presence = {}                                                      # player_id -> (x, y) cursor, replaced wholesale per frame
+        self.progress = {}                                                      # lock_id -> (correct_prefix_len, wpm), same treatment
+        self.leaderboard = None                                                 # latest MSG_LEADERBOARD (top, rank, total), replaced wholesale
+        self.send_queue = deque()                                               # encoded lines waiting for the writer thread
+        self.send_event = threading.Event()
+        self.send_error = None
+        self.next_req_id = 1                                                    # ids for claim/unclaim requests, echoed back by the server
+        self.on_packet = None                                                   # called on the listener thread after each inbound message
+        self.packets_received = 0                                               # running count, read by the performance HUD
+        self.rtt_ms = None                                                      # last ping round trip, timed on the listener thread
+        self.base_key = None                                                    # (seed, corpus, checksum) of the layout in base_locks
+        self.base_locks = None                                                  # lock dicts of that layout, rebuilt locally or downloaded
+        self.grid_requested = None                                              # layout key a full grid was asked for
+        self.lock_state = {}                                                    # lock_id -> [claimed_by, broken_by], server state as applied
+        self.room_hash = StateHash()                                            # rolling hash of lock_state, checked against the server's
+        self.resync_pending = False
+        self.resyncs = 0                                                        # state resyncs after a hash mismatch (performance HUD)
         self.running = True
+        self.closing = False                                                    # close() asked the writer to drain and stop
+        self.writer = threading.Thread(target=self._write, daemon=True)
         
         # connection attempt
         try:
             print(f"[networking] Connecting to {self.addr}")
             self.sock.connect(self.addr)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)   # small game messages, don't wait on Nagle
             threading.Thread(target=self._listen, daemon=True).start()
+            self.writer.start()
             # Introduce ourselves with desired id/icon so server can align names
             try:
-                self._send(MSG_JOIN)
+                if spectator:
+                    self._send(MSG_JOIN, spectator=True)
+                else:
+                    self._send(MSG_JOIN)
+                self.flush()
             except Exception:
                 pass
         except Exception as e:
@@ -42,8 +84,11 @@ class ClientNetwork:
             try:
                 # convert bytes to string
                 data = self.sock.recv(1500).decode()
-                if not data:                                                            # empty string
-                    continue
+                if not data:                                                            # server closed the connection
+                    self.running = False
+                    self._push({"type": MSG_NET_ERROR, "error": "connection closed"})
+                    self._notify()
+                    break
                 buf += data
 
                 # split string by new line
@@ -54,43 +99,230 @@ class ClientNetwork:
                         msg = json.loads(line.strip())
                         # DEBUG: log inbound messages once we've parsed them
                         try:
-                            print("[CLIENT] RECV", msg)
+                            if msg.get("type") not in (MSG_PRESENCE, MSG_TYPING_PROGRESS, MSG_PONG):   # these arrive every tick
+                                print("[CLIENT] RECV", msg)
                         except Exception:
                             pass
-                        
-                        with self.lock:                                                 # lock thread before writing
-                            self.packet_stack.append(msg)           
+
+                        self.packets_received += 1
+                        self._materialize(msg)
                     except:
                         continue
+                self._notify()
             except:
                 self.running = False
     
-    # helper to send messages as JSON encoded to byte format, '\n' as delimiter
+    # socket writer: drains everything queued since the last flush into a single sendall
+    # so the UI thread never blocks on the socket
+    def _write(self):
+        while self.running:
+            if not self.closing:
+                self.send_event.wait(0.05)                                      # flush() wakes us; timeout catches stragglers
+            self.send_event.clear()
+            chunks = []
+            while self.send_queue:
+                chunks.append(self.send_queue.popleft())
+            if not chunks:
+                if self.closing:
+                    return
+                continue
+            try:
+                self.sock.sendall(b"".join(chunks))
+            except OSError as e:
+                if not self.running:                                            # socket closed on purpose
+                    return
+                print(f"[networking] Send failed: {e}")
+                self.send_error = e
+                self.running = False
+                self._push({"type": MSG_NET_ERROR, "error": str(e)})
+                self._notify()
+
+    # helper to queue messages as JSON encoded to byte format, '\n' as delimiter
+    # nothing touches the socket here; the writer thread sends on the next flush()
     def _send(self, msg_type, **kwargs):
         msg = {"type": msg_type, "user_id": self.user_id, **kwargs}
-        
-        # temporary until server is made
-        try:
-            self.sock.sendall((json.dumps(msg) + '\n').encode())
-        except:
-            pass
+        self.send_queue.append((json.dumps(msg) + '\n').encode())
+
+    # hand everything queued this frame to the writer thread as one batch
+    def flush(self):
+        if self.send_queue:
+            self.send_event.set()
     
+    # turn a parsed packet into render-ready objects while still on the listener thread
+    # full grid updates replace the published snapshot, everything else is queued by type
+    def _materialize(self, msg):
+        msg_type = msg.get("type")
+        if msg_type == MSG_GRID_UPDATE:
+            grid = self._grid_from(msg)
+            if grid is None:                                                    # full grid requested, wait for it
+                return
+            self._snapshot_version += 1
+            self.snapshot = StateSnapshot(self._snapshot_version, grid, msg.get("players", {}), msg.get("your_id"))
+            return
+
+        if msg_type == MSG_PONG:
+            try:
+                self.rtt_ms = (time.perf_counter() - float(msg["t"])) * 1000
+            except (KeyError, TypeError, ValueError):
+                pass
+            return
+
+        if msg_type == MSG_PRESENCE:
+            # merge the delta into a fresh dict and swap it in; the UI only ever reads whole dicts
+            presence = dict(self.presence)
+            for pid, cursor in msg.get("cursors", {}).items():
+                if cursor is None:
+                    presence.pop(pid, None)
+                else:
+                    presence[pid] = tuple(cursor)
+            self.presence = presence
+            return
+
+        if msg_type == MSG_TYPING_PROGRESS:
+            progress = dict(self.progress)
+            for lock_id, entry in msg.get("locks", {}).items():
+                if entry is None:
+                    progress.pop(int(lock_id), None)
+                else:
+                    progress[int(lock_id)] = tuple(entry)
+            self.progress = progress
+            return
+
+        if msg_type == MSG_LEADERBOARD:
+            self.leaderboard = msg
+            return
+
+        if isinstance(msg.get("lock"), dict):                                   # claim/break/unclaim results
+            msg["lock"] = Lock.from_dict(msg["lock"])
+        self._push(msg)
+
+    # grid of an update: the layout comes from the message when it carries full locks,
+    # otherwise it is rebuilt locally from the seed (once per layout) and the lock state applied on top
+    def _grid_from(self, msg):
+        self._apply_lock_state(msg)
+        layout = msg.get("layout") or {}
+        key = (layout.get("seed"), layout.get("corpus"), layout.get("checksum"))
+        rows = layout.get("rows", GRID_ROWS)
+        cols = layout.get("cols", GRID_COLS)
+        if "grid" in msg:
+            self.base_key = key
+            self.base_locks = msg["grid"]
+            grid = Grid.from_dict(msg["grid"], rows, cols)
+            grid.apply_state(self.lock_state)
+            return grid
+
+        if key != self.base_key:
+            base = self._rebuild_layout(layout)
+            if base is None:
+                if self.grid_requested != key:
+                    print("[networking] Grid layout not available locally, requesting full grid")
+                    self.grid_requested = key
+                    self._send(MSG_GRID_REQ, full=True)
+                    self.flush()
+                return None
+            self.base_key = key
+            self.base_locks = base
+        grid = Grid.from_dict(self.base_locks, rows, cols)
+        grid.apply_state(self.lock_state)
+        return grid
+
+    # whole state on join/resync, otherwise the changed locks; then compare the room hash with the server's
+    def _apply_lock_state(self, msg):
+        if "state" in msg:
+            self.lock_state = {int(lock_id): entry for lock_id, entry in msg["state"].items()}
+            self.room_hash.reset(self.lock_state)
+            self.resync_pending = False
+        else:
+            for lock_id, (claimed_by, broken_by) in msg.get("locks", {}).items():
+                lock_id = int(lock_id)
+                if claimed_by is None and broken_by is None:
+                    self.lock_state.pop(lock_id, None)
+                else:
+                    self.lock_state[lock_id] = [claimed_by, broken_by]
+                self.room_hash.set_lock(lock_id, claimed_by, broken_by)
+
+        expected = msg.get("hash")
+        if expected and not self.resync_pending and self.room_hash.room_digest(msg.get("players", {})) != expected:
+            print("[networking] Room state hash mismatch, requesting resync")
+            self.resync_pending = True
+            self.resyncs += 1
+            self._send(MSG_GRID_REQ, full=False)
+            self.flush()
+
+    # lock dicts generated from the layout's seed, or None when this client cannot reproduce it
+    # (no NumPy/corpus data, corpus still loading, a different corpus version, or a checksum mismatch)
+    def _rebuild_layout(self, layout):
+        try:
+            from corpus import corpus_ready                                     # needs NumPy
+            if not corpus_ready():                                              # never load it on the listener thread
+                return None
+            grid = Grid(layout["rows"], layout["cols"])
+            grid.generate_locks(layout["seed"], layout["mix"])
+        except Exception as e:
+            print(f"[networking] Cannot rebuild grid locally: {e}")
+            return None
+        if grid.corpus_version != layout.get("corpus") or grid.checksum != layout.get("checksum"):
+            return None
+        return grid.to_dict()
+
+    # lets the UI wake up from an idle wait as soon as something arrives
+    def _notify(self):
+        callback = self.on_packet
+        if callback is not None:
+            try:
+                callback()
+            except Exception:
+                pass
+
     # push to stack only after locking thread
     def _push(self, msg):
         with self.lock:
-            self.packet_stack.append(msg)
+            self.packet_stack[msg.get("type")].append(msg)
 
+    # returns the request id the server will echo in MSG_CLAIM_RES
     def send_claim(self, lock_id):
-        self._send(MSG_CLAIM_REQ, lock_id=lock_id)
+        req_id = self._new_req_id()
+        self._send(MSG_CLAIM_REQ, lock_id=lock_id, req_id=req_id)
+        return req_id
     
-    # should be modified to send start time, stop time and number of char inputs for server side wpm verification
-    def send_break(self, lock_id, user_string, user_wpm):
+    # trace: KeystrokeTrace.encode() of the attempt; the server derives the WPM it scores from it
+    def send_break(self, lock_id, user_string, user_wpm, trace=None):
         # Normalize before sending to reduce mismatches end-to-end
         safe_string = normalize_text_for_match(user_string)
-        self._send(MSG_BREAK_REQ, lock_id=lock_id, user_string=safe_string, user_wpm=user_wpm)
+        self._send(MSG_BREAK_REQ, lock_id=lock_id, user_string=safe_string, user_wpm=user_wpm, trace=trace)
 
+    # returns the request id the server will echo in MSG_UNCLAIM_RES
     def send_unclaim(self, lock_id):
-        self._send(MSG_UNCLAIM_REQ, lock_id=lock_id)
+        req_id = self._new_req_id()
+        self._send(MSG_UNCLAIM_REQ, lock_id=lock_id, req_id=req_id)
+        return req_id
+
+    def _new_req_id(self):
+        req_id = self.next_req_id
+        self.next_req_id += 1
+        return req_id
+
+    # quantized grid-relative cursor position, or None when the pointer is off the grid
+    def send_cursor(self, cursor):
+        if cursor is None:
+            self._send(MSG_MOUSE_COORDS, x=None, y=None)
+        else:
+            self._send(MSG_MOUSE_COORDS, x=cursor[0], y=cursor[1])
+
+    # delta-encoded typing progress: change in correct-prefix length, wpm only when it changed
+    def send_progress(self, lock_id, prefix_delta, wpm=None):
+        if wpm is None:
+            self._send(MSG_TYPING_PROGRESS, lock_id=lock_id, d=prefix_delta)
+        else:
+            self._send(MSG_TYPING_PROGRESS, lock_id=lock_id, d=prefix_delta, w=wpm)
+
+    # round-trip probe; the server echoes t and the listener turns it into rtt_ms
+    def send_ping(self):
+        self._send(MSG_PING, t=time.perf_counter())
+
+    # the server answers with MSG_LEADERBOARD holding up to n entries
+    def request_leaderboard(self, n):
+        self._send(MSG_LEADERBOARD_REQ, n=n)
 
     def send_start_game(self):
         self._send(MSG_START_REQ)
@@ -98,22 +330,38 @@ class ClientNetwork:
     def send_join(self, icon="★"):
         self._send(MSG_JOIN, icon=icon)
 
+    # packets parsed but not yet taken by the UI, and encoded lines not yet written
+    def queue_depth(self):
+        with self.lock:
+            inbound = sum(len(q) for q in self.packet_stack.values())
+        return inbound, len(self.send_queue)
+
     def get_packet(self, msg_type):
-        # Scan the queue without losing order; return the first matching packet
+        # Packets are queued per type, so popping the oldest match is O(1)
         with self.lock:
-            found = None
-            size = len(self.packet_stack)
-            for _ in range(size):
-                pkt = self.packet_stack.popleft()
-                if found is None and pkt.get("type") == msg_type:
-                    found = pkt
-                    # do not append back; effectively remove it
-                else:
-                    self.packet_stack.append(pkt)
-            return found
+            queue = self.packet_stack.get(msg_type)
+            return queue.popleft() if queue else None
+
+    # newest server state the UI has not picked up yet, or None
+    # only the UI thread calls this; reading self.snapshot is a single atomic reference read
+    def take_snapshot(self):
+        snap = self.snapshot
+        if snap is None or snap.version == self._taken_version:
+            return None
+        self._taken_version = snap.version
+        return snap
 
     def close(self):
+        # let the writer deliver the last batch (an unclaim, the final input) before the socket goes
+        self.closing = True
+        self.send_event.set()
+        if self.writer.is_alive() and threading.current_thread() is not self.writer:
+            self.writer.join(1.0)
         self.running = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)                                # wakes the listener and tells the server we left
+        except:
+            pass
         try:
             self.sock.close()
         except:
@@ -0,0 +1,67 @@
+# perf_stats.py
+
+# Client performance counters shown by the F3 debug overlay.
+# Always collected: a few integer increments and one perf_counter per frame.
+
+import time
+from collections import deque
+from config import PERF_HISTORY
+
+# Upper edges (ms) of the frame-time histogram buckets; the last bucket is open-ended
+FRAME_BUCKETS_MS = (2, 4, 8, 16.7, 33.3)
+
+
+class PerfStats:
+    def __init__(self, history=PERF_HISTORY):
+        self.frame_ms = deque(maxlen=history)       # work time of recent frames (idle wait excluded)
+        self.frame_gaps = deque(maxlen=history)     # start-to-start time of recent frames, for FPS
+        self.packets = deque(maxlen=history)        # packets received during recent frames
+        self.frame_start = None
+        self.draws = 0                              # counted during the current frame
+        self.blits = 0
+        self.last_draws = 0                         # totals of the last finished frame
+        self.last_blits = 0
+        self._packets_seen = 0
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            self.frame_gaps.append((now - self.frame_start) * 1000)
+        self.frame_start = now
+        self.draws = 0
+        self.blits = 0
+
+    def end_frame(self, packets_received):
+        if self.frame_start is None:
+            return
+        self.frame_ms.append((time.perf_counter() - self.frame_start) * 1000)
+        self.last_draws = self.draws
+        self.last_blits = self.blits
+        self.packets.append(packets_received - self._packets_seen)
+        self._packets_seen = packets_received
+
+    def fps(self):
+        if not self.frame_gaps:
+            return 0.0
+        return 1000 * len(self.frame_gaps) / sum(self.frame_gaps)
+
+    def frame_percentile(self, pct):
+        if not self.frame_ms:
+            return 0.0
+        ordered = sorted(self.frame_ms)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+    def packets_per_frame(self):
+        if not self.packets:
+            return 0.0
+        return sum(self.packets) / len(self.packets)
+
+    def histogram(self):
+        # Frame counts per FRAME_BUCKETS_MS bucket over the rolling window
+        counts = [0] * (len(FRAME_BUCKETS_MS) + 1)
+        for ms in self.frame_ms:
+            i = 0
+            while i < len(FRAME_BUCKETS_MS) and ms > FRAME_BUCKETS_MS[i]:
+                i += 1
+            counts[i] += 1
+        return counts
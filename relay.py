@@ -0,0 +1,208 @@
+# relay.py
+
+# Spectator relay: joins a game server once as a spectator and fans its feed out to any
+# number of viewers, so watchers cost the game server one connection in total.
+# Upstream frames are forwarded as the same bytes to every viewer (fanout.Fanout); the relay
+# also mirrors the room state so a viewer connecting mid-match gets a full picture at once.
+#
+#   python relay.py <server_ip> <server_port> [listen_port]
+#   python client.py --spectate <name> <relay_ip> <listen_port>
+
+import json
+import selectors
+import socket
+import sys
+from fanout import Fanout
+from config import RELAY_PORT
+from messages import *
+
+# upstream messages that describe the room (forwarded); anything else was a reply to the relay itself
+ROOM_MESSAGES = (MSG_GRID_UPDATE, MSG_PRESENCE, MSG_TYPING_PROGRESS, MSG_LOBBY_UPDATE, MSG_START_GAME)
+
+
+def encode(data):
+    return (json.dumps(data) + '\n').encode()
+
+
+# Latest room state, rebuilt from the upstream feed
+class RoomMirror:
+    def __init__(self):
+        self.layout = None
+        self.grid = None                # full lock dicts, for viewers that cannot rebuild the layout
+        self.lock_state = {}            # lock_id (str, as in JSON) -> [claimed_by, broken_by]
+        self.players = {}
+        self.hash = None
+        self.cursors = {}
+        self.progress = {}
+        self.lobby = None
+
+    def apply(self, msg):
+        msg_type = msg.get("type")
+        if msg_type == MSG_GRID_UPDATE:
+            self.layout = msg.get("layout", self.layout)
+            if "grid" in msg:
+                self.grid = msg["grid"]
+            if "state" in msg:
+                self.lock_state = dict(msg["state"])
+            for lock_id, entry in msg.get("locks", {}).items():
+                if entry[0] is None and entry[1] is None:
+                    self.lock_state.pop(lock_id, None)
+                else:
+                    self.lock_state[lock_id] = entry
+            self.players = msg.get("players", self.players)
+            self.hash = msg.get("hash", self.hash)
+        elif msg_type == MSG_PRESENCE:
+            for pid, cursor in msg.get("cursors", {}).items():
+                if cursor is None:
+                    self.cursors.pop(pid, None)
+                else:
+                    self.cursors[pid] = cursor
+        elif msg_type == MSG_TYPING_PROGRESS:
+            for lock_id, entry in msg.get("locks", {}).items():
+                if entry is None:
+                    self.progress.pop(lock_id, None)
+                else:
+                    self.progress[lock_id] = entry
+        elif msg_type == MSG_LOBBY_UPDATE:
+            self.lobby = msg
+
+    def grid_message(self, full=False, **extra):
+        message = {
+            "type": MSG_GRID_UPDATE,
+            "layout": self.layout,
+            "players": self.players,
+            "hash": self.hash,
+            "state": self.lock_state,
+            **extra,
+        }
+        if full and self.grid is not None:
+            message["grid"] = self.grid
+        return message
+
+    # what the game server sends a new spectator, from the mirror
+    def welcome(self, name):
+        frames = [
+            self.grid_message(your_id=name, spectator=True),
+            {"type": MSG_JOIN_ACK, "user_id": name, "spectator": True},
+        ]
+        if self.lobby is not None:
+            frames.append(self.lobby)
+        frames.append({"type": MSG_PRESENCE, "cursors": self.cursors})
+        frames.append({"type": MSG_TYPING_PROGRESS, "locks": self.progress})
+        return b"".join(encode(frame) for frame in frames)
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python relay.py <server_ip> <server_port> [listen_port]")
+        sys.exit(1)
+    upstream_addr = (sys.argv[1], int(sys.argv[2]))
+    listen_port = int(sys.argv[3]) if len(sys.argv) > 3 else RELAY_PORT
+
+    upstream = socket.create_connection(upstream_addr)
+    upstream.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    # join as a spectator and fetch the full grid once, for viewers that cannot rebuild it
+    upstream.sendall(encode({"type": MSG_JOIN, "user_id": "relay", "spectator": True})
+                     + encode({"type": MSG_GRID_REQ, "user_id": "relay", "full": True}))
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('0.0.0.0', listen_port))
+    listener.listen(512)
+    print(f"[RELAY] {upstream_addr[0]}:{upstream_addr[1]} -> 0.0.0.0:{listen_port}")
+
+    mirror = RoomMirror()
+    viewers = Fanout()
+    buffers = {}                        # viewer socket -> partial line
+    upstream_buf = b""
+    # epoll/kqueue where available: select() cannot watch thousands of sockets
+    selector = selectors.DefaultSelector()
+    selector.register(upstream, selectors.EVENT_READ)
+    selector.register(listener, selectors.EVENT_READ)
+    writing = set()                     # viewers registered for write readiness
+
+    def drop(sock):
+        if sock in buffers:
+            selector.unregister(sock)
+            del buffers[sock]
+        viewers.remove(sock)
+        writing.discard(sock)
+        sock.close()
+
+    while True:
+        events = selector.select(1.0)
+        for key, _ in events:
+            sock = key.fileobj
+            if sock not in buffers and sock is not upstream and sock is not listener:
+                continue                                                # dropped earlier in this pass
+            if sock is upstream:
+                data = upstream.recv(65536)
+                if not data:
+                    print("[RELAY] upstream closed")
+                    return
+                upstream_buf += data
+                lines = upstream_buf.split(b"\n")
+                upstream_buf = lines.pop()
+                forward = []
+                for line in lines:
+                    if not line.strip():
+                        continue
+                    msg = json.loads(line)
+                    mirror.apply(msg)
+                    if msg.get("type") in ROOM_MESSAGES and "your_id" not in msg and "grid" not in msg:
+                        forward.append(line + b"\n")
+                viewers.publish(b"".join(forward))          # one shared frame per upstream read
+
+            elif sock is listener:
+                client, _ = listener.accept()
+                client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                client.setblocking(False)
+                buffers[client] = b""
+                selector.register(client, selectors.EVENT_READ)
+
+            else:
+                try:
+                    data = sock.recv(4096)
+                except (BlockingIOError, InterruptedError):
+                    continue
+                except OSError:
+                    data = b""
+                if not data:
+                    drop(sock)
+                    continue
+                buffers[sock] += data
+                lines = buffers[sock].split(b"\n")
+                buffers[sock] = lines.pop()
+                for line in lines:
+                    try:
+                        msg = json.loads(line)
+                    except ValueError:
+                        continue
+                    msg_type = msg.get("type")
+                    if msg_type == MSG_JOIN and sock not in viewers:
+                        name = msg.get("user_id") or f"Spectator{len(viewers) + 1}"
+                        viewers.add(sock, name)
+                        viewers.send_to(sock, mirror.welcome(name))
+                    elif sock not in viewers:
+                        continue
+                    elif msg_type == MSG_PING:
+                        viewers.send_to(sock, encode({"type": MSG_PONG, "t": msg.get("t")}))
+                    elif msg_type == MSG_GRID_REQ:
+                        viewers.send_to(sock, encode(mirror.grid_message(full=msg.get("full", True))))
+                    # everything else would be a gameplay request; viewers only watch
+
+        viewers.flush()
+        for sock in viewers.dropped:
+            drop(sock)
+        viewers.dropped.clear()
+        # wake on write readiness only for viewers that still have data queued
+        pending = set(viewers.writers())
+        for sock in pending - writing:
+            selector.modify(sock, selectors.EVENT_READ | selectors.EVENT_WRITE)
+        for sock in writing - pending:
+            selector.modify(sock, selectors.EVENT_READ)
+        writing = pending
+
+
+if __name__ == "__main__":
+    main()
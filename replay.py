@@ -0,0 +1,293 @@
+# replay.py
+
+# Match replay files: the server records what it broadcasts to a room, plus a full Grid
+# keyframe every REPLAY_KEYFRAME_SECONDS, and closes the file with an index of keyframe
+# offsets. A reader memory-maps the file; seeking loads the nearest keyframe at or before
+# the target time and applies only the messages recorded after it.
+#
+# Layout (little-endian):
+#   MAGIC, u32 header length, header JSON (game time, countdown, grid size, layout, start time)
+#   records: f64 t (seconds since recording started), u32 payload length, u8 kind, payload JSON
+#   index:   (f64 t, u64 offset) per keyframe
+#   trailer: u64 index offset, u32 keyframe count, INDEX_MAGIC
+# A file without a trailer (server stopped mid-match) is still readable: the index is
+# rebuilt by scanning the records, up to the last complete one.
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import time
+from game import Grid
+from messages import MSG_GRID_UPDATE, MSG_PRESENCE, MSG_TYPING_PROGRESS
+from config import REPLAY_KEYFRAME_SECONDS, GAME_TIME
+
+MAGIC = b"COTREPL1"
+INDEX_MAGIC = b"COTRIDX1"
+HEADER = struct.Struct("<I")
+RECORD = struct.Struct("<dIB")
+INDEX_ENTRY = struct.Struct("<dQ")
+TRAILER = struct.Struct("<QI8s")
+
+REC_MESSAGE = 1                 # a message as broadcast to the room
+REC_KEYFRAME = 2                # full room state: grid locks, players, cursors, typing progress
+
+
+def _encode(data):
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+
+class ReplayWriter:
+    def __init__(self, path, header, keyframe_interval=REPLAY_KEYFRAME_SECONDS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb", buffering=1 << 16)
+        self.start = time.monotonic()
+        self.keyframe_interval = keyframe_interval
+        self.next_keyframe = 0.0
+        self.index = []                                 # (t, offset) of each keyframe
+        blob = _encode(header)
+        self.file.write(MAGIC + HEADER.pack(len(blob)) + blob)
+
+    def _now(self):
+        return time.monotonic() - self.start
+
+    def _write(self, kind, data, t):
+        payload = _encode(data)
+        offset = self.file.tell()
+        self.file.write(RECORD.pack(t, len(payload), kind) + payload)
+        return offset
+
+    def message(self, msg):
+        self._write(REC_MESSAGE, msg, self._now())
+
+    def keyframe_due(self):
+        return self._now() >= self.next_keyframe
+
+    # grid: the room's Grid; cursors/progress as kept by the server
+    def keyframe(self, grid, players, cursors, progress):
+        t = self._now()
+        state = {
+            "grid": grid.to_dict(),
+            "players": players,
+            "cursors": {pid: cursor for pid, cursor in cursors.items() if cursor is not None},
+            "progress": progress,
+        }
+        self.index.append((t, self._write(REC_KEYFRAME, state, t)))
+        self.next_keyframe = t + self.keyframe_interval
+
+    def close(self):
+        if self.file.closed:
+            return
+        index_offset = self.file.tell()
+        for t, offset in self.index:
+            self.file.write(INDEX_ENTRY.pack(t, offset))
+        self.file.write(TRAILER.pack(index_offset, len(self.index), INDEX_MAGIC))
+        self.file.close()
+
+
+class ReplayReader:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.map[:len(MAGIC)] != MAGIC:
+            self.map.close()
+            raise ValueError(f"{path} is not a replay file")
+        (header_len,) = HEADER.unpack_from(self.map, len(MAGIC))
+        start = len(MAGIC) + HEADER.size
+        self.header = json.loads(self.map[start:start + header_len])
+        self.records_start = start + header_len
+        self.records_end, self.keyframe_times, self.keyframe_offsets = self._load_index()
+        self.duration = self._last_time()
+
+    def close(self):
+        self.map.close()
+
+    def _load_index(self):
+        size = len(self.map)
+        if size >= self.records_start + TRAILER.size:
+            index_offset, count, magic = TRAILER.unpack_from(self.map, size - TRAILER.size)
+            if magic == INDEX_MAGIC and index_offset + count * INDEX_ENTRY.size + TRAILER.size == size:
+                entries = [INDEX_ENTRY.unpack_from(self.map, index_offset + i * INDEX_ENTRY.size) for i in range(count)]
+                return index_offset, [t for t, _ in entries], [offset for _, offset in entries]
+
+        # No trailer: scan the records once
+        times, offsets = [], []
+        offset = self.records_start
+        while offset + RECORD.size <= size:
+            t, length, kind = RECORD.unpack_from(self.map, offset)
+            if offset + RECORD.size + length > size:
+                break                                                   # cut off mid-record
+            if kind == REC_KEYFRAME:
+                times.append(t)
+                offsets.append(offset)
+            offset += RECORD.size + length
+        return offset, times, offsets
+
+    def _last_time(self):
+        if not self.keyframe_offsets:
+            return 0.0
+        t = 0.0
+        for t, _, _ in self.records(self.keyframe_offsets[-1]):
+            pass
+        return t
+
+    # (t, kind, offset of the next record) for each record from offset on, payload left undecoded
+    def records(self, offset):
+        while offset < self.records_end:
+            t, length, kind = RECORD.unpack_from(self.map, offset)
+            offset += RECORD.size + length
+            yield t, kind, offset
+
+    def payload(self, offset):
+        _, length, _ = RECORD.unpack_from(self.map, offset)
+        start = offset + RECORD.size
+        return json.loads(self.map[start:start + length])
+
+    # offset of the last keyframe at or before t (the first one when t precedes it)
+    def keyframe_at(self, t):
+        i = bisect.bisect_right(self.keyframe_times, t) - 1
+        return self.keyframe_offsets[max(i, 0)]
+
+
+class ReplayPlayer:
+    """
+    Room state at a point of a replay, with a playback clock. seek() jumps anywhere via the
+    keyframe index; advance() moves forward applying only the records in between.
+    """
+
+    def __init__(self, reader, speed=1.0):
+        if not reader.keyframe_offsets:
+            raise ValueError(f"{reader.path} has no keyframes")
+        self.reader = reader
+        self.speed = speed
+        self.playing = True
+        header = reader.header
+        self.rows = header.get("rows")
+        self.cols = header.get("cols")
+        self.countdown = header.get("countdown", 0)
+        self.game_time = header.get("game_time", GAME_TIME)
+        self.time = 0.0
+        self.offset = None                              # next record to apply
+        self.grid = None
+        self.players = {}
+        self.presence = {}
+        self.progress = {}
+        self.seek(0.0)
+
+    @property
+    def duration(self):
+        return self.reader.duration
+
+    # whole seconds left on the match clock at the current replay time
+    def remaining_seconds(self):
+        elapsed = int(max(0.0, self.time - self.countdown))
+        return max(0, self.game_time - elapsed)
+
+    def seek(self, t):
+        t = min(max(t, 0.0), self.duration)
+        offset = self.reader.keyframe_at(t)
+        self._load_keyframe(self.reader.payload(offset))
+        self.offset = next(self.reader.records(offset))[2]
+        self.time = t
+        self._apply_until(t)
+
+    # advance the clock by dt wall seconds at the current speed
+    def advance(self, dt):
+        if not self.playing:
+            return
+        self.time = min(self.time + dt * self.speed, self.duration)
+        self._apply_until(self.time)
+        if self.time >= self.duration:
+            self.playing = False
+
+    # wall seconds until the next recorded change, None when there is none (or paused)
+    def next_change_in(self):
+        if not self.playing:
+            return None
+        for t, _, _ in self.reader.records(self.offset):
+            return max(0.0, (t - self.time) / self.speed)
+        return None
+
+    def _apply_until(self, t):
+        reader = self.reader
+        for record_t, kind, next_offset in reader.records(self.offset):
+            if record_t > t:
+                break
+            if kind == REC_MESSAGE:
+                self._apply(reader.payload(self.offset))
+            self.offset = next_offset
+
+    def _load_keyframe(self, state):
+        self.grid = Grid.from_dict(state["grid"], self.rows, self.cols)
+        self.players = state["players"]
+        self.presence = {pid: tuple(cursor) for pid, cursor in state["cursors"].items()}
+        self.progress = {int(lock_id): tuple(entry) for lock_id, entry in state["progress"].items()}
+
+    def _apply(self, msg):
+        msg_type = msg.get("type")
+        if msg_type == MSG_GRID_UPDATE:
+            if "state" in msg:
+                self.grid.apply_state(msg["state"])
+            for lock_id, (claimed_by, broken_by) in msg.get("locks", {}).items():
+                lock_id = int(lock_id)
+                if not 0 <= lock_id < len(self.grid.grid):
+                    continue
+                lock = self.grid.get_lock(lock_id)
+                lock.claimed_by_user = claimed_by
+                if broken_by is not None and not lock.broken:
+                    lock.broken = True
+                    lock.broken_by_user = broken_by
+                    lock.points = 0
+                    self.grid.remaining_locks -= 1
+            self.players = msg.get("players", self.players)
+        elif msg_type == MSG_PRESENCE:
+            presence = dict(self.presence)                              # the UI holds the old dict, as with ClientNetwork
+            for pid, cursor in msg.get("cursors", {}).items():
+                if cursor is None:
+                    presence.pop(pid, None)
+                else:
+                    presence[pid] = tuple(cursor)
+            self.presence = presence
+        elif msg_type == MSG_TYPING_PROGRESS:
+            progress = dict(self.progress)
+            for lock_id, entry in msg.get("locks", {}).items():
+                if entry is None:
+                    progress.pop(int(lock_id), None)
+                else:
+                    progress[int(lock_id)] = tuple(entry)
+            self.progress = progress
+
+
+# Stand-in for ClientNetwork while GameUI shows a replay: nothing is sent anywhere
+class ReplayNetwork:
+    def __init__(self, player):
+        self.player = player
+        self.packets_received = 0
+        self.rtt_ms = None
+        self.resyncs = 0
+        self.leaderboard = None
+        self.spectator = True
+        self.on_packet = None
+
+    @property
+    def presence(self):
+        return self.player.presence
+
+    @property
+    def progress(self):
+        return self.player.progress
+
+    def send_ping(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def queue_depth(self):
+        return (0, 0)
+
+    def get_packet(self, msg_type):
+        return None
@@ -3,17 +3,31 @@
 # Game server that handles connections, lock states, scores
 # Author: Arun
 
+import atexit
+import os
 import socket
 import select
+import random
 import json
+import time
 from game import Grid
-from config import GRID_ROWS, GRID_COLS, GAME_TIME
+from typing_proof import verify_traces
+from state_hash import StateHash
+from leaderboard import Leaderboard
+from match_history import HistoryWriter, match_record
+from replay import ReplayWriter
+from fanout import Fanout
+from config import (
+    GRID_ROWS, GRID_COLS, GAME_TIME, SERVER_TICK_RATE, LEADERBOARD_TOP, LEADERBOARD_MAX,
+    REPLAY_RECORD, REPLAY_DIR, SPECTATOR_TICK_RATE, SPECTATOR_MAX_DIRECT,
+)
 from messages import *
 
 # Server address
 # Bind to all interfaces so remote clients can connect
 HOST = '0.0.0.0'
 PORT = 5555
+ROOM = "main"   # this server's room on the leaderboard
 
 # Create TCP socket
 server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -30,10 +44,50 @@ players = {}  # player_id -> { icon, score, locks_broken }
 buffers = {} # socket -> partial data buffer
 host_id = None
 game_started = False
-
-# Game grid
+START_COUNTDOWN = 3   # seconds between the start broadcast and play
+
+# Match bookkeeping for the history database; the writer thread does the disk I/O
+history = HistoryWriter()
+atexit.register(history.close)
+match_started_at = None   # wall clock, for the record
+match_ends_at = None      # monotonic deadline (countdown + GAME_TIME)
+match_over = False
+roster = {}               # player_id -> icon of everyone who played this match
+lock_outcomes = {}        # lock_id -> (broken_by, verified wpm, points, wall time)
+recorder = None           # ReplayWriter of the match in progress (REPLAY_RECORD)
+
+# Presence: latest cursor per player, flushed as one batched frame per tick
+cursors = {}          # player_id -> [x, y] (grid-relative, quantized) or None
+dirty_cursors = set() # player_ids whose cursor changed since the last tick
+# Typing progress on claimed locks, flushed with the same tick
+progress = {}         # lock_id -> [correct_prefix_len, wpm]
+dirty_progress = set()
+# Break requests wait for the end of the loop pass so their keystroke traces are verified together
+pending_breaks = []   # (socket, user_id, msg)
+# Every player ranked by score; pushed once per tick after a change
+leaderboard = Leaderboard()
+leaderboard_dirty = False
+TICK_INTERVAL = 1.0 / SERVER_TICK_RATE
+next_tick = time.monotonic() + TICK_INTERVAL
+
+# Spectators: read-only sockets, not players. Room changes are coalesced and go out as one
+# shared pre-encoded frame per spectator tick, written without blocking after player traffic.
+spectators = Fanout()
+spectator_sockets = set() # joined as spectators, until closed (the fan-out forgets a dropped one at once)
+spectator_grid_frames = {}  # full flag -> encoded grid reply, until the next room broadcast
+spectator_lines = []      # encoded room messages with no coalesced form (lobby, start), in order
+spectator_locks = set()   # locks changed since the last spectator frame
+spectator_cursors = set()
+spectator_progress = set()
+spectator_grid_dirty = False
+SPECTATOR_MESSAGES = (MSG_PING, MSG_GRID_REQ, MSG_LEADERBOARD_REQ)    # all a spectator may send
+SPECTATOR_INTERVAL = 1.0 / SPECTATOR_TICK_RATE
+next_spectator_tick = time.monotonic() + SPECTATOR_INTERVAL
+
+# Game grid, generated from a seed so clients can rebuild it locally
 grid = Grid(GRID_ROWS, GRID_COLS)
-grid.generate_locks()
+grid.generate_locks(random.getrandbits(32))
+room_hash = StateHash()
 
 
 # helper to send JSON messages
@@ -44,19 +98,262 @@ def send(socket, data):
     except:
         pass
 
-# Broadcast message to all clients (except one if needed)
+def encode(data):
+    return (json.dumps(data) + '\n').encode()
+
+# answer a request; spectator sockets are non-blocking and go through their queue
+def reply(sock, data):
+    if sock in spectator_sockets:
+        spectators.send_to(sock, encode(data))
+    else:
+        send(sock, data)
+
+# Broadcast message to all clients (except one if needed); the room's replay and spectators get it too
 def broadcast(data, exclude_socket=None):
-    message = json.dumps(data) + '\n'
+    if recorder is not None:
+        recorder.message(data)
+    if data.get("type") not in (MSG_PRESENCE, MSG_TYPING_PROGRESS):
+        spectator_grid_frames.clear()
+    message = encode(data)
     for sock in clients:
         if sock != exclude_socket:
             try:
-                sock.sendall(message.encode())
+                sock.sendall(message)
             except:
                 pass
+    if len(spectators):
+        feed_spectators(data, message)
+
+# merge a room message into the next spectator frame
+def feed_spectators(data, message):
+    global spectator_grid_dirty
+    msg_type = data.get("type")
+    if msg_type == MSG_GRID_UPDATE:
+        spectator_locks.update(data.get("locks", ()))
+        spectator_grid_dirty = True
+    elif msg_type == MSG_PRESENCE:
+        spectator_cursors.update(data["cursors"])
+    elif msg_type == MSG_TYPING_PROGRESS:
+        spectator_progress.update(data["locks"])
+    else:
+        spectator_lines.append(message)
+
+# one frame with everything since the last spectator tick, encoded once for all spectators.
+# The grid part is a single delta of every changed lock, so the room hash it carries still matches.
+def flush_spectators():
+    global spectator_grid_dirty
+    parts = list(spectator_lines)
+    if spectator_grid_dirty:
+        parts.append(encode(grid_message(spectator_locks)))
+    if spectator_cursors:
+        parts.append(encode({"type": MSG_PRESENCE, "cursors": {pid: cursors.get(pid) for pid in spectator_cursors}}))
+    if spectator_progress:
+        parts.append(encode({"type": MSG_TYPING_PROGRESS, "locks": {lock_id: progress.get(lock_id) for lock_id in spectator_progress}}))
+    spectators.publish(b"".join(parts))
+    spectator_lines.clear()
+    spectator_locks.clear()
+    spectator_cursors.clear()
+    spectator_progress.clear()
+    spectator_grid_dirty = False
+
+# everything a new spectator needs to show the room: state, lobby, cursors and typing progress
+def spectator_welcome(name):
+    return b"".join(encode(data) for data in (
+        grid_message(state=True, your_id=name, spectator=True),
+        {"type": MSG_JOIN_ACK, "user_id": name, "spectator": True},
+        {"type": MSG_LOBBY_UPDATE, "players": players, "host_id": host_id, "game_started": game_started},
+        {"type": MSG_PRESENCE, "cursors": {pid: cursor for pid, cursor in cursors.items() if cursor is not None}},
+        {"type": MSG_TYPING_PROGRESS, "locks": progress},
+    ))
+
+# grid reply for spectators, encoded once per room change however often they ask
+def spectator_grid_frame(full):
+    frame = spectator_grid_frames.get(full)
+    if frame is None:
+        frame = spectator_grid_frames[full] = encode(grid_message(state=True, full=full))
+    return frame
+
+# close spectators the fan-out gave up on (fell SPECTATOR_MAX_PENDING behind or errored)
+def close_dropped_spectators():
+    for sock in spectators.dropped:
+        print(f"[SPECTATOR] dropped a slow spectator ({len(spectators)} watching)")
+        if sock in sockets_list:
+            sockets_list.remove(sock)
+        buffers.pop(sock, None)
+        spectator_sockets.discard(sock)
+        sock.close()
+    spectators.dropped.clear()
+
+# record a lock's current claim/break state in the room hash; returns its id for the update's delta
+def touch_lock(lock_id):
+    lock = grid.get_lock(lock_id)
+    room_hash.set_lock(lock.lock_id, lock.claimed_by_user, lock.broken_by_user)
+    return lock.lock_id
+
+# grid update: layout (seed, corpus version, checksum), the claim/break state of the locks in `changed`
+# and the room hash; the whole state only on join/resync (state=True), lock strings only when full
+def grid_message(changed=(), state=False, full=False, **extra):
+    message = {
+        "type": MSG_GRID_UPDATE,
+        "layout": grid.layout_dict(),
+        "players": players,
+        "hash": room_hash.room_digest(players),
+        **extra,
+    }
+    if state or full:
+        message["state"] = grid.state_dict()
+    else:
+        message["locks"] = {
+            lock_id: [grid.get_lock(lock_id).claimed_by_user, grid.get_lock(lock_id).broken_by_user]
+            for lock_id in changed
+        }
+    if full:
+        message["grid"] = grid.to_dict()
+    return message
+
+# re-rank a player after a score change, or drop them once they left
+def update_leaderboard(player_id):
+    global leaderboard_dirty
+    info = players.get(player_id)
+    if info is None:
+        leaderboard.remove(player_id)
+    else:
+        leaderboard.update(player_id, info["score"], info["locks_broken"], ROOM)
+    leaderboard_dirty = True
+
+# top entries plus the receiver's own rank (top is shared when sending to everyone)
+def leaderboard_message(player_id, n=LEADERBOARD_TOP, top=None):
+    return {
+        "type": MSG_LEADERBOARD,
+        "top": leaderboard.top(n) if top is None else top,
+        "rank": leaderboard.rank(player_id),
+        "total": len(leaderboard)
+    }
+
+# start recording the room to a replay file, with a keyframe right away
+def start_recording():
+    global recorder
+    path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{ROOM}-{grid.seed}.cotr")
+    try:
+        recorder = ReplayWriter(path, {
+            "room": ROOM,
+            "started_at": time.time(),
+            "game_time": GAME_TIME,
+            "countdown": START_COUNTDOWN,
+            "rows": grid.height,
+            "cols": grid.width,
+            "layout": grid.layout_dict()
+        })
+    except OSError as e:
+        print(f"[REPLAY] not recording: {e}")
+        return
+    atexit.register(recorder.close)
+    recorder.keyframe(grid, players, cursors, progress)
+    print(f"[REPLAY] recording to {path}")
+
+# the match ended (time up or every lock broken): queue its record, once
+def end_match(reason):
+    global match_over, recorder
+    if match_over:
+        return
+    match_over = True
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+    start = time.perf_counter()
+    history.record(match_record(grid, lock_outcomes, roster, match_started_at, time.time(), reason))
+    print(f"[MATCH] over ({reason}), history queued in {(time.perf_counter() - start) * 1000:.3f} ms")
+
+# once per tick: send everything that was batched since the last one
+def flush_tick():
+    global leaderboard_dirty
+    if dirty_cursors:
+        # only changed cursors go out, so a frame never grows past one entry per moving player
+        broadcast({
+            "type": MSG_PRESENCE,
+            "cursors": {pid: cursors.get(pid) for pid in dirty_cursors}
+        })
+        dirty_cursors.clear()
+    if dirty_progress:
+        broadcast({
+            "type": MSG_TYPING_PROGRESS,
+            "locks": {lock_id: progress.get(lock_id) for lock_id in dirty_progress}
+        })
+        dirty_progress.clear()
+    if leaderboard_dirty:
+        # the top list is built once; each client's copy differs only in its rank
+        top = leaderboard.top(LEADERBOARD_TOP)
+        for client_socket, player_id in list(clients.items()):
+            if player_id in players:
+                send(client_socket, leaderboard_message(player_id, top=top))
+        leaderboard_dirty = False
+
+# forget a departed player's cursor; the next presence frame tells clients to hide it
+def drop_cursor(player_id):
+    if player_id in cursors:
+        del cursors[player_id]
+        dirty_cursors.add(player_id)        # even a hidden (None) cursor may have an unsent hide pending
+    else:
+        dirty_cursors.discard(player_id)
+
+# a lock changed hands or broke; clear its bar on every client
+def drop_progress(lock_id):
+    if progress.pop(lock_id, None) is not None:
+        dirty_progress.add(lock_id)
+
+# verify the traces of every break request queued this pass in one call, then apply them in arrival order
+def resolve_breaks():
+    expected = []
+    for _, _, msg in pending_breaks:
+        try:
+            expected.append(len(grid.get_lock(msg["lock_id"]).normalized_string))
+        except Exception:
+            expected.append(0)                                  # cannot verify; break_lock rejects it below
+    verdicts = verify_traces([msg.get("trace") for _, _, msg in pending_breaks], expected)
+
+    changed = set()
+    for (sock, user_id, msg), (ok, verified_wpm, reason) in zip(pending_breaks, verdicts):
+        try:
+            lock_id = msg.get("lock_id")
+            user_string = msg.get("user_string")
+            if not ok:
+                print(f"[PROOF] {user_id} lock {lock_id} rejected: {reason}")
+
+            # The score uses the WPM measured from the trace, not the one the client reports
+            success, points = grid.break_lock(lock_id, user_string, verified_wpm, user_id)
+            lock = grid.get_lock(lock_id)
+            changed.add(touch_lock(lock_id))
+            if lock.claimed_by_user is None:
+                drop_progress(lock_id)
+
+            if success:
+                players[user_id]["score"] += points
+                players[user_id]["locks_broken"] += 1
+                update_leaderboard(user_id)
+                lock_outcomes[lock_id] = (user_id, verified_wpm, points, time.time())
+
+            # send response to client
+            send(sock, {
+                "type": MSG_BREAK_RES,
+                "success": success,
+                "points": points,
+                "lock": lock.to_dict()
+            })
+
+        except Exception as e:
+            print(f"[SERVER ERROR in BREAK_REQ] {e}")
+    pending_breaks.clear()
+
+    # one grid + scores broadcast for the whole batch
+    broadcast(grid_message(changed))
+    if grid.remaining_locks <= 0:
+        end_match("all locks broken")
 
 # Main loop
 while True:
-    read_sockets, _, exception_sockets = select.select(sockets_list, [], sockets_list)
+    # wake at least once per tick so batched frames go out even when no one is sending
+    timeout = max(0.0, min(next_tick, next_spectator_tick) - time.monotonic())
+    read_sockets, _, exception_sockets = select.select(sockets_list, spectators.writers(), sockets_list, timeout)
 
     for notified_socket in read_sockets:
         if notified_socket == server_socket: #new player connecting
@@ -94,9 +391,76 @@ while True:
                     msg_type = msg.get("type")
                     user_id = msg.get("user_id")
 
-                    print(msg)
+                    if msg_type not in (MSG_MOUSE_COORDS, MSG_TYPING_PROGRESS, MSG_PING):   # too chatty to log
+                        print(msg)
+
+                    # Spectators only watch
+                    if notified_socket in spectator_sockets and msg_type not in SPECTATOR_MESSAGES:
+                        continue
+
+                    # --- LATENCY PROBE (answered right away, in any phase) ---
+                    if msg_type == MSG_PING:
+                        reply(notified_socket, {"type": MSG_PONG, "t": msg.get("t")})
+                        continue
+                    # --- FULL GRID (client could not rebuild the layout locally) ---
+                    if msg_type == MSG_GRID_REQ:
+                        # full=False: the client has the layout but its state hash stopped matching
+                        full = bool(msg.get("full", True))
+                        if notified_socket in spectator_sockets:
+                            spectators.send_to(notified_socket, spectator_grid_frame(full))
+                        else:
+                            send(notified_socket, grid_message(state=True, full=full))
+                        continue
+                    # --- LEADERBOARD (any phase) ---
+                    if msg_type == MSG_LEADERBOARD_REQ:
+                        try:
+                            n = min(max(int(msg.get("n", LEADERBOARD_TOP)), 1), LEADERBOARD_MAX)
+                        except (TypeError, ValueError):
+                            n = LEADERBOARD_TOP
+                        reply(notified_socket, leaderboard_message(clients.get(notified_socket), n))
+                        continue
                     # Ignore gameplay messages until game start
-                    if not game_started and msg_type in (MSG_CLAIM_REQ, MSG_BREAK_REQ, MSG_UNCLAIM_REQ):
+                    if not game_started and msg_type in (MSG_CLAIM_REQ, MSG_BREAK_REQ, MSG_UNCLAIM_REQ, MSG_MOUSE_COORDS, MSG_TYPING_PROGRESS):
+                        continue
+
+                    # --- CURSOR PRESENCE (batched, relayed on the next tick) ---
+                    if msg_type == MSG_MOUSE_COORDS:
+                        player_id = clients.get(notified_socket)
+                        x, y = msg.get("x"), msg.get("y")
+                        cursor = [int(x), int(y)] if x is not None and y is not None else None
+                        if player_id in players and cursors.get(player_id) != cursor:
+                            cursors[player_id] = cursor
+                            dirty_cursors.add(player_id)
+                        continue
+
+                    # --- TYPING PROGRESS (delta from the claimant, batched per tick) ---
+                    if msg_type == MSG_TYPING_PROGRESS:
+                        lock_id = msg.get("lock_id")
+                        player_id = clients.get(notified_socket)
+                        if not isinstance(lock_id, int) or not 0 <= lock_id < grid.size:
+                            continue
+                        if grid.get_lock(lock_id).claimed_by_user != player_id:
+                            continue
+                        entry = progress.setdefault(lock_id, [0, 0])
+                        entry[0] = max(0, entry[0] + int(msg.get("d", 0)))
+                        if "w" in msg:
+                            entry[1] = int(msg["w"])
+                        dirty_progress.add(lock_id)
+                        continue
+
+                    # --- SPECTATE (read-only: not a player, fed from shared frames) ---
+                    if msg_type == MSG_JOIN and msg.get("spectator"):
+                        name = user_id or f"Spectator{len(spectators) + 1}"
+                        temp_id = clients.pop(notified_socket, None)
+                        if host_id == temp_id:
+                            host_id = next(iter(players.keys()), None)
+                        if len(spectators) >= SPECTATOR_MAX_DIRECT:     # larger audiences belong on relay.py
+                            print(f"[SPECTATOR] {name} refused: {len(spectators)} already watching")
+                            raise ConnectionResetError
+                        spectators.add(notified_socket, name)
+                        spectator_sockets.add(notified_socket)
+                        spectators.send_to(notified_socket, spectator_welcome(name))
+                        print(f"[SPECTATOR] {name} joined ({len(spectators)} watching)")
                         continue
 
                     # --- JOIN/HELLO ---
@@ -115,18 +479,16 @@ while True:
 
                         # Map this socket to final id
                         clients[notified_socket] = final_id
+                        update_leaderboard(final_id)
+                        if game_started:
+                            roster[final_id] = icon
 
                         # Assign host if none yet
                         if host_id is None or host_id not in players:
                             host_id = final_id
 
-                        # Send initial grid and players including their final id
-                        send(notified_socket, {
-                            "type": MSG_GRID_UPDATE,
-                            "grid": grid.to_dict(),
-                            "players": players,
-                            "your_id": final_id,
-                        })
+                        # Send initial grid (seed form) and players including their final id
+                        send(notified_socket, grid_message(state=True, your_id=final_id))
 
                         # Acknowledge join explicitly so client can rename locally
                         send(notified_socket, {
@@ -148,52 +510,28 @@ while True:
                         lock_id = msg.get("lock_id")
                         success = grid.claim_lock(lock_id, user_id)
                         lock = grid.get_lock(lock_id)
+                        touch_lock(lock_id)
+                        if success:
+                            drop_progress(lock_id)                      # claimant starts from an empty bar
                         
                         #private response back to the player
                         send(notified_socket, {
                             "type": MSG_CLAIM_RES,
                             "success": success,
-                            "lock": lock.to_dict()
+                            "lock": lock.to_dict(),
+                            "req_id": msg.get("req_id")
                         })
 
                         #broadcast the updated grid and player info
-                        broadcast({
-                            "type": MSG_GRID_UPDATE,
-                            "grid": grid.to_dict(),
-                            "players": players
-                        })
+                        broadcast(grid_message([lock_id]))
 
-                    # --- BREAK LOCK ---
+                    # --- BREAK LOCK (verified in a batch after this pass) ---
                     elif msg_type == MSG_BREAK_REQ:
-                        try:
-                            lock_id = msg.get("lock_id")
-                            user_string = msg.get("user_string")
-                            user_wpm = msg.get("user_wpm")
-
-                            success, points = grid.break_lock(lock_id, user_string, user_wpm, user_id)
-                            lock = grid.get_lock(lock_id)
-
-                            if success:
-                                players[user_id]["score"] += points
-                                players[user_id]["locks_broken"] += 1
-
-                            # send response to client
-                            send(notified_socket, {
-                                "type": MSG_BREAK_RES,
-                                "success": success,
-                                "points": points,
-                                "lock": lock.to_dict()
-                            })
-
-                            # broadcast updated grid + scores
-                            broadcast({
-                                "type": MSG_GRID_UPDATE,
-                                "grid": grid.to_dict(),
-                                "players": players
-                            })
-
-                        except Exception as e:
-                            print(f"[SERVER ERROR in BREAK_REQ] {e}")
+                        lock_id = msg.get("lock_id")
+                        if not isinstance(lock_id, int) or not 0 <= lock_id < grid.size:
+                            send(notified_socket, {"type": MSG_BREAK_RES, "success": False, "points": 0})
+                            continue
+                        pending_breaks.append((notified_socket, user_id, msg))
 
                     # --- UNCLAIM LOCK ---
                     elif msg_type == MSG_UNCLAIM_REQ:
@@ -201,20 +539,20 @@ while True:
                             lock_id = msg.get("lock_id")
                             success = grid.unclaim_lock(lock_id, user_id)
                             lock = grid.get_lock(lock_id)
+                            touch_lock(lock_id)
+                            if success:
+                                drop_progress(lock_id)
 
                             # send response to client
                             send(notified_socket, {
                                 "type": MSG_UNCLAIM_RES,
                                 "success": success,
-                                "lock": lock.to_dict()
+                                "lock": lock.to_dict(),
+                                "req_id": msg.get("req_id")
                             })
 
                             # broadcast updated grid
-                            broadcast({
-                                "type": MSG_GRID_UPDATE,
-                                "grid": grid.to_dict(),
-                                "players": players
-                            })
+                            broadcast(grid_message([lock_id]))
 
                         except Exception as e:
                             print(f"[SERVER ERROR in UNCLAIM_REQ] {e}")
@@ -224,10 +562,15 @@ while True:
                         # Allow only host to trigger once
                         if not game_started and user_id == host_id:
                             game_started = True
+                            match_started_at = time.time()
+                            match_ends_at = time.monotonic() + START_COUNTDOWN + GAME_TIME
+                            roster = {pid: info["icon"] for pid, info in players.items()}
+                            if REPLAY_RECORD:
+                                start_recording()
                             # Announce synchronized start with a short countdown
                             broadcast({
                                 "type": MSG_START_GAME,
-                                "countdown_seconds": 3,
+                                "countdown_seconds": START_COUNTDOWN,
                                 "game_time": GAME_TIME
                             })
                         else:
@@ -236,14 +579,20 @@ while True:
 
 
             except Exception as e:
-                pid = clients.get(notified_socket, "Unknown")
+                pid = clients.get(notified_socket) or spectators.name(notified_socket) or "Unknown"
                 print(f"[DISCONNECT] {pid}")
+                if notified_socket not in sockets_list:                 # already dropped by the fan-out
+                    continue
                 sockets_list.remove(notified_socket)
                 del buffers[notified_socket]
+                spectators.remove(notified_socket)
+                spectator_sockets.discard(notified_socket)
                 if notified_socket in clients:
                     leaving_id = clients[notified_socket]
                     if leaving_id in players:
                         del players[leaving_id]
+                    update_leaderboard(leaving_id)
+                    drop_cursor(leaving_id)
                     del clients[notified_socket]
                 notified_socket.close()
 
@@ -257,12 +606,22 @@ while True:
                     "game_started": game_started
                 })
 
+    if pending_breaks:
+        resolve_breaks()
+
     for sock in exception_sockets:
+        if sock not in sockets_list:
+            continue
         sockets_list.remove(sock)
+        buffers.pop(sock, None)
+        spectators.remove(sock)
+        spectator_sockets.discard(sock)
         if sock in clients:
             leaving_id = clients[sock]
             if leaving_id in players:
                 del players[leaving_id]
+            update_leaderboard(leaving_id)
+            drop_cursor(leaving_id)
             del clients[sock]
         sock.close()
         # Broadcast lobby update on socket exception removal
@@ -274,3 +633,23 @@ while True:
             "host_id": host_id,
             "game_started": game_started
         })
+
+    # Batched per-tick traffic
+    now = time.monotonic()
+    if match_ends_at is not None and now >= match_ends_at:
+        end_match("time")
+    if now >= next_tick:
+        flush_tick()
+        if recorder is not None and recorder.keyframe_due():
+            recorder.keyframe(grid, players, cursors, progress)
+        next_tick += TICK_INTERVAL
+        if next_tick < now:                                             # fell behind, don't burst to catch up
+            next_tick = now + TICK_INTERVAL
+
+    # Spectators last: their frame is built once per spectator tick and written without blocking
+    if now >= next_spectator_tick:
+        if len(spectators):
+            flush_spectators()
+        next_spectator_tick = max(next_spectator_tick + SPECTATOR_INTERVAL, now)
+    spectators.flush()
+    close_dropped_spectators()
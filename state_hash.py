@@ -0,0 +1,41 @@
+# state_hash.py
+
+# Rolling hash of room state for desync detection. Every lock that is claimed or broken
+# contributes a 64-bit digest of (lock_id, owner, breaker); the digests are XOR-ed, so a
+# lock change costs O(1). Player scores are folded in when the digest is read.
+# The server attaches the digest to each grid update; a client that applied the same
+# updates gets the same value, and asks for a resync only when it does not.
+
+import hashlib
+
+
+def _digest(*fields):
+    return int.from_bytes(hashlib.blake2b(repr(fields).encode(), digest_size=8).digest(), "big")
+
+
+class StateHash:
+    def __init__(self):
+        self.locks = {}                 # lock_id -> digest, untouched locks absent
+        self.value = 0
+
+    def set_lock(self, lock_id, claimed_by, broken_by):
+        old = self.locks.pop(lock_id, 0)
+        new = 0
+        if claimed_by is not None or broken_by is not None:
+            new = _digest("lock", lock_id, claimed_by, broken_by)
+            self.locks[lock_id] = new
+        self.value ^= old ^ new
+
+    # start over from a Grid.state_dict() (JSON keys may be strings)
+    def reset(self, state):
+        self.locks.clear()
+        self.value = 0
+        for lock_id, (claimed_by, broken_by) in state.items():
+            self.set_lock(int(lock_id), claimed_by, broken_by)
+
+    # lock state plus every player's score, as sent in MSG_GRID_UPDATE
+    def room_digest(self, players):
+        value = self.value
+        for player_id, info in players.items():
+            value ^= _digest("player", player_id, info.get("score"), info.get("locks_broken"))
+        return f"{value:016x}"
@@ -0,0 +1,38 @@
+# text_cache.py
+
+# Bounded LRU cache of rendered text surfaces.
+# Most labels on screen (badges, owners, HUD, timer digits) repeat every frame,
+# so font.render only has to run when a string is seen for the first time.
+
+from collections import OrderedDict
+from config import TEXT_CACHE_SIZE
+
+
+class TextCache:
+    def __init__(self, max_entries=TEXT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    # Same argument order as pygame.font.Font.render so call sites read the same
+    def render(self, font, text, antialias, color):
+        key = (font, text, color, antialias)
+        surf = self.surfaces.get(key)
+        if surf is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, antialias, color)
+        self.surfaces[key] = surf
+        if len(self.surfaces) > self.max_entries:
+            self.surfaces.popitem(last=False)
+        return surf
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def clear(self):
+        self.surfaces.clear()
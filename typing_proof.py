@@ -0,0 +1,101 @@
+# typing_proof.py
+
+# Server-side check of the keystroke trace sent with MSG_BREAK_REQ.
+# A trace is base64 of varints, one per key event: (gap_ms << 1) | is_backspace,
+# where the first gap is measured from when the lock screen opened (see wpm.KeystrokeTrace).
+# All break requests received in one server loop pass are decoded and checked together
+# with NumPy, so a burst of breaks costs a handful of array operations.
+
+import base64
+import binascii
+import numpy as np
+from config import (
+    PROOF_MAX_BYTES,
+    PROOF_MAX_WPM,
+    PROOF_MIN_GAP_MS,
+    PROOF_FAST_SHARE,
+    PROOF_MIN_CV,
+    PROOF_CV_MIN_KEYS,
+    PROOF_LEN_SLACK,
+)
+
+VARINT_MAX_BYTES = 4            # 28 bits of (gap << 1): gaps up to ~37 hours
+
+
+def _decode(trace):
+    # base64 -> bytes, or None when the trace is missing, malformed or oversized
+    if not isinstance(trace, str) or not trace or len(trace) > PROOF_MAX_BYTES * 4 // 3 + 4:
+        return None
+    try:
+        raw = base64.b64decode(trace, validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    if not raw or len(raw) > PROOF_MAX_BYTES or raw[-1] & 0x80:
+        return None                                                     # must end on a complete varint
+    return raw
+
+
+# traces: list of base64 strings (or None); expected_lengths: characters of each lock string
+# returns one (ok, wpm, reason) per trace, in order
+def verify_traces(traces, expected_lengths):
+    results = [(False, 0.0, "missing or malformed trace")] * len(traces)
+    raws = [_decode(trace) for trace in traces]
+    valid = [i for i, raw in enumerate(raws) if raw is not None]
+    if not valid:
+        return results
+
+    byte_counts = np.array([len(raws[i]) for i in valid])
+    buf = np.frombuffer(b"".join(raws[i] for i in valid), dtype=np.uint8)
+
+    # Varint boundaries over the concatenated buffer (each trace ends on a boundary)
+    ends = (buf & 0x80) == 0
+    starts = np.flatnonzero(np.concatenate(([True], ends[:-1])))
+    varint_of_byte = np.cumsum(ends) - ends
+    shift = 7 * (np.arange(buf.size) - starts[varint_of_byte])
+    values = np.add.reduceat((buf & 0x7f).astype(np.int64) << np.minimum(shift, 56), starts)
+    too_long = np.diff(np.append(starts, buf.size)) > VARINT_MAX_BYTES
+
+    # Events per trace and the trace each event belongs to
+    byte_offsets = np.concatenate(([0], np.cumsum(byte_counts)[:-1]))
+    events = np.add.reduceat(ends.astype(np.int64), byte_offsets)
+    trace_of = np.repeat(np.arange(len(valid)), events)
+    first = np.zeros(values.size, dtype=bool)
+    first[np.concatenate(([0], np.cumsum(events)[:-1]))] = True        # first gap is reading time, not a key gap
+
+    gaps = values >> 1
+    backspace = (values & 1).astype(np.int64)
+    key_gap = ~first
+    n = len(valid)
+    total_ms = np.bincount(trace_of, weights=gaps, minlength=n)
+    backspaces = np.bincount(trace_of, weights=backspace, minlength=n)
+    bad_varints = np.bincount(trace_of, weights=too_long, minlength=n)
+    key_gaps = np.bincount(trace_of, weights=key_gap, minlength=n)
+    gap_sum = np.bincount(trace_of, weights=gaps * key_gap, minlength=n)
+    gap_sq = np.bincount(trace_of, weights=(gaps * gaps) * key_gap, minlength=n)
+    fast = np.bincount(trace_of, weights=(gaps < PROOF_MIN_GAP_MS) & key_gap, minlength=n)
+
+    # Characters left after the backspaces must match the lock string
+    final_len = events - 2 * backspaces
+    expected = np.array([expected_lengths[i] for i in valid], dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        wpm = np.where(total_ms > 0, (expected / 5.0) * 60000.0 / total_ms, np.inf)
+        mean = gap_sum / key_gaps
+        cv = np.sqrt(np.maximum(gap_sq / key_gaps - mean * mean, 0.0)) / mean
+        fast_share = fast / key_gaps
+
+    for k, i in enumerate(valid):
+        if bad_varints[k]:
+            reason = "malformed trace"
+        elif abs(final_len[k] - expected[k]) > PROOF_LEN_SLACK:
+            reason = "trace length does not match the lock"
+        elif not wpm[k] <= PROOF_MAX_WPM:
+            reason = "implausible speed"
+        elif key_gaps[k] and fast_share[k] > PROOF_FAST_SHARE:
+            reason = "too many instant keystrokes"
+        elif key_gaps[k] >= PROOF_CV_MIN_KEYS and not cv[k] >= PROOF_MIN_CV:
+            reason = "machine-regular timing"
+        else:
+            results[i] = (True, round(float(wpm[k]), 1), None)
+            continue
+        results[i] = (False, 0.0, reason)
+    return results
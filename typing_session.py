@@ -0,0 +1,97 @@
+# typing_session.py
+
+# Lock-screen typing state: what the player typed, how much of it matches the target,
+# the wrapped target text and the surfaces used to draw the input.
+# Everything is updated once per keystroke (or per window width) instead of once per frame.
+
+from wpm import KeystrokeTimeline
+from utils import MATCH_CHAR_MAP
+
+# Quote/dash/space variants some keyboards and IMEs produce count as their ASCII form
+def normalize_char(ch):
+    return MATCH_CHAR_MAP.get(ch, ch)
+
+
+class TypingSession:
+    def __init__(self, lock):
+        self.lock_id = lock.lock_id
+        self.lock_string = lock.lock_string
+        self.target = [normalize_char(ch) for ch in lock.lock_string]    # normalized once, compared per keystroke
+        self.chars = []
+        self.correct_len = 0                                            # length of the input prefix that matches the target
+        self.timeline = KeystrokeTimeline()                             # timed from when the lock screen opens
+        self.timeline.start()
+        self._text = ""
+        self._layout_key = None
+        self._layout = []
+        self._spans_key = None
+        self._spans = None
+
+    def __len__(self):
+        return len(self.chars)
+
+    @property
+    def input_text(self):
+        if self._text is None:
+            self._text = "".join(self.chars)
+        return self._text
+
+    # Only the new character is compared: the prefix grows only while nothing before it is wrong
+    def type_text(self, text):
+        for ch in text:
+            pos = len(self.chars)
+            correct = self.correct_len == pos and pos < len(self.target) and normalize_char(ch) == self.target[pos]
+            if correct:
+                self.correct_len += 1
+            self.chars.append(ch)
+            self.timeline.key(correct)
+        self._text = None
+        self._spans = None
+
+    def backspace(self):
+        if not self.chars:
+            return
+        self.chars.pop()
+        self.timeline.backspace(self.correct_len > len(self.chars))
+        self.correct_len = min(self.correct_len, len(self.chars))
+        self._text = None
+        self._spans = None
+
+    # Net WPM: correct characters still in the input, timed up to the last keystroke (or now_ns)
+    def wpm(self, now_ns=None):
+        return round(self.timeline.net_wpm(now_ns), 1)
+
+    # Target text wrapped to max_w, recomputed only when the font or width changes
+    def wrapped_lines(self, font, max_w):
+        key = (font, max_w)
+        if key != self._layout_key:
+            self._layout_key = key
+            self._layout = self._wrap(font, max_w)
+        return self._layout
+
+    def _wrap(self, font, max_w):
+        lines = []
+        current = ''
+        for w in self.lock_string.split(' '):
+            test = (current + ' ' + w).strip()
+            if font.size(test)[0] <= max_w:
+                current = test
+            else:
+                if current:
+                    lines.append(current)
+                current = w
+        if current:
+            lines.append(current)
+        return lines
+
+    # (correct span, wrong span) surfaces, kept until the input changes
+    def input_surfaces(self, font, correct_color, wrong_color):
+        key = (font, correct_color, wrong_color)
+        if self._spans is None or key != self._spans_key:
+            text = self.input_text
+            self._spans_key = key
+            self._spans = (
+                font.render(text[:self.correct_len], True, correct_color),
+                font.render(text[self.correct_len:], True, wrong_color),
+            )
+        return self._spans
@@ -0,0 +1,123 @@
+# ui_assets.py
+
+# Fonts, CRT overlay surfaces and a pre-warmed text cache for GameUI.
+# build_steps() does the work in small pieces so client.py can spread it over
+# connecting-screen frames while the connect and join handshake are in flight.
+
+import pygame
+from config import GRID_COLORS
+from text_cache import TextCache
+
+# GameUI attribute name -> point size (default pygame font)
+FONT_SIZES = {
+    "font": 24,
+    "hud_font": 22,
+    "title_font": 72,
+    "mono_font": 24,
+    "lock_text_font": 32,         # typing screen fonts (bigger and more visible)
+    "lock_mono_font": 36,
+    "lock_info_font": 28,
+}
+
+HUD_TEXT = GRID_COLORS.get("hud_text", (226, 203, 156))
+
+# Labels of the lobby, countdown and grid screens, rendered ahead of the first frame
+# (font, text, color) must match the draw calls exactly to be cache hits
+WARM_LABELS = [
+    ("title_font", "LOBBY", (20, 20, 20)),
+    ("title_font", "LOBBY", HUD_TEXT),
+    ("hud_font", "Players joined:", HUD_TEXT),
+    ("hud_font", "Start Game (Enter)", HUD_TEXT),
+    ("hud_font", "Waiting for host to start...", HUD_TEXT),
+    ("title_font", "3", HUD_TEXT),
+    ("title_font", "2", HUD_TEXT),
+    ("title_font", "1", HUD_TEXT),
+    ("title_font", "GO!", (120, 255, 120)),
+    ("hud_font", "Get ready...", HUD_TEXT),
+    ("hud_font", "H: Help", HUD_TEXT),
+    ("hud_font", "L: Legend", HUD_TEXT),
+    ("hud_font", "F: Fullscreen", HUD_TEXT),
+    ("hud_font", "E", (0, 0, 0)),
+    ("hud_font", "M", (0, 0, 0)),
+    ("hud_font", "H", (0, 0, 0)),
+]
+
+
+def create_scanline_surface(size):
+    width, height = size
+    scan = pygame.Surface((width, height), pygame.SRCALPHA)
+    scan.set_alpha(90)
+    for y in range(0, height, 3):
+        pygame.draw.line(scan, (0, 0, 0, 140), (0, y), (width, y))
+    return scan
+
+
+def create_flicker_surface(size):
+    # Plain white layer; each frame only its surface alpha changes
+    flicker = pygame.Surface(size).convert()
+    flicker.fill((255, 255, 255))
+    return flicker
+
+
+def create_vignette_surface(size):
+    width, height = size
+    vignette = pygame.Surface((width, height), pygame.SRCALPHA)
+    # Simple radial dark corners
+    for i in range(10):
+        alpha = int(18 - i * 1.8)
+        pygame.draw.rect(
+            vignette,
+            (0, 0, 0, alpha),
+            pygame.Rect(0 + i, 0 + i, width - i * 2, height - i * 2),
+            border_radius=6,
+        )
+    return vignette
+
+
+class UIAssets:
+    def __init__(self):
+        self.fonts = {}
+        self.text_cache = TextCache()
+        self.overlay_size = None
+        self.overlays = None                # (scanline, vignette, flicker) for overlay_size
+        self.steps_done = 0
+        self.steps_total = len(FONT_SIZES) + 3 + len(WARM_LABELS)
+        self.ready = False
+
+    # Generator: one font, overlay or label per step (the display mode must already be set)
+    def build_steps(self, size):
+        for name, points in FONT_SIZES.items():
+            self.fonts[name] = pygame.font.Font(None, points)
+            self.steps_done += 1
+            yield
+        overlays = []
+        for create in (create_scanline_surface, create_vignette_surface, create_flicker_surface):
+            overlays.append(create(size))
+            self.steps_done += 1
+            yield
+        self.overlay_size = tuple(size)
+        self.overlays = tuple(overlays)
+        for font_name, text, color in WARM_LABELS:
+            self.text_cache.render(self.fonts[font_name], text, True, color)
+            self.steps_done += 1
+            yield
+        self.ready = True
+
+    def build(self, size):
+        for _ in self.build_steps(size):
+            pass
+
+    def progress(self):
+        return self.steps_done / self.steps_total
+
+    # Overlays for the current window size, rebuilt only when the size changes
+    def overlays_for(self, size):
+        size = tuple(size)
+        if size != self.overlay_size:
+            self.overlays = (
+                create_scanline_surface(size),
+                create_vignette_surface(size),
+                create_flicker_surface(size),
+            )
+            self.overlay_size = size
+        return self.overlays
@@ -9,44 +9,16 @@
 
 # def generate_typing_string(num_words): ...
 # def timer(): return time.time()
-import random
+import re
 import string
 import unicodedata
 import nltk
 import pygame
-from nltk.corpus import gutenberg
-from config import LOCK_STRING_RANGES as size_range
 
-# download corpus of sentences
+# download corpus of sentences (loaded and scored by corpus.py)
 nltk.download('punkt', quiet=True)
 nltk.download('gutenberg', quiet=True)
 
-# generate strings for all locks in the grid
-def generate_strings(grid, size):
-    strings = []
-    sentences = list(gutenberg.sents())
-    output = ""
-
-    # iterate over grid size
-    for i in range(size):
-        random.shuffle(sentences)                                       # shuffle sentences for each lock
-        difficulty = grid[i]
-        min_len, max_len = [x * 5 for x in size_range[difficulty]]      # assume word length is 5 chars
-        strings.append(0)
-        
-        for s in sentences:                                             # iterate over all strings
-            output = _clean_join(s)                                     # handle punctuation
-            
-            if min_len <= len(output) <= max_len:                       # if string length within difficulty range
-                if output not in strings:                               # if string has not been repeated
-                    strings[i] = output                                 # add string to list
-                    break                                               # break once found
-        
-        if strings[i] == 0:
-            strings[i] = "Couldn't find string, now have fun TyPinG tHis iNSteAd!"      # need this to prevent run time errors for now
-
-    return strings
-
 # helper method for generating clean sentences
 def _clean_join(words):
     allowed = {',', '.', '!', ':', '?', "'"}
@@ -81,9 +53,9 @@ def get_difficulty(level):
     else:
         return None
         
-# calculate points based on sentence length and target wpm
-def calculate_points(length, wpm):
-    return round((length / wpm) * 25)                                   # scale by 25 as default output gets rounded to 1 (wpm is in minutes, strings of this size get typed in seconds)
+# calculate points based on sentence typing cost (corpus score in character equivalents, or plain length) and target wpm
+def calculate_points(cost, wpm):
+    return round((cost / wpm) * 25)                                   # scale by 25 as default output gets rounded to 1 (wpm is in minutes, strings of this size get typed in seconds)
 
 
 # subtracts current time from the timestamp at which the game/timer began, returns remaining countdown in seconds
@@ -93,6 +65,22 @@ def countdown_timer(start_ticks, total_seconds):
 
 
 
+# Quote/dash/space variants some keyboards and IMEs produce, as their ASCII form; zero-width and BOM characters dropped.
+# One table, applied in a single regex pass (also used per keystroke by typing_session)
+MATCH_CHAR_MAP = {
+    '\u00a0': " ", '\u2007': " ", '\u202f': " ", '\u2009': " ",                 # no-break, figure, narrow no-break, thin space
+    '\u200b': "", '\u200c': "", '\u200d': "", '\u2060': "", '\ufeff': "",
+    '‘': "'", '’': "'", '‚': "'", '‛': "'", '`': "'",
+    '“': '"', '”': '"', '„': '"', '″': '"',
+    '–': "-", '—': "-", '−': "-",
+}
+MATCH_CHAR_RE = re.compile("[" + re.escape("".join(MATCH_CHAR_MAP)) + "]")
+
+
+def _match_char(match):
+    return MATCH_CHAR_MAP[match.group()]
+
+
 def normalize_text_for_match(text: str) -> str:
     """
     Normalize text for robust equality checks between user input and target strings.
@@ -109,44 +97,18 @@ def normalize_text_for_match(text: str) -> str:
     if text is None:
         return ""
 
-    # Replace various spacing characters with normal space
-    text = (
-        text
-        .replace("\u00A0", " ")  # NO-BREAK SPACE
-        .replace("\u2007", " ")  # FIGURE SPACE
-        .replace("\u202F", " ")  # NARROW NO-BREAK SPACE
-        .replace("\u2009", " ")  # THIN SPACE
-    )
-
-    # Remove zero-width and BOM characters
-    text = (
-        text
-        .replace("\u200B", "")   # ZERO WIDTH SPACE
-        .replace("\u200C", "")   # ZERO WIDTH NON-JOINER
-        .replace("\u200D", "")   # ZERO WIDTH JOINER
-        .replace("\u2060", "")   # WORD JOINER
-        .replace("\uFEFF", "")   # BOM
-    )
-
-    # Map curly quotes/backticks and typographic dashes to ASCII equivalents
-    translation_map = {
-        ord('‘'): "'",
-        ord('’'): "'",
-        ord('‚'): "'",
-        ord('‛'): "'",
-        ord('`'): "'",
-        ord('“'): '"',
-        ord('”'): '"',
-        ord('„'): '"',
-        ord('″'): '"',
-        ord('–'): "-",
-        ord('—'): "-",
-        ord('−'): "-",
-    }
-    text = text.translate(translation_map)
-
-    # Unicode normalization to compatibility decomposition/composition
-    text = unicodedata.normalize('NFKC', text)
+    # ASCII fast path: NFKC leaves ASCII unchanged and the backtick is the only mapped ASCII character
+    if text.isascii():
+        if '`' in text:
+            text = text.replace('`', "'")
+        return text.strip()
+
+    # The regex scan runs in C; only the few mapped characters reach the table lookup
+    text = MATCH_CHAR_RE.sub(_match_char, text)
+
+    # Unicode normalization to compatibility decomposition/composition, skipped when it would change nothing
+    if not unicodedata.is_normalized('NFKC', text):
+        text = unicodedata.normalize('NFKC', text)
 
     # Trim edges
     return text.strip()
@@ -6,9 +6,20 @@
 # 1. Track keypress times
 # 2. Calculate elapsed time
 # 3. Calculate words per minute based on typed string
+#
+# No pygame dependency: the server and bots can use this module too.
 
+import base64
 import time
-import pygame
+from array import array
+from config import KEYSTROKE_WINDOW
+
+NS_PER_MINUTE = 60_000_000_000
+
+# Key event kinds stored in the timeline ring
+KEY_WRONG = 0
+KEY_CORRECT = 1
+KEY_BACKSPACE = 2
 
 class WPMCalculator:
     def __init__(self):
@@ -19,7 +30,7 @@ class WPMCalculator:
     
     def start_typing(self):
         """Start tracking typing session"""
-        self.start_time = pygame.time.get_ticks()
+        self.start_time = time.perf_counter_ns()
         self.typing_started = True
         self.keystrokes = 0
     
@@ -33,12 +44,11 @@ class WPMCalculator:
         if not self.typing_started:
             return 0
         
-        self.end_time = pygame.time.get_ticks()
+        self.end_time = time.perf_counter_ns()
         self.typing_started = False
         
         # Calculate time in minutes
-        time_elapsed = (self.end_time - self.start_time) / 1000.0  # Convert to seconds
-        time_minutes = time_elapsed / 60.0
+        time_minutes = (self.end_time - self.start_time) / NS_PER_MINUTE
         
         # Calculate WPM (assuming average word length of 5 characters)
         if time_minutes > 0:
@@ -75,3 +85,180 @@ def calculate_wpm(start_time, end_time, num_characters):
         return round(wpm, 1)
     else:
         return 0
+
+
+class KeystrokeTrace:
+    """
+    Every key gap of an attempt, compact enough to send with a break request.
+
+    One varint per event: (gap_ms << 1) | is_backspace, base64 on the wire. Gaps are
+    taken between millisecond-rounded offsets from the start, so they add up to the
+    exact elapsed time. Most keys fit in one or two bytes. The server decodes and
+    checks traces in typing_proof.py.
+    """
+
+    def __init__(self, start_ns=None):
+        self.data = bytearray()
+        self.start_ns = start_ns
+        self.last_ms = 0
+
+    def add(self, backspace, now_ns=None):
+        now = time.perf_counter_ns() if now_ns is None else now_ns
+        if self.start_ns is None:
+            self.start_ns = now
+        t_ms = max(self.last_ms, (now - self.start_ns) // 1_000_000)
+        value = ((t_ms - self.last_ms) << 1) | int(backspace)
+        self.last_ms = t_ms
+        while value > 0x7f:
+            self.data.append((value & 0x7f) | 0x80)
+            value >>= 7
+        self.data.append(value)
+
+    def encode(self):
+        return base64.b64encode(bytes(self.data)).decode("ascii")
+
+
+class KeystrokeTimeline:
+    """
+    Keystroke timeline of one typing attempt, timed with perf_counter_ns.
+
+    The last `window` key events live in fixed-size array rings; running sums are
+    adjusted as events enter and leave the window, so every figure is O(1) to read
+    after each keystroke. Timestamps can be passed in (server replays, bots);
+    otherwise the current perf_counter_ns is used.
+    """
+
+    def __init__(self, window=KEYSTROKE_WINDOW, start_ns=None):
+        self.window = window
+        self.times = array('q', bytes(8 * window))      # event timestamps (ns)
+        self.gaps = array('q', bytes(8 * window))       # time since the previous event (ns), -1 for the first
+        self.kinds = array('b', bytes(window))          # KEY_WRONG / KEY_CORRECT / KEY_BACKSPACE
+        self.head = 0                                   # next slot to write
+        self.count = 0                                  # events currently in the ring
+        self.start_ns = start_ns                        # attempt start; first keystroke when None
+        self.last_ns = None
+        self.trace = KeystrokeTrace(start_ns)           # whole attempt, sent as the break proof
+
+        # Whole attempt
+        self.typed = 0                                  # printable keystrokes, kept or not
+        self.correct_typed = 0                          # keystrokes that extended the correct prefix
+        self.backspaces = 0
+        self.correct_chars = 0                          # correct characters currently in the input
+
+        # Ring window
+        self.window_chars = 0                           # printable keystrokes with a gap in the window
+        self.window_gap_ns = 0
+        self.window_gap_sq = 0
+        self.window_gaps = 0
+        self.best_rolling = 0.0
+
+    def start(self, now_ns=None):
+        self.start_ns = time.perf_counter_ns() if now_ns is None else now_ns
+        self.trace.start_ns = self.start_ns
+
+    def key(self, correct, now_ns=None):
+        self.typed += 1
+        if correct:
+            self.correct_typed += 1
+            self.correct_chars += 1
+        self._push(KEY_CORRECT if correct else KEY_WRONG, now_ns)
+
+    # removed_correct: the deleted character was part of the correct prefix
+    def backspace(self, removed_correct, now_ns=None):
+        self.backspaces += 1
+        if removed_correct:
+            self.correct_chars -= 1
+        self._push(KEY_BACKSPACE, now_ns)
+
+    def _push(self, kind, now_ns):
+        now = time.perf_counter_ns() if now_ns is None else now_ns
+        if self.start_ns is None:
+            self.start_ns = now
+        gap = -1 if self.last_ns is None else now - self.last_ns
+        self.last_ns = now
+        self.trace.add(kind == KEY_BACKSPACE, now)
+
+        i = self.head
+        if self.count == self.window:
+            self._forget(i)
+        else:
+            self.count += 1
+        self.times[i] = now
+        self.gaps[i] = gap
+        self.kinds[i] = kind
+        if gap >= 0:
+            self.window_gap_ns += gap
+            self.window_gap_sq += gap * gap
+            self.window_gaps += 1
+            if kind != KEY_BACKSPACE:
+                self.window_chars += 1
+        self.head = (i + 1) % self.window
+
+        # Bursts need a few keystrokes behind them; two quick keys are not a speed
+        if self.window_gaps >= max(2, self.window // 4):
+            rolling = self.rolling_wpm()
+            if rolling > self.best_rolling:
+                self.best_rolling = rolling
+
+    # Drop the oldest event's contribution before its slot is overwritten
+    def _forget(self, i):
+        gap = self.gaps[i]
+        if gap >= 0:
+            self.window_gap_ns -= gap
+            self.window_gap_sq -= gap * gap
+            self.window_gaps -= 1
+            if self.kinds[i] != KEY_BACKSPACE:
+                self.window_chars -= 1
+
+    def elapsed_ns(self, now_ns=None):
+        if self.start_ns is None:
+            return 0
+        end = self.last_ns if now_ns is None else now_ns
+        return max(0, (end or self.start_ns) - self.start_ns)
+
+    def _per_minute(self, chars, span_ns):
+        if span_ns <= 0:
+            return 0.0
+        return (chars / 5.0) * NS_PER_MINUTE / span_ns
+
+    # Every printable keystroke, including ones later deleted
+    def gross_wpm(self, now_ns=None):
+        return self._per_minute(self.typed, self.elapsed_ns(now_ns))
+
+    # Only the correct characters still in the input
+    def net_wpm(self, now_ns=None):
+        return self._per_minute(self.correct_chars, self.elapsed_ns(now_ns))
+
+    # Speed over the last `window` key events
+    def rolling_wpm(self):
+        return self._per_minute(self.window_chars, self.window_gap_ns)
+
+    # Fastest rolling speed reached so far
+    def burst_wpm(self):
+        return self.best_rolling
+
+    # Share of printable keystrokes that were right when typed (0-100)
+    def accuracy(self):
+        if not self.typed:
+            return 100.0
+        return 100.0 * self.correct_typed / self.typed
+
+    # 100 minus the coefficient of variation of the key gaps in the window (0-100)
+    def consistency(self):
+        n = self.window_gaps
+        mean = self.window_gap_ns / n if n else 0.0
+        if n < 2 or mean <= 0:
+            return 100.0                                # equal injected timestamps: no spread to measure
+        variance = max(0.0, self.window_gap_sq / n - mean * mean)
+        return max(0.0, 100.0 * (1.0 - variance ** 0.5 / mean))
+
+    def stats(self, now_ns=None):
+        return {
+            "net_wpm": round(self.net_wpm(now_ns), 1),
+            "gross_wpm": round(self.gross_wpm(now_ns), 1),
+            "rolling_wpm": round(self.rolling_wpm(), 1),
+            "burst_wpm": round(self.burst_wpm(), 1),
+            "accuracy": round(self.accuracy(), 1),
+            "consistency": round(self.consistency(), 1),
+            "keystrokes": self.typed + self.backspaces,
+        }